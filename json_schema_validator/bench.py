@@ -0,0 +1,362 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Benchmarks of the validators.
+
+Each benchmark generates a synthetic schema and a batch of documents of a
+particular shape (wide objects, deep nesting, long arrays, ...). All the
+documents are valid so the whole document is always visited. Run the
+benchmarks with::
+
+    python -m json_schema_validator.bench
+
+For each benchmark and each validator the number of documents validated per
+second, the time spent on each node of the documents and the peak memory
+allocated during validation are reported. Use ``--format=json`` to get
+results that can be saved and compared across releases.
+
+Benchmarks can be used from Python as well:
+
+    >>> result = run_benchmark("enums", "validator", size=10, repeat=1)
+    >>> result["documents"]
+    10
+"""
+
+import argparse
+import collections
+import functools
+import gc
+import json
+import platform
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    # Peak memory is not reported on python 2
+    tracemalloc = None
+
+from json_schema_validator import __version__
+from json_schema_validator.compiler import compile
+from json_schema_validator.schema import Schema
+from json_schema_validator.validator import IterativeValidator, Validator
+
+
+def _wide_object(size):
+    width = 10 * size
+    schema = {
+        "type": "object",
+        "properties": dict(
+            ("prop%d" % i, {"type": ["string", "integer"]})
+            for i in range(width)),
+        "additionalProperties": False,
+    }
+    document = dict(("prop%d" % i, i) for i in range(width))
+    return schema, [document] * 10
+
+
+def _deep_nesting(size):
+    # Validator recurses, keep it well within the recursion limit
+    depth = min(size, 150)
+    schema = {}
+    document = "leaf"
+    for i in range(depth):
+        schema = {"type": "object", "properties": {"child": schema}}
+        document = {"child": document}
+    return schema, [document] * 10
+
+
+def _long_array(size):
+    schema = {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer", "minimum": 0},
+                "name": {"type": "string", "maxLength": 20},
+            },
+        },
+    }
+    document = [
+        {"id": i, "name": "item%d" % i} for i in range(100 * size)]
+    return schema, [document]
+
+
+def _union_types(size):
+    schema = {
+        "type": "array",
+        "items": {
+            "type": [
+                "null", "boolean", "string",
+                {"type": "object", "properties": {"x": {"type": "number"}}},
+                "number",
+            ],
+        },
+    }
+    values = [None, True, "text", {"x": 1.5}, 42]
+    document = [values[i % len(values)] for i in range(100 * size)]
+    return schema, [document]
+
+
+def _patterns(size):
+    schema = {
+        "type": "array",
+        "items": {
+            "type": "string",
+            "pattern": "^[a-z]+-[0-9]{4}$",
+        },
+    }
+    document = ["item-%04d" % (i % 10000) for i in range(100 * size)]
+    return schema, [document]
+
+
+def _timestamps(size):
+    schema = {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "event": {"type": "string"},
+                "created": {"type": "string", "format": "date-time"},
+                "updated": {"type": "string", "format": "date-time"},
+            },
+        },
+    }
+    document = [
+        {
+            "event": "event%d" % i,
+            "created": "2016-%02d-%02dT%02d:%02d:%02dZ" % (
+                i % 12 + 1, i % 28 + 1, i % 24, i % 60, i % 60),
+            "updated": "2016-12-31T23:59:59Z",
+        }
+        for i in range(100 * size)]
+    return schema, [document]
+
+
+def _enums(size):
+    choices = ["choice%d" % i for i in range(50)]
+    schema = {
+        "type": "object",
+        "properties": {
+            "value": {"type": "string", "enum": choices},
+        },
+    }
+    documents = [
+        {"value": choices[i % len(choices)]} for i in range(size)]
+    return schema, documents
+
+
+def _requires(size):
+    schema = {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "alias": {"type": "string", "optional": True,
+                      "requires": "name"},
+            "address": {
+                "type": "object",
+                "optional": True,
+                "requires": {
+                    "properties": {"name": {"type": "string"}},
+                },
+            },
+        },
+    }
+    documents = [
+        {"name": "n%d" % i, "alias": "a%d" % i, "address": {}}
+        for i in range(size)]
+    return schema, documents
+
+
+# name -> function that generates (schema, documents) for a given size
+BENCHMARKS = collections.OrderedDict([
+    ("wide_object", _wide_object),
+    ("deep_nesting", _deep_nesting),
+    ("long_array", _long_array),
+    ("union_types", _union_types),
+    ("patterns", _patterns),
+    ("timestamps", _timestamps),
+    ("enums", _enums),
+    ("requires", _requires),
+])
+
+
+def _make_validator(validator_cls):
+    def make(schema):
+        return functools.partial(validator_cls.validate, schema)
+    return make
+
+
+def _make_compiled(schema):
+    return compile(schema).validate
+
+
+# name -> function that turns a schema into a function validating documents
+VALIDATORS = collections.OrderedDict([
+    ("validator", _make_validator(Validator)),
+    ("iterative", _make_validator(IterativeValidator)),
+    ("compiled", _make_compiled),
+])
+
+
+def count_nodes(obj):
+    """Count the JSON values in obj, including obj itself."""
+    count = 0
+    pending = [obj]
+    while pending:
+        obj = pending.pop()
+        count += 1
+        if isinstance(obj, dict):
+            pending.extend(obj.values())
+        elif isinstance(obj, list):
+            pending.extend(obj)
+    return count
+
+
+def _peak_memory(func):
+    if tracemalloc is None:
+        return None
+    tracemalloc.start()
+    try:
+        func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_benchmark(benchmark, validator, size=100, repeat=5):
+    """
+    Run one benchmark with one validator.
+
+    :param benchmark:
+        Name of the benchmark, one of :data:`BENCHMARKS`
+    :param validator:
+        Name of the validator, one of :data:`VALIDATORS`
+    :param size:
+        Scale of the generated documents
+    :param repeat:
+        Number of timed runs, the best one is reported
+    :returns:
+        Dictionary with the results
+    """
+    schema_json, documents = BENCHMARKS[benchmark](size)
+    validate = VALIDATORS[validator](Schema(schema_json))
+    nodes = sum(count_nodes(document) for document in documents)
+
+    def validate_all():
+        for document in documents:
+            validate(document)
+    # Make sure the documents are valid and caches are warm
+    validate_all()
+    timings = []
+    for i in range(repeat):
+        gc.collect()
+        start = timeit.default_timer()
+        validate_all()
+        timings.append(timeit.default_timer() - start)
+    best = min(timings)
+    return collections.OrderedDict([
+        ("benchmark", benchmark),
+        ("validator", validator),
+        ("size", size),
+        ("documents", len(documents)),
+        ("nodes", nodes),
+        ("seconds", best),
+        ("docs_per_sec", len(documents) / best if best else None),
+        ("ns_per_node", best * 1e9 / nodes),
+        ("peak_memory", _peak_memory(validate_all)),
+    ])
+
+
+def run_benchmarks(benchmarks=None, validators=None, size=100, repeat=5):
+    """
+    Run a set of benchmarks with a set of validators.
+
+    :param benchmarks:
+        Names of the benchmarks to run, all of them by default
+    :param validators:
+        Names of the validators to use, all of them by default
+    :returns:
+        List of results, as returned by :func:`run_benchmark`
+    """
+    results = []
+    for benchmark in benchmarks or BENCHMARKS:
+        for validator in validators or VALIDATORS:
+            results.append(run_benchmark(benchmark, validator, size, repeat))
+    return results
+
+
+def _format_text(results):
+    lines = ["{0:<14} {1:<10} {2:>12} {3:>12} {4:>12}".format(
+        "benchmark", "validator", "docs/sec", "ns/node", "peak KiB")]
+    for result in results:
+        if result["peak_memory"] is None:
+            peak = "-"
+        else:
+            peak = "{0:.1f}".format(result["peak_memory"] / 1024.0)
+        lines.append("{0:<14} {1:<10} {2:>12.1f} {3:>12.1f} {4:>12}".format(
+            result["benchmark"], result["validator"],
+            result["docs_per_sec"] or 0, result["ns_per_node"], peak))
+    return "\n".join(lines)
+
+
+def _format_json(results):
+    return json.dumps(collections.OrderedDict([
+        ("version", ".".join(str(part) for part in __version__[:3])),
+        ("python", platform.python_version()),
+        ("implementation", platform.python_implementation()),
+        ("results", results),
+    ]), indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m json_schema_validator.bench",
+        description="Measure the speed of json-schema-validator")
+    parser.add_argument(
+        "-b", "--benchmark", action="append", choices=list(BENCHMARKS),
+        help="benchmark to run (may be repeated, default: all)")
+    parser.add_argument(
+        "-v", "--validator", action="append", choices=list(VALIDATORS),
+        help="validator to use (may be repeated, default: all)")
+    parser.add_argument(
+        "-s", "--size", type=int, default=100,
+        help="scale of the generated documents (default: %(default)s)")
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=5,
+        help="number of timed runs (default: %(default)s)")
+    parser.add_argument(
+        "-f", "--format", choices=["text", "json"], default="text",
+        help="output format (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.size < 1 or args.repeat < 1:
+        parser.error("size and repeat must be positive")
+    results = run_benchmarks(
+        args.benchmark, args.validator, args.size, args.repeat)
+    if args.format == "json":
+        print(_format_json(results))
+    else:
+        print(_format_text(results))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1071 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Schema compiler.
+
+The :class:`json_schema_validator.validator.Validator` interprets the schema
+while it walks the validated object. Each time a document is validated the
+schema is read again, sub-schemas are wrapped in new
+:class:`json_schema_validator.schema.Schema` objects and every keyword is
+checked for correctness before it is used.
+
+This module walks the schema once and turns each node into a small function
+that only performs the checks that the node actually needs. The result is a
+:class:`CompiledValidator` that can be used to validate any number of
+documents. Errors reported by the compiled validator are identical to those
+reported by :class:`json_schema_validator.validator.Validator`.
+
+    >>> from json_schema_validator.schema import Schema
+    >>> validator = compile(Schema({"type": "string"}))
+    >>> validator.validate("foo")
+    True
+"""
+
+import functools
+import itertools
+import sys
+
+from json_schema_validator import formats
+from json_schema_validator.errors import SchemaError, ValidationError
+from json_schema_validator.misc import (
+    NUMERIC_TYPES,
+    find_duplicate,
+    json_key,
+)
+from json_schema_validator.registry import _get_root_registry
+from json_schema_validator.schema import Schema
+
+if sys.version_info[0] > 2:
+    basestring = (str, )
+    zip_longest = itertools.zip_longest
+else:
+    zip_longest = itertools.izip_longest
+
+
+JSON_TYPE_MAP = {
+    "string": basestring,
+    "number": NUMERIC_TYPES,
+    "integer": int,
+    "object": dict,
+    "array": list,
+    "null": None.__class__,
+}
+
+
+def _always(obj):
+    return True
+
+
+def type_predicate(type_names):
+    """
+    Build a function that tells if an object has one of the JSON types.
+
+    The function answers the question without raising exceptions or
+    allocating anything, it is meant for the hot path of type checks and
+    union types.
+
+        >>> is_number_or_boolean = type_predicate(["number", "boolean"])
+        >>> is_number_or_boolean(1.5), is_number_or_boolean(False)
+        (True, True)
+        >>> is_number_or_boolean("1")
+        False
+
+    :param type_names:
+        Iterable of simple JSON type names such as ``"string"`` or
+        ``"boolean"``
+    :returns:
+        Function that takes an object and returns a bool
+    """
+    type_names = set(type_names)
+    if "any" in type_names:
+        return _always
+    python_types = []
+    for name in sorted(type_names):
+        if name == "boolean":
+            continue
+        python_type = JSON_TYPE_MAP[name]
+        if isinstance(python_type, tuple):
+            python_types.extend(python_type)
+        else:
+            python_types.append(python_type)
+    python_types = tuple(python_types)
+    if "boolean" not in type_names:
+        def has_type(obj):
+            return isinstance(obj, python_types)
+    elif python_types:
+        # Bool is special cased because in python there is no way to test
+        # for isinstance(something, bool) that would not catch
+        # isinstance(1, bool)
+        def has_type(obj):
+            return (obj is True or obj is False or
+                    isinstance(obj, python_types))
+    else:
+        def has_type(obj):
+            return obj is True or obj is False
+    return has_type
+
+
+def compile(schema, format_registry=None, schema_registry=None):
+    """
+    Compile a schema into a reusable validator.
+
+    :param schema:
+        Schema to compile
+    :type schema:
+        :class:`json_schema_validator.schema.Schema`
+    :param format_registry:
+        :class:`json_schema_validator.formats.FormatRegistry` with the
+        checkers of the ``format`` keyword, by default
+        :data:`json_schema_validator.formats.format_registry`
+    :param schema_registry:
+        :class:`json_schema_validator.registry.SchemaRegistry` with the
+        schemas that ``$ref`` may refer to, references within the schema
+        itself are always resolved
+    :rtype:
+        :class:`CompiledValidator`
+    :raises `json_schema_validator.errors.SchemaError`:
+        if the schema itself is wrong.
+    :raises NotImplementedError:
+        if the schema uses a keyword that is not supported.
+    """
+    if not isinstance(schema, Schema):
+        raise ValueError(
+            "schema value {0!r} is not a Schema"
+            " object".format(schema))
+    return CompiledValidator(
+        schema, format_registry=format_registry,
+        schema_registry=schema_registry)
+
+
+class CompiledValidator(object):
+    """
+    Validator for one particular schema.
+
+    Instances are created by :func:`compile`. The schema is interpreted only
+    once, when the validator is created, all subsequent calls to
+    :meth:`validate` run the pre-computed checks.
+
+    .. attribute:: schema
+
+        The :class:`json_schema_validator.schema.Schema` this validator was
+        compiled from.
+
+    The schema_expr argument is the expression used for the root of the
+    schema in reported errors. It is useful when the schema is a part of a
+    larger schema.
+
+    Schemas referred to with ``$ref`` are compiled in place of the
+    reference, errors found there are reported with the expression of the
+    reference. A recursive reference shares the checks of the enclosing
+    occurrence of the same schema, errors found deeper in the recursion are
+    reported with the expression of that occurrence.
+    """
+
+    def __init__(self, schema, schema_expr="schema", format_registry=None,
+                 schema_registry=None):
+        self.schema = schema
+        context = _CompileContext(
+            format_registry, _get_root_registry(schema, schema_registry))
+        self._check = _compile_node(schema, schema_expr, context)
+
+    def __repr__(self):
+        return "<CompiledValidator for {0!r}>".format(self.schema)
+
+    def validate(self, obj, object_expr="object"):
+        """
+        Validate specified JSON object obj.
+
+        :param obj:
+            JSON object to validate
+        :param object_expr:
+            Expression used for the root of the object in reported errors
+        :rtype:
+            bool
+        :returns:
+            True on success
+        :raises `json_schema_validator.errors.ValidationError`:
+            if the object does not match schema.
+        """
+        error = self.first_error(obj, object_expr)
+        if error is not None:
+            raise error
+        return True
+
+    def first_error(self, obj, object_expr="object"):
+        """
+        Find the first problem with specified JSON object obj.
+
+        This is the same as :meth:`validate` except that the error is
+        returned rather than raised.
+
+        :returns:
+            None if the object matches the schema, otherwise
+            :class:`json_schema_validator.errors.ValidationError`
+        """
+        check = self._check
+        if check is None:
+            return None
+        return check(obj, [(obj, object_expr)], True)
+
+    def is_valid(self, obj):
+        """
+        Check if specified JSON object obj matches the schema.
+
+        Validation stops at the first mismatch. No error, message or
+        expression is built.
+
+        :rtype:
+            bool
+        """
+        check = self._check
+        return check is None or check(obj, [(obj, "object")], False) is None
+
+
+class _CompileContext(object):
+    """Settings shared by all the nodes of the schema being compiled."""
+
+    __slots__ = ('format_registry', 'schema_registry', 'in_progress')
+
+    def __init__(self, format_registry, schema_registry):
+        if format_registry is None:
+            format_registry = formats.format_registry
+        self.format_registry = format_registry
+        # Registry that resolves $ref
+        self.schema_registry = schema_registry
+        # id() of the JSON of referenced schemas being compiled, or
+        # ("extends", id()) of schemas with extends -> cell holding the
+        # check, used to break recursive references
+        self.in_progress = {}
+
+
+def _join_paths(stack):
+    return "".join([path for obj, path in stack])
+
+
+# Result of a check that failed when no details were requested
+_INVALID = False
+
+
+def _error(stack, detail, schema_expr, legacy_message, new_message,
+           **legacy_args):
+    """
+    Describe a problem with the object on top of the stack.
+
+    The stack is a list of (object, path) pairs, the same as the object stack
+    used by :class:`json_schema_validator.validator.Validator`. If detail is
+    true a ValidationError is returned, the legacy message and the object
+    expression are only built when accessed. Otherwise nothing is built at
+    all and _INVALID is returned.
+    """
+    if not detail:
+        return _INVALID
+    return ValidationError(
+        functools.partial(legacy_message.format, **legacy_args),
+        new_message,
+        functools.partial(_join_paths, list(stack)),
+        schema_expr)
+
+
+def _compile_node(schema, schema_expr, context):
+    """
+    Compile one schema node.
+
+    Returns a function ``check(obj, stack, detail)``, or None if the schema
+    accepts all objects. The function returns None if the object on top of
+    the stack matches the schema. Otherwise it returns a ValidationError,
+    when detail is true, or _INVALID. Checks never raise ValidationError and
+    always leave the stack as they found it.
+    """
+    if schema.ref is not None:
+        return _compile_ref(schema, schema_expr, context)
+    if schema.extends is not None:
+        return _compile_extends(schema, schema_expr, context)
+    return _combine_checks(_compile_checklist(schema, schema_expr, context))
+
+
+def _compile_checklist(schema, schema_expr, context):
+    """
+    Compile the keywords of one schema node, ignoring $ref and extends.
+
+    Returns a list of (kind, compile_keyword, checks) in the order the
+    validator checks the keywords, see _KEYWORD_COMPILERS.
+    """
+    checklist = [
+        (kind, compile_keyword, compile_keyword(schema, schema_expr, context))
+        for kind, compile_keyword in _KEYWORD_COMPILERS]
+    _check_unsupported(schema)
+    return checklist
+
+
+def _combine_checks(checklist):
+    """Turn a checklist into one check that looks at the object once."""
+    checks_by_kind = {
+        "common": [], "object": [], "array": [], "scalar": [], "string": [],
+        "number": []}
+    for kind, compile_keyword, checks in checklist:
+        checks_by_kind[kind].extend(checks)
+    common_checks = checks_by_kind["common"]
+    object_checks = checks_by_kind["object"]
+    array_checks = checks_by_kind["array"]
+    scalar_checks = checks_by_kind["scalar"]
+    string_checks = checks_by_kind["string"]
+    number_checks = checks_by_kind["number"]
+    if not (common_checks or object_checks or array_checks or
+            scalar_checks or string_checks or number_checks):
+        return None
+    if not (object_checks or array_checks or scalar_checks or
+            string_checks or number_checks):
+        if len(common_checks) == 1:
+            return common_checks[0]
+
+        def check_common(obj, stack, detail):
+            for check in common_checks:
+                error = check(obj, stack, detail)
+                if error is not None:
+                    return error
+        return check_common
+
+    def check_node(obj, stack, detail):
+        for check in common_checks:
+            error = check(obj, stack, detail)
+            if error is not None:
+                return error
+        if isinstance(obj, dict):
+            checks = object_checks
+        elif isinstance(obj, list):
+            checks = array_checks
+        else:
+            for check in scalar_checks:
+                error = check(obj, stack, detail)
+                if error is not None:
+                    return error
+            if isinstance(obj, basestring):
+                checks = string_checks
+            elif isinstance(obj, NUMERIC_TYPES):
+                checks = number_checks
+            else:
+                return
+        for check in checks:
+            error = check(obj, stack, detail)
+            if error is not None:
+                return error
+    return check_node
+
+
+def _compile_subschema(schema_json, schema_expr, context):
+    """Compile a nested schema given as raw JSON."""
+    if schema_json == {}:
+        # The empty schema accepts everything, this also stops the
+        # default additionalProperties value from recursing forever.
+        return None
+    return _compile_node(Schema(schema_json), schema_expr, context)
+
+
+def _compile_ref(schema, schema_expr, context):
+    target = context.schema_registry.resolve(schema)
+    key = id(target._schema)
+    cell = context.in_progress.get(key)
+    if cell is not None:
+        # Recursive reference
+        return _deferred_check(cell)
+    cell = context.in_progress[key] = [None]
+    try:
+        cell[0] = _compile_node(target, schema_expr, context)
+    finally:
+        del context.in_progress[key]
+    return cell[0]
+
+
+def _deferred_check(cell):
+    """
+    Check that runs the check held by cell.
+
+    The check is ready once the outer compilation of the same schema is
+    done, see _CompileContext.in_progress.
+    """
+    def check_deferred(obj, stack, detail):
+        check = cell[0]
+        if check is not None:
+            return check(obj, stack, detail)
+    return check_deferred
+
+
+def _flatten_extends(schema, schema_expr, context):
+    """
+    Find a schema and all the schemas it extends, directly or not.
+
+    Returns a list of (schema, schema_expr) in the order the validator
+    visits them, each schema is listed once.
+    """
+    levels = []
+    seen = set()
+    pending = [(schema, schema_expr, frozenset())]
+    while pending:
+        level, level_expr, ancestors = pending.pop()
+        if level.ref is not None:
+            level = context.schema_registry.resolve(level)
+        key = id(level._schema)
+        if key in ancestors:
+            raise SchemaError(
+                "{0}: schema extends itself".format(level_expr))
+        if key in seen:
+            # Already checked, through another path of the inheritance
+            continue
+        seen.add(key)
+        levels.append((level, level_expr))
+        bases = level.extends
+        if bases is None:
+            continue
+        ancestors = ancestors | frozenset([key])
+        if isinstance(bases, dict):
+            bases = [(bases, level_expr + ".extends")]
+        else:
+            bases = [
+                (base, "%s.extends.%d" % (level_expr, index))
+                for index, base in enumerate(bases)]
+        for base, base_expr in reversed(bases):
+            pending.append((level._subschema(base), base_expr, ancestors))
+    return levels
+
+
+def _merge_checklists(levels, context):
+    """
+    Compile the keywords of all the levels of inheritance into one checklist.
+
+    Properties of all the levels are checked in one pass, a property that is
+    described by several levels is checked against all of them. Keywords
+    that have the same value in several levels are checked once. The
+    checklist is only good for telling if an object is valid, the first
+    problem it finds is not necessarily the one the validator reports first.
+    """
+    checklist = []
+    seen = set()
+    properties = []
+    prop_schemas = {}
+    for level, level_expr in levels:
+        for kind, compile_keyword in _KEYWORD_COMPILERS:
+            if compile_keyword is _compile_properties:
+                for prop, prop_json in level.properties.items():
+                    if prop not in prop_schemas:
+                        properties.append(prop)
+                        prop_schemas[prop] = []
+                    prop_schemas[prop].append((
+                        Schema(prop_json),
+                        level_expr + ".properties." + prop))
+                continue
+            key = _merge_key(level, compile_keyword)
+            if key is not None:
+                if key in seen:
+                    continue
+                seen.add(key)
+            checklist.append((
+                kind, compile_keyword,
+                compile_keyword(level, level_expr, context)))
+        _check_unsupported(level)
+    merged = []
+    for prop in properties:
+        # Each level that describes the property is compiled on its own, so
+        # that recursive references are found. The value must match all of
+        # them and the property must be present if any level says so.
+        prop_checks = [
+            _compile_node(prop_schema, prop_expr, context)
+            for prop_schema, prop_expr in prop_schemas[prop]]
+        prop_checks = [check for check in prop_checks if check is not None]
+        if not prop_checks:
+            prop_check = None
+        elif len(prop_checks) == 1:
+            prop_check = prop_checks[0]
+        else:
+            prop_check = _all_checks(prop_checks)
+        merged.append((
+            prop, "." + prop, prop_check,
+            all(prop_schema.optional
+                for prop_schema, prop_expr in prop_schemas[prop]),
+            prop_schemas[prop][0][1] + ".optional"))
+    if merged:
+        checklist.insert(0, (
+            "object", _compile_properties, _check_properties(merged)))
+    return checklist
+
+
+def _all_checks(checks):
+    """Combine checks that must all pass."""
+    def check_all(obj, stack, detail):
+        for check in checks:
+            error = check(obj, stack, detail)
+            if error is not None:
+                return error
+    return check_all
+
+
+def _merge_key(schema, compile_keyword):
+    """
+    Key identifying the checks of one keyword of schema.
+
+    Checks with equal keys are the same, only one of them is needed. None
+    is returned for checks that depend on where the schema is.
+    """
+    keywords = _MERGEABLE_KEYWORDS.get(compile_keyword)
+    if keywords is None:
+        return None
+    values = [schema._schema.get(name) for name in keywords]
+    for value in values:
+        # Nested schemas of union types and disallow may have relative
+        # references
+        if isinstance(value, dict) or (
+                isinstance(value, list) and
+                compile_keyword in (_compile_type, _compile_disallow) and
+                not all(isinstance(item, basestring) for item in value)):
+            return None
+    return (compile_keyword, tuple(json_key(value) for value in values))
+
+
+def _compile_extends(schema, schema_expr, context):
+    # A base reached through $ref may contain this schema again, such as
+    # {"properties": {"child": {"extends": {"$ref": "#"}}}}
+    key = ("extends", id(schema._schema))
+    cell = context.in_progress.get(key)
+    if cell is not None:
+        return _deferred_check(cell)
+    cell = context.in_progress[key] = [None]
+    try:
+        levels = _flatten_extends(schema, schema_expr, context)
+        # One flat check for all the levels, used to tell if an object is
+        # valid
+        merged_check = _combine_checks(_merge_checklists(levels, context))
+    finally:
+        del context.in_progress[key]
+    if merged_check is not None:
+        cell[0] = _compile_level_checks(merged_check, [
+            (level._schema, level_expr) for level, level_expr in levels],
+            context)
+    return cell[0]
+
+
+def _compile_level_checks(merged_check, levels, context):
+    """
+    Build the check of a schema with extends.
+
+    The merged check tells if the object is valid. The checks of each level
+    are used, in order, to report the same error as the validator. They are
+    compiled on first use, from the JSON of the levels: the check must not
+    refer to the schema, which may be a weak key of a cache of checks.
+    """
+    # The list of checks, once it is complete
+    level_checks = [None]
+
+    def check_extends(obj, stack, detail):
+        error = merged_check(obj, stack, False)
+        if error is None or not detail:
+            return error
+        checks = level_checks[0]
+        if checks is None:
+            checks = [
+                _combine_checks(_compile_checklist(
+                    Schema(level_json), level_expr, context))
+                for level_json, level_expr in levels]
+            level_checks[0] = checks
+        for check in checks:
+            if check is not None:
+                error = check(obj, stack, detail)
+                if error is not None:
+                    return error
+    return check_extends
+
+
+def _check_unsupported(schema):
+    if schema.contentEncoding is not None:
+        raise NotImplementedError("contentEncoding is not supported")
+    if schema.divisibleBy != 1:
+        raise NotImplementedError("divisibleBy is not supported")
+
+
+def _compile_type(schema, schema_expr, context):
+    json_type = schema.type
+    type_expr = schema_expr + ".type"
+    if json_type == "any":
+        return []
+    if isinstance(json_type, dict):
+        # Nested type check, the object stays the same.
+        nested_check = _compile_subschema(json_type, type_expr, context)
+        if nested_check is None:
+            return []
+        return [nested_check]
+    if isinstance(json_type, list):
+        has_simple_type = type_predicate(
+            alt_type for alt_type in json_type
+            if isinstance(alt_type, basestring))
+        # Nested schemas (and nested unions) are only tried when none of the
+        # simple types match
+        alternatives = [
+            _compile_subschema(
+                alt_type if isinstance(alt_type, dict) else {"type": alt_type},
+                "%s.%d" % (type_expr, index), context)
+            for index, alt_type in enumerate(json_type)
+            if not isinstance(alt_type, basestring)]
+        if has_simple_type is _always or None in alternatives:
+            # One of the alternatives accepts everything
+            return []
+        json_type_list = json_type
+
+        def check_union(obj, stack, detail):
+            if has_simple_type(obj):
+                return
+            for alt_check in alternatives:
+                # Details of failed alternatives are never looked at
+                if alt_check(obj, stack, False) is None:
+                    return
+            return _error(
+                stack, detail, type_expr,
+                "{obj!r} does not match any of the types in {type!r}",
+                "Object has incorrect type (multiple types possible)",
+                obj=obj, type=json_type_list)
+        return [check_union]
+    has_type = type_predicate([json_type])
+    if json_type == "boolean":
+        new_message = "Object has incorrect type (expected boolean)"
+    else:
+        new_message = "Object has incorrect type (expected {type})".format(
+            type=json_type)
+
+    def check_type(obj, stack, detail):
+        if not has_type(obj):
+            return _error(
+                stack, detail, type_expr,
+                "{obj!r} does not match type {type!r}",
+                new_message,
+                obj=obj, type=json_type)
+    return [check_type]
+
+
+def _compile_disallow(schema, schema_expr, context):
+    disallow = schema.disallow
+    if disallow is None:
+        return []
+    disallow_expr = schema_expr + ".disallow"
+    # The simple types are tested with one predicate, the names are only
+    # needed to describe the problem
+    names = [name for name in disallow if isinstance(name, basestring)]
+    has_disallowed_type = type_predicate(names) if names else None
+    name_predicates = [(name, type_predicate([name])) for name in names]
+    if isinstance(schema._schema["disallow"], dict):
+        nested = [(disallow[0], disallow_expr)]
+    else:
+        nested = [
+            (alt, "%s.%d" % (disallow_expr, index))
+            for index, alt in enumerate(disallow) if isinstance(alt, dict)]
+    # A nested schema that compiles to None matches everything
+    nested_checks = [
+        (_compile_subschema(alt, alt_expr, context), alt_expr)
+        for alt, alt_expr in nested]
+
+    def check_disallow(obj, stack, detail):
+        if has_disallowed_type is not None and has_disallowed_type(obj):
+            if not detail:
+                return _INVALID
+            for name, has_type in name_predicates:
+                if has_type(obj):
+                    break
+            return _error(
+                stack, detail, disallow_expr,
+                "{obj!r} matches disallowed type {type!r}",
+                "Object has disallowed type ({type})".format(type=name),
+                obj=obj, type=name)
+        for nested_check, nested_expr in nested_checks:
+            if nested_check is None or nested_check(
+                    obj, stack, False) is None:
+                return _error(
+                    stack, detail, nested_expr,
+                    "{obj!r} matches a disallowed schema",
+                    "Object matches a disallowed schema",
+                    obj=obj)
+    return [check_disallow]
+
+
+def _compile_requires(schema, schema_expr, context):
+    requires_json = schema.requires
+    requires_expr = schema_expr + ".requires"
+    if requires_json == {}:
+        return []
+
+    def _report_missing_parent(obj, stack, detail):
+        return _error(
+            stack, detail, requires_expr,
+            "{obj!r} requires that enclosing object matches"
+            " schema {schema!r} but there is no enclosing"
+            " object",
+            "Object has no enclosing object that matches schema",
+            obj=obj, schema=requires_json)
+
+    if isinstance(requires_json, basestring):
+        def check_requires_property(obj, stack, detail):
+            if len(stack) < 2:
+                return _report_missing_parent(obj, stack, detail)
+            parent_obj = stack[-2][0]
+            if (not isinstance(parent_obj, dict)
+                    or requires_json not in parent_obj):
+                return _error(
+                    stack, detail, requires_expr,
+                    "{obj!r} requires presence of property {requires!r}"
+                    " in the same object",
+                    "Enclosing object does not have property"
+                    " {prop!r}".format(prop=requires_json),
+                    obj=obj, requires=requires_json)
+        return [check_requires_property]
+    requires_check = _compile_subschema(
+        requires_json, requires_expr, context)
+
+    def check_requires_schema(obj, stack, detail):
+        if len(stack) < 2:
+            return _report_missing_parent(obj, stack, detail)
+        if requires_check is not None:
+            # The enclosing object is validated from its own context
+            return requires_check(stack[-2][0], stack[:-1], detail)
+    return [check_requires_schema]
+
+
+def _compile_properties(schema, schema_expr, context):
+    properties = []
+    for prop, prop_schema_json in schema.properties.items():
+        prop_schema = Schema(prop_schema_json)
+        prop_expr = schema_expr + ".properties." + prop
+        properties.append((
+            prop, "." + prop, _compile_node(prop_schema, prop_expr, context),
+            prop_schema.optional, prop_expr + ".optional"))
+    return _check_properties(properties)
+
+
+def _check_properties(properties):
+    """
+    Build the checks of properties.
+
+    :param properties:
+        List of (property, object path, check, optional, expression of
+        optional) for each property
+    """
+    if not properties:
+        return []
+
+    def check_properties(obj, stack, detail):
+        for prop, prop_path, prop_check, optional, optional_expr in properties:
+            if prop in obj:
+                if prop_check is not None:
+                    value = obj[prop]
+                    stack.append((value, prop_path))
+                    error = prop_check(value, stack, detail)
+                    stack.pop()
+                    if error is not None:
+                        return error
+            elif not optional:
+                return _error(
+                    stack, detail, optional_expr,
+                    "{obj!r} does not have property {prop!r}",
+                    "Object lacks property {prop!r}".format(
+                        prop=prop),
+                    obj=obj, prop=prop)
+    return [check_properties]
+
+
+def _compile_additional_properties(schema, schema_expr, context):
+    additional = schema.additionalProperties
+    additional_expr = schema_expr + ".additionalProperties"
+    if additional is False:
+        known = frozenset(schema.properties)
+
+        def check_no_additional_properties(obj, stack, detail):
+            if known.issuperset(obj):
+                return
+            for prop in obj.keys():
+                if prop not in known:
+                    return _error(
+                        stack, detail, additional_expr,
+                        "{obj!r} has unknown property {prop!r} and"
+                        " additionalProperties is false",
+                        "Object has unknown property {prop!r} but"
+                        " additional properties are disallowed".format(
+                            prop=prop),
+                        obj=obj, prop=prop)
+        return [check_no_additional_properties]
+    additional_check = _compile_subschema(
+        additional, additional_expr, context)
+    if additional_check is None:
+        return []
+
+    def check_additional_properties(obj, stack, detail):
+        # Each property is checked against the additionalProperties schema
+        for prop, value in obj.items():
+            stack.append((value, "." + prop))
+            error = additional_check(value, stack, detail)
+            stack.pop()
+            if error is not None:
+                return error
+    return [check_additional_properties]
+
+
+def _compile_items(schema, schema_expr, context):
+    checks = []
+    items_expr = schema_expr + ".items"
+    if schema.uniqueItems is True:
+        def check_unique_items(obj, stack, detail):
+            duplicate = find_duplicate(obj)
+            if duplicate is not None:
+                return _error(
+                    stack, detail, items_expr,
+                    "Repeated items found in {obj!r}",
+                    "Repeated items found in array (item {1} repeats"
+                    " item {0})".format(*duplicate),
+                    obj=obj)
+        checks.append(check_unique_items)
+    items_schema_json = schema.items
+    if items_schema_json == {}:
+        # default value, don't do anything
+        return checks
+    min_items = schema.minItems
+    if min_items:
+        min_items_expr = schema_expr + ".minItems"
+
+        def check_min_items(obj, stack, detail):
+            if len(obj) < min_items:
+                return _error(
+                    stack, detail, min_items_expr,
+                    "{obj!r} has fewer than the minimum number of items"
+                    " {minItems!r}",
+                    "Object has fewer than the minimum number of items",
+                    obj=obj, minItems=min_items)
+        checks.append(check_min_items)
+    max_items = schema.maxItems
+    if max_items is not None:
+        max_items_expr = schema_expr + ".maxItems"
+
+        def check_max_items(obj, stack, detail):
+            if len(obj) > max_items:
+                return _error(
+                    stack, detail, max_items_expr,
+                    "{obj!r} has more than the maximum number of items"
+                    " {maxItems!r}",
+                    "Object has more than the maximum number of items",
+                    obj=obj, maxItems=max_items)
+        checks.append(check_max_items)
+    if isinstance(items_schema_json, dict):
+        item_check = _compile_subschema(
+            items_schema_json, items_expr, context)
+        if item_check is not None:
+            def check_items(obj, stack, detail):
+                for index, item in enumerate(obj):
+                    stack.append((item, "[%d]" % index))
+                    error = item_check(item, stack, detail)
+                    stack.pop()
+                    if error is not None:
+                        return error
+            checks.append(check_items)
+        return checks
+    additional = schema.additionalProperties
+    item_checks = [
+        _compile_subschema(
+            item_schema_json, "%sitems[%d]" % (schema_expr, index), context)
+        for index, item_schema_json in enumerate(items_schema_json)]
+    num_items = len(item_checks)
+    if additional is not False:
+        additional_check = _compile_subschema(
+            additional, schema_expr + ".additionalProperties", context)
+    else:
+        additional_check = None
+
+    def check_tuple_items(obj, stack, detail):
+        if len(obj) < num_items:
+            # If our data array is shorter than the schema then
+            # validation fails. Longer arrays are okay (during this
+            # step) as they are validated based on
+            # additionalProperties schema
+            return _error(
+                stack, detail, items_expr,
+                "{obj!r} is shorter than array schema {schema!r}",
+                "Object array is shorter than schema array",
+                obj=obj, schema=items_schema_json)
+        if len(obj) != num_items and additional is False:
+            # If our array is not exactly the same size as the
+            # schema and additional properties are disallowed then
+            # validation fails
+            return _error(
+                stack, detail, items_expr,
+                "{obj!r} is not of the same length as array schema"
+                " {schema!r} and additionalProperties is"
+                " false",
+                "Object array is not of the same length as schema array",
+                obj=obj, schema=items_schema_json)
+        for index, (item, item_check) in enumerate(
+                zip_longest(obj, item_checks, fillvalue=additional_check)):
+            if item_check is not None:
+                stack.append((item, "[%d]" % index))
+                error = item_check(item, stack, detail)
+                stack.pop()
+                if error is not None:
+                    return error
+    checks.append(check_tuple_items)
+    return checks
+
+
+def _compile_enum(schema, schema_expr, context):
+    enum = schema.enum
+    if enum is None:
+        return []
+    enum_expr = schema_expr + ".enum"
+    allowed_keys = frozenset(json_key(item) for item in enum)
+
+    def check_enum(obj, stack, detail):
+        if json_key(obj) not in allowed_keys:
+            return _error(
+                stack, detail, enum_expr,
+                "{obj!r} does not match any value in enumeration"
+                " {enum!r}",
+                "Object does not match any value in enumeration",
+                obj=obj, enum=enum)
+    return [check_enum]
+
+
+def _compile_format(schema, schema_expr, context):
+    fmt = schema.format
+    if fmt is None:
+        return []
+    format_expr = schema_expr + ".format"
+    # The checker is looked up once, here, not for each object
+    checker = context.format_registry.get(fmt)
+    has_format = checker.check
+    legacy_message = checker.legacy_message
+    new_message = checker.new_message
+
+    def check_format(obj, stack, detail):
+        if not has_format(obj):
+            return _error(
+                stack, detail, format_expr, legacy_message, new_message,
+                obj=obj)
+    return [check_format]
+
+
+def _compile_pattern(schema, schema_expr, context):
+    ptn = schema.pattern
+    if ptn is None:
+        return []
+    pattern_expr = schema_expr + ".pattern"
+    match = ptn.match
+
+    def check_pattern(obj, stack, detail):
+        if isinstance(obj, basestring) and not match(obj):
+            return _error(
+                stack, detail, pattern_expr,
+                "{obj!r} does not match pattern {ptn!r}",
+                "Object does not match pattern (expected {ptn})".format(
+                    ptn=ptn),
+                obj=obj, ptn=ptn)
+    return [check_pattern]
+
+
+def _compile_length(schema, schema_expr, context):
+    checks = []
+    min_length = schema.minLength
+    max_length = schema.maxLength
+    if min_length:
+        min_length_expr = schema_expr + ".minLength"
+
+        def check_min_length(obj, stack, detail):
+            if len(obj) < min_length:
+                return _error(
+                    stack, detail, min_length_expr,
+                    "{obj!r} does not meet the minimum length"
+                    " {minLength!r}",
+                    "Object does not meet the minimum length",
+                    obj=obj, minLength=min_length)
+        checks.append(check_min_length)
+    if max_length is not None:
+        max_length_expr = schema_expr + ".maxLength"
+
+        def check_max_length(obj, stack, detail):
+            if len(obj) > max_length:
+                return _error(
+                    stack, detail, max_length_expr,
+                    "{obj!r} exceeds the maximum length"
+                    " {maxLength!r}",
+                    "Object exceeds the maximum length",
+                    obj=obj, maxLength=max_length)
+        checks.append(check_max_length)
+    return checks
+
+
+def _compile_range(schema, schema_expr, context):
+    checks = []
+    minimum = schema.minimum
+    maximum = schema.maximum
+    if minimum is not None:
+        minimum_expr = schema_expr + ".minimum"
+        minimum_can_equal = schema.minimumCanEqual
+
+        def check_minimum(obj, stack, detail):
+            if obj < minimum or (obj == minimum and not minimum_can_equal):
+                return _error(
+                    stack, detail, minimum_expr,
+                    "{obj!r} is less than the minimum"
+                    " {minimum!r}",
+                    "Object is less than the minimum",
+                    obj=obj, minimum=minimum)
+        checks.append(check_minimum)
+    if maximum is not None:
+        maximum_expr = schema_expr + ".maximum"
+        maximum_can_equal = schema.maximumCanEqual
+
+        def check_maximum(obj, stack, detail):
+            if obj > maximum or (obj == maximum and not maximum_can_equal):
+                return _error(
+                    stack, detail, maximum_expr,
+                    "{obj!r} is greater than the maximum"
+                    " {maximum!r}",
+                    "Object is greater than the maximum",
+                    obj=obj, maximum=maximum)
+        checks.append(check_maximum)
+    return checks
+
+
+# Functions that compile the keywords of a schema node and the kind of objects
+# their checks apply to, in the order the validator checks the keywords
+_KEYWORD_COMPILERS = [
+    ("common", _compile_type),
+    ("common", _compile_disallow),
+    ("common", _compile_requires),
+    ("common", _compile_enum),
+    ("object", _compile_properties),
+    ("object", _compile_additional_properties),
+    ("array", _compile_items),
+    ("scalar", _compile_format),
+    ("scalar", _compile_pattern),
+    ("string", _compile_length),
+    ("number", _compile_range),
+]
+
+# Keywords read by the functions above whose checks are the same for the
+# same values, regardless of the schema they come from
+_MERGEABLE_KEYWORDS = {
+    _compile_type: ("type", ),
+    _compile_disallow: ("disallow", ),
+    _compile_enum: ("enum", ),
+    _compile_format: ("format", ),
+    _compile_pattern: ("pattern", ),
+    _compile_length: ("minLength", "maxLength"),
+    _compile_range: (
+        "minimum", "maximum", "minimumCanEqual", "maximumCanEqual"),
+}
@@ -21,7 +21,18 @@
 
 
 class SchemaError(ValueError):
-    """Exception raised when there is a problem with the schema itself."""
+    """
+    Exception raised when there is a problem with the schema itself.
+
+    .. attribute:: schema_expr
+
+        A JavaScript expression that evaluates to the part of the schema
+        that is wrong, if known. It is set by
+        :meth:`json_schema_validator.schema.Schema.check`, otherwise it is
+        None.
+    """
+
+    schema_expr = None
 
 
 class ValidationError(ValueError):
@@ -48,14 +59,55 @@ class ValidationError(ValueError):
         A JavaScript expression that evaluates to the schema that was checked
         at the time validation failed. The expression always starts with a root
         object called ``'schema'``.
+
+    The message, object_expr and schema_expr may also be given as callables
+    that take no arguments. Each callable is invoked (once) when the
+    corresponding attribute is first read. The validator uses this to avoid
+    building potentially huge messages that nobody looks at.
     """
 
     def __init__(self, message, new_message=None,
                  object_expr=None, schema_expr=None):
-        self.message = message
+        self._message = message
         self.new_message = new_message
-        self.object_expr = object_expr
-        self.schema_expr = schema_expr
+        self._object_expr = object_expr
+        self._schema_expr = schema_expr
+
+    @property
+    def message(self):
+        if callable(self._message):
+            self._message = self._message()
+        return self._message
+
+    @message.setter
+    def message(self, value):
+        self._message = value
+
+    @property
+    def object_expr(self):
+        if callable(self._object_expr):
+            self._object_expr = self._object_expr()
+        return self._object_expr
+
+    @object_expr.setter
+    def object_expr(self, value):
+        self._object_expr = value
+
+    @property
+    def schema_expr(self):
+        if callable(self._schema_expr):
+            self._schema_expr = self._schema_expr()
+        return self._schema_expr
+
+    @schema_expr.setter
+    def schema_expr(self, value):
+        self._schema_expr = value
+
+    def __reduce__(self):
+        # Pickle the computed values, never the deferred callables
+        return (self.__class__, (
+            self.message, self.new_message, self.object_expr,
+            self.schema_expr))
 
     def __str__(self):
         return ("ValidationError: {0} "
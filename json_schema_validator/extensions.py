@@ -30,7 +30,9 @@ objects in a consistent way. Implements equivalent of schema:
 import re
 import sys
 
-from datetime import datetime, timedelta
+from datetime import timedelta
+
+from json_schema_validator.misc import parse_date_time
 
 if sys.version_info[0] > 2:
     basestring = (str, )
@@ -67,7 +69,7 @@ class datetime_extension(object):
 
     @classmethod
     def from_json(cls, doc):
-        return datetime.strptime(doc, cls.FORMAT)
+        return parse_date_time(doc)
 
 
 class timedelta_extension(object):
@@ -0,0 +1,341 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Checkers of the ``format`` keyword.
+
+Each format is checked by a function that takes the object and returns True
+if the object has that format. The functions are kept in a
+:class:`FormatRegistry`. The validators look the format of each schema up in
+:data:`format_registry` unless they are given another registry.
+
+Most of the formats described by draft 03 are supported out of the box:
+
+    >>> sorted(format_registry.names())  # doctest: +NORMALIZE_WHITESPACE
+    ['color', 'date', 'date-time', 'email', 'host-name', 'ip-address',
+     'ipv6', 'regex', 'time', 'uri', 'utc-millisec', 'uuid']
+
+Applications can add their own formats, or replace the built-in ones:
+
+    >>> registry = format_registry.copy()
+    >>> registry.register(
+    ...     "even", lambda obj: obj % 2 == 0, "an even number")
+    >>> registry.get("even").check(4)
+    True
+
+Checkers of string formats return False for objects that are not strings.
+"""
+
+import re
+import sys
+
+from json_schema_validator.misc import (
+    NUMERIC_TYPES,
+    _is_date,
+    is_date_time,
+    regex_cache,
+)
+
+if sys.version_info[0] > 2:
+    basestring = (str, )
+
+
+class FormatChecker(object):
+    """
+    One registered format.
+
+    .. attribute:: name
+
+        Name of the format, as used in schemas.
+
+    .. attribute:: check
+
+        Function that takes an object and returns True if the object has
+        this format.
+
+    .. attribute:: description
+
+        Description of valid objects used in error messages, it follows
+        the words "Object is not".
+    """
+
+    __slots__ = ('name', 'check', 'description', 'legacy_message',
+                 'new_message')
+
+    def __init__(self, name, check, description):
+        self.name = name
+        self.check = check
+        self.description = description
+        # Messages of ValidationError, the legacy one is a format string
+        self.legacy_message = "{obj!r} is not " + description.replace(
+            "{", "{{").replace("}", "}}")
+        self.new_message = "Object is not " + description
+
+    def __repr__(self):
+        return "<FormatChecker {0!r}>".format(self.name)
+
+
+class FormatRegistry(object):
+    """
+    Collection of format checkers, indexed by format name.
+
+    :param checkers:
+        Iterable of :class:`FormatChecker` to register initially
+    """
+
+    def __init__(self, checkers=()):
+        self._checkers = {}
+        # Changed by register() and unregister(), validators that remember
+        # the checkers they use look them up again when it changes
+        self._version = 0
+        for checker in checkers:
+            self._checkers[checker.name] = checker
+
+    def __contains__(self, name):
+        return name in self._checkers
+
+    def names(self):
+        """Names of all the registered formats."""
+        return list(self._checkers)
+
+    def register(self, name, check, description=None):
+        """
+        Register a format checker, replacing any previous one.
+
+        Validators compiled earlier keep using the checker they were
+        compiled with.
+
+        :param name:
+            Name of the format
+        :param check:
+            Function that takes an object and returns True if the object has
+            the format. It should not raise exceptions.
+        :param description:
+            Description of valid objects used in error messages, by default
+            ``a string in <name> format``
+        """
+        if description is None:
+            description = "a string in {0} format".format(name)
+        self._checkers[name] = FormatChecker(name, check, description)
+        self._version += 1
+
+    def unregister(self, name):
+        """
+        Remove the format checker of the given name.
+
+        :raises KeyError:
+            if there is no such format
+        """
+        del self._checkers[name]
+        self._version += 1
+
+    def get(self, name):
+        """
+        Find the checker of a format.
+
+        :rtype:
+            :class:`FormatChecker`
+        :raises NotImplementedError:
+            if the format is not registered
+        """
+        try:
+            return self._checkers[name]
+        except KeyError:
+            raise NotImplementedError(
+                "format {0!r} is not supported".format(name))
+
+    def copy(self):
+        """Create a new registry with the same formats."""
+        return self.__class__(self._checkers.values())
+
+
+def is_regex(obj):
+    """Check if obj is a valid regular expression."""
+    if not isinstance(obj, basestring):
+        return False
+    try:
+        regex_cache.compile(obj)
+    except Exception:
+        return False
+    return True
+
+
+_DATE_PATTERN = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})\Z')
+
+
+def is_date(obj):
+    """Check if obj is a date string in ``YYYY-MM-DD`` format."""
+    if not isinstance(obj, basestring):
+        return False
+    match = _DATE_PATTERN.match(obj)
+    if match is None:
+        return False
+    year, month, day = [int(field) for field in match.groups()]
+    return _is_date(year, month, day)
+
+
+_TIME_PATTERN = re.compile(r'([01][0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9]\Z')
+
+
+def is_time(obj):
+    """Check if obj is a time string in ``hh:mm:ss`` format."""
+    return (isinstance(obj, basestring) and
+            _TIME_PATTERN.match(obj) is not None)
+
+
+def is_utc_millisec(obj):
+    """Check if obj is a number of milliseconds since the epoch."""
+    return (obj is not True and obj is not False and
+            isinstance(obj, NUMERIC_TYPES))
+
+
+_IPV4_PATTERN = re.compile(
+    r'(25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])'
+    r'(\.(25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])){3}\Z')
+
+
+def is_ip_address(obj):
+    """Check if obj is an IPv4 address in dotted-quad notation."""
+    return (isinstance(obj, basestring) and
+            _IPV4_PATTERN.match(obj) is not None)
+
+
+_IPV6_GROUP = re.compile(r'[0-9A-Fa-f]{1,4}\Z')
+
+
+def is_ipv6(obj):
+    """Check if obj is an IPv6 address."""
+    if not isinstance(obj, basestring):
+        return False
+    groups = 8
+    head = obj
+    if '.' in obj:
+        # The last 32 bits may be written as an IPv4 address
+        head, sep, ipv4 = obj.rpartition(':')
+        if not sep or not is_ip_address(ipv4):
+            return False
+        if head.endswith(':'):
+            head += ':'
+        groups = 6
+    if '::' in head:
+        left, sep, right = head.partition('::')
+        if '::' in right:
+            return False
+        left = left.split(':') if left else []
+        right = right.split(':') if right else []
+        if len(left) + len(right) >= groups:
+            return False
+        parts = left + right
+    else:
+        parts = head.split(':')
+        if len(parts) != groups:
+            return False
+    for part in parts:
+        if _IPV6_GROUP.match(part) is None:
+            return False
+    return True
+
+
+_HOST_NAME_LABEL = re.compile(
+    r'[A-Za-z0-9]([A-Za-z0-9-]{0,61}[A-Za-z0-9])?\Z')
+
+
+def is_host_name(obj):
+    """Check if obj is a host name."""
+    if not isinstance(obj, basestring) or not 0 < len(obj) <= 255:
+        return False
+    for label in obj.split('.'):
+        if _HOST_NAME_LABEL.match(label) is None:
+            return False
+    return True
+
+
+_EMAIL_LOCAL_PART = re.compile(r'[^\s@"(),:;<>\[\\\]]+\Z')
+
+
+def is_email(obj):
+    """Check if obj is an e-mail address such as ``user@example.com``."""
+    if not isinstance(obj, basestring):
+        return False
+    local, sep, domain = obj.rpartition('@')
+    return (bool(sep) and len(local) <= 64 and
+            _EMAIL_LOCAL_PART.match(local) is not None and
+            is_host_name(domain))
+
+
+_URI_PATTERN = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*:[^\s<>"{}|\\^`]*\Z')
+
+
+def is_uri(obj):
+    """Check if obj is an absolute URI, starting with a scheme."""
+    return (isinstance(obj, basestring) and
+            _URI_PATTERN.match(obj) is not None)
+
+
+_UUID_PATTERN = re.compile(
+    r'[0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}'
+    r'-[0-9A-Fa-f]{12}\Z')
+
+
+def is_uuid(obj):
+    """Check if obj is a UUID in the usual 8-4-4-4-12 hex digits format."""
+    return (isinstance(obj, basestring) and
+            _UUID_PATTERN.match(obj) is not None)
+
+
+# Color keywords of CSS 2.1
+_COLOR_NAMES = frozenset([
+    "aqua", "black", "blue", "fuchsia", "gray", "green", "lime", "maroon",
+    "navy", "olive", "orange", "purple", "red", "silver", "teal", "white",
+    "yellow"])
+
+_COLOR_PATTERN = re.compile(
+    r'#([0-9A-Fa-f]{3}){1,2}\Z|'
+    r'rgb\(\s*[0-9]{1,3}\s*,\s*[0-9]{1,3}\s*,\s*[0-9]{1,3}\s*\)\Z|'
+    r'rgb\(\s*[0-9]{1,3}%\s*,\s*[0-9]{1,3}%\s*,\s*[0-9]{1,3}%\s*\)\Z')
+
+
+def is_color(obj):
+    """Check if obj is a CSS 2.1 color such as ``red`` or ``#ff0000``."""
+    if not isinstance(obj, basestring):
+        return False
+    return (obj.lower() in _COLOR_NAMES or
+            _COLOR_PATTERN.match(obj) is not None)
+
+
+# Registry used by the validators unless told otherwise
+format_registry = FormatRegistry([
+    FormatChecker(
+        "date-time", is_date_time, "a string representing JSON date-time"),
+    FormatChecker("regex", is_regex, "a string representing a regex"),
+    FormatChecker("date", is_date, "a string representing a date"),
+    FormatChecker("time", is_time, "a string representing a time"),
+    FormatChecker(
+        "utc-millisec", is_utc_millisec,
+        "a number of milliseconds since the epoch"),
+    FormatChecker(
+        "ip-address", is_ip_address, "a string representing an IPv4 address"),
+    FormatChecker("ipv6", is_ipv6, "a string representing an IPv6 address"),
+    FormatChecker(
+        "host-name", is_host_name, "a string representing a host name"),
+    FormatChecker("email", is_email, "a string representing an e-mail"),
+    FormatChecker("uri", is_uri, "a string representing a URI"),
+    FormatChecker("uuid", is_uuid, "a string representing a UUID"),
+    FormatChecker("color", is_color, "a string representing a color"),
+])
@@ -19,8 +19,230 @@
 
 """Stuff that does not belong anywhere else."""
 
+import collections
+import datetime
 import decimal
+import re
+import sys
+import threading
+
+if sys.version_info[0] > 2:
+    basestring = (str, )
 
 
 # List of types recognized as numeric
 NUMERIC_TYPES = (int, float, decimal.Decimal)
+
+# YYYY-MM-DDThh:mm:ssZ, \d would match non-ASCII digits too
+_DATE_TIME_PATTERN = re.compile(
+    r'([0-9]{4})-([0-9]{2})-([0-9]{2})'
+    r'T([0-9]{2}):([0-9]{2}):([0-9]{2})Z\Z')
+
+_DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _is_date(year, month, day):
+    """Check if year, month and day (all integers) make a valid date."""
+    if year < 1 or not 1 <= month <= 12 or day < 1:
+        return False
+    if day > _DAYS_IN_MONTH[month]:
+        return (month == 2 and day == 29 and year % 4 == 0 and
+                (year % 100 != 0 or year % 400 == 0))
+    return True
+
+
+def _date_time_fields(value):
+    """Year, month, day, hour, minute and second of value or None."""
+    if not isinstance(value, basestring):
+        return None
+    match = _DATE_TIME_PATTERN.match(value)
+    if match is None:
+        return None
+    year, month, day, hour, minute, second = [
+        int(field) for field in match.groups()]
+    if (hour > 23 or minute > 59 or second > 59 or
+            not _is_date(year, month, day)):
+        return None
+    return year, month, day, hour, minute, second
+
+
+def is_date_time(value):
+    """
+    Check if value is a string with a JSON date-time.
+
+    The only accepted layout is ``YYYY-MM-DDThh:mm:ssZ`` and each field must
+    be in range. This is much faster than :func:`datetime.datetime.strptime`.
+
+        >>> is_date_time("2012-02-29T23:59:59Z")
+        True
+        >>> is_date_time("2013-02-29T23:59:59Z")
+        False
+        >>> is_date_time("2012-2-9T23:59:59Z")
+        False
+    """
+    return _date_time_fields(value) is not None
+
+
+def parse_date_time(value):
+    """
+    Convert a JSON date-time string to a :class:`datetime.datetime`.
+
+    See :func:`is_date_time` for the accepted strings.
+
+        >>> parse_date_time("2010-11-12T14:38:55Z")
+        datetime.datetime(2010, 11, 12, 14, 38, 55)
+
+    :raises TypeError:
+        if value is not a string
+    :raises ValueError:
+        if value is not a valid date-time
+    """
+    if not isinstance(value, basestring):
+        raise TypeError("date-time must be a string")
+    fields = _date_time_fields(value)
+    if fields is None:
+        raise ValueError(
+            "{0!r} is not a date-time in YYYY-MM-DDThh:mm:ssZ"
+            " format".format(value))
+    return datetime.datetime(*fields)
+
+
+def json_key(value):
+    """
+    Compute a hashable key of a JSON value.
+
+    Two JSON values have equal keys if, and only if, they are equal. Unlike
+    python equality, booleans are not numbers. Objects and arrays get keys
+    too, so they can be stored in sets.
+
+        >>> json_key(1) == json_key(1.0)
+        True
+        >>> json_key(True) == json_key(1)
+        False
+        >>> json_key({"a": [1, True]}) == json_key({"a": [1.0, True]})
+        True
+    """
+    if value is True or value is False:
+        return (bool, value)
+    if isinstance(value, dict):
+        return (dict, frozenset(
+            (key, json_key(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return (list, tuple(json_key(item) for item in value))
+    return value
+
+
+def find_duplicate(values):
+    """
+    Find the first value of an array that is equal to an earlier value.
+
+    Values are compared with :func:`json_key`, so this works for arrays of
+    objects and arrays too and takes linear time.
+
+        >>> find_duplicate([{"a": 1}, True, 1, {"a": 1.0}])
+        (0, 3)
+        >>> find_duplicate([1, True, [1], [True]]) is None
+        True
+
+    :returns:
+        Tuple (index of the earlier value, index of the duplicate) or None
+        if all the values are unique
+    """
+    seen = {}
+    for index, value in enumerate(values):
+        first = seen.setdefault(json_key(value), index)
+        if first != index:
+            return first, index
+    return None
+
+
+class RegexCache(object):
+    """
+    Bounded, thread-safe cache of compiled regular expressions.
+
+    The :mod:`re` module keeps its own cache but it is small and is flushed
+    entirely once full. Schemas with many distinct patterns (and the
+    ``regex`` format, which compiles each validated string) quickly exhaust
+    it. This cache evicts the least recently used pattern instead.
+
+        >>> cache = RegexCache(maxsize=2)
+        >>> cache.compile("a+").match("aaa") is not None
+        True
+        >>> cache.compile("a+") is cache.compile("a+")
+        True
+        >>> (cache.hits, cache.misses)
+        (2, 1)
+
+    .. attribute:: hits
+
+        Number of lookups that found a compiled expression in the cache.
+
+    .. attribute:: misses
+
+        Number of lookups that had to compile the expression.
+    """
+
+    def __init__(self, maxsize=256):
+        if maxsize < 0:
+            raise ValueError("maxsize cannot be negative")
+        self._maxsize = maxsize
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    @property
+    def maxsize(self):
+        """Maximum number of compiled expressions kept in the cache."""
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, value):
+        if value < 0:
+            raise ValueError("maxsize cannot be negative")
+        with self._lock:
+            self._maxsize = value
+            while len(self._cache) > value:
+                self._cache.popitem(last=False)
+
+    def compile(self, pattern):
+        """
+        Compile pattern, reusing a previously compiled expression if possible.
+
+        :raises re.error:
+            if the pattern is not a valid regular expression
+        """
+        # Patterns of different types (str vs bytes) are distinct.
+        key = (type(pattern), pattern)
+        with self._lock:
+            try:
+                regex = self._cache.pop(key)
+            except KeyError:
+                pass
+            else:
+                # Re-insert to mark the entry as most recently used
+                self._cache[key] = regex
+                self.hits += 1
+                return regex
+        regex = re.compile(pattern)
+        with self._lock:
+            self.misses += 1
+            if self._maxsize > 0:
+                self._cache[key] = regex
+                while len(self._cache) > self._maxsize:
+                    self._cache.popitem(last=False)
+        return regex
+
+    def clear(self):
+        """Remove all compiled expressions and reset the counters."""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Cache used for ``pattern`` and ``format: regex``
+regex_cache = RegexCache()
@@ -0,0 +1,213 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Validation of large batches of documents using multiple processes.
+
+Validation is CPU bound so threads do not help. This module spreads chunks
+of documents across a pool of worker processes. The schema is sent to each
+worker once, when the worker starts, and compiled there. Results are the
+same :class:`json_schema_validator.validator.ValidationResult` objects that
+:meth:`json_schema_validator.validator.Validator.validate_many` produces;
+errors keep their message, object_expr and schema_expr when they are sent
+back from the workers.
+"""
+
+import collections
+import itertools
+import multiprocessing
+
+try:
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+except ImportError:
+    # On python 2 this needs the 'futures' backport
+    ProcessPoolExecutor = None
+
+from json_schema_validator.compiler import compile
+from json_schema_validator.schema import Schema
+from json_schema_validator.validator import Validator
+
+
+# State of each worker process, set up by _init_worker()
+_worker_state = None
+
+
+def _init_worker(schema, report, deserializer, format_registry,
+                 schema_registry):
+    global _worker_state
+    _worker_state = (
+        schema, compile(schema, format_registry, schema_registry), report,
+        deserializer)
+
+
+def _validate_chunk(chunk):
+    schema, compiled, report, deserializer = _worker_state
+    if deserializer is not None:
+        chunk = [deserializer(text) for text in chunk]
+    return list(Validator._validate_many(schema, compiled, chunk, report))
+
+
+def _chunked(iterable, chunksize):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ParallelValidator(object):
+    """
+    Validator that uses a pool of worker processes.
+
+    The pool is started when the validator is created and stays alive until
+    :meth:`close` is called, the validator can be used as a context manager
+    to do that automatically.
+
+    :param schema:
+        Schema to validate against
+    :type schema:
+        :class:`json_schema_validator.schema.Schema`
+    :param max_workers:
+        Number of worker processes, defaults to the number of CPUs
+    :param report:
+        Amount of detail to report about invalid documents, see
+        :meth:`json_schema_validator.validator.Validator.validate_many`
+    :param deserializer:
+        If not None, documents are JSON text that is converted to JSON
+        objects with this function, in the worker process. It must be
+        possible to pickle the function (e.g. :func:`json.loads`).
+    :param chunksize:
+        Number of documents sent to a worker at a time
+    :param validator_cls:
+        Class whose ``format_registry`` and ``schema_registry`` are used,
+        they are sent to the workers with the schema so they must be
+        possible to pickle
+    """
+
+    def __init__(self, schema, max_workers=None, report="first",
+                 deserializer=None, chunksize=256, validator_cls=Validator):
+        if ProcessPoolExecutor is None:
+            raise NotImplementedError(
+                "parallel validation requires concurrent.futures")
+        if not isinstance(schema, Schema):
+            raise ValueError(
+                "schema value {0!r} is not a Schema"
+                " object".format(schema))
+        if report not in ("ok", "first", "all"):
+            raise ValueError(
+                "report value {0!r} is not one of 'ok', 'first'"
+                " or 'all'".format(report))
+        if chunksize < 1:
+            raise ValueError("chunksize must be positive")
+        # Compile the schema here as well so that schema errors are
+        # reported right away rather than from inside the workers.
+        format_registry = validator_cls.format_registry
+        schema_registry = validator_cls.schema_registry
+        compile(schema, format_registry, schema_registry)
+        if max_workers is None:
+            max_workers = multiprocessing.cpu_count()
+        self._chunksize = chunksize
+        self._executor = ProcessPoolExecutor(
+            max_workers, initializer=_init_worker,
+            initargs=(schema, report, deserializer, format_registry,
+                      schema_registry))
+        # Keep a bounded number of chunks in flight so that memory usage
+        # does not depend on the size of the input.
+        self._max_pending = 2 * max_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shut down the worker processes."""
+        self._executor.shutdown()
+
+    def validate_many(self, iterable):
+        """
+        Validate each document from iterable.
+
+        :returns:
+            Iterator of :class:`json_schema_validator.validator.ValidationResult`,
+            in the same order as iterable
+        """
+        pending = collections.deque()
+        for chunk in _chunked(iterable, self._chunksize):
+            pending.append(self._executor.submit(_validate_chunk, chunk))
+            if len(pending) >= self._max_pending:
+                for result in pending.popleft().result():
+                    yield result
+        while pending:
+            for result in pending.popleft().result():
+                yield result
+
+    def validate_many_unordered(self, iterable):
+        """
+        Validate each document from iterable, as soon as possible.
+
+        Results are produced as soon as any worker is done, regardless of the
+        order of the documents.
+
+        :returns:
+            Iterator of (index, result) pairs where index is the position of
+            the document in iterable and result is a
+            :class:`json_schema_validator.validator.ValidationResult`
+        """
+        pending = {}
+        start = 0
+        for chunk in _chunked(iterable, self._chunksize):
+            future = self._executor.submit(_validate_chunk, chunk)
+            pending[future] = start
+            start += len(chunk)
+            if len(pending) >= self._max_pending:
+                for item in self._collect(pending):
+                    yield item
+        while pending:
+            for item in self._collect(pending):
+                yield item
+
+    def _collect(self, pending):
+        done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            start = pending.pop(future)
+            for offset, result in enumerate(future.result()):
+                yield start + offset, result
+
+
+def validate_many(schema, iterable, ordered=True, **kwargs):
+    """
+    Validate each document from iterable using multiple processes.
+
+    This is a shortcut that creates a :class:`ParallelValidator`, with any
+    additional keyword arguments, for the duration of one batch.
+
+    :param ordered:
+        If true results are produced in the order of documents, otherwise
+        (index, result) pairs are produced as soon as they are ready.
+    """
+    with ParallelValidator(schema, **kwargs) as validator:
+        if ordered:
+            results = validator.validate_many(iterable)
+        else:
+            results = validator.validate_many_unordered(iterable)
+        for result in results:
+            yield result
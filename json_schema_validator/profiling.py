@@ -0,0 +1,239 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Finding out which parts of a schema are slow to validate.
+
+:class:`ProfilingValidator` runs the same checks as
+:class:`json_schema_validator.validator.Validator` but measures each call to
+a keyword handler (type, properties, items, pattern, ...). The measurements
+are collected in a :class:`ValidationProfile`, per keyword and per schema
+path. The profile may also forward each measurement to a callback.
+
+Profiling is opt-in. Plain :class:`json_schema_validator.validator.Validator`
+is not instrumented at all, so it does not pay anything for this feature.
+
+    >>> from json_schema_validator.schema import Schema
+    >>> schema = Schema({"items": {"type": "string", "pattern": "^a"}})
+    >>> profile = ProfilingValidator.profile(schema, ["a", "ab", "b"])
+    >>> profile.keywords["pattern"].calls
+    3
+    >>> len(profile.errors)
+    1
+"""
+
+import collections
+import timeit
+
+from json_schema_validator.schema import Schema
+from json_schema_validator.validator import Validator
+
+
+class ProfileEntry(object):
+    """Number of calls and cumulative time spent in them."""
+
+    __slots__ = ('calls', 'seconds')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return "<ProfileEntry calls:{0} seconds:{1:.6f}>".format(
+            self.calls, self.seconds)
+
+
+class ValidationProfile(object):
+    """
+    Measurements collected by :class:`ProfilingValidator`.
+
+    The time of each keyword handler is inclusive. Handlers of keywords that
+    describe nested objects (properties, additionalProperties, items and
+    requires) include the time spent validating those nested objects.
+
+    :ivar keywords:
+        Dictionary mapping keyword names to :class:`ProfileEntry`
+    :ivar paths:
+        Dictionary mapping schema expressions (such as
+        ``schema.properties.foo``) to :class:`ProfileEntry`, for all the
+        keywords of that part of the schema
+    :ivar errors:
+        List of errors found by :meth:`ProfilingValidator.profile`
+    """
+
+    def __init__(self, callback=None):
+        """
+        Initialize an empty profile.
+
+        :param callback:
+            If not None, called as ``callback(keyword, schema_expr, seconds)``
+            after each call to a keyword handler
+        """
+        self.callback = callback
+        self.keywords = collections.defaultdict(ProfileEntry)
+        self.paths = collections.defaultdict(ProfileEntry)
+        self.errors = []
+
+    def record(self, keyword, schema_expr, seconds):
+        """Record one call to the handler of keyword."""
+        entry = self.keywords[keyword]
+        entry.calls += 1
+        entry.seconds += seconds
+        entry = self.paths[schema_expr]
+        entry.calls += 1
+        entry.seconds += seconds
+        if self.callback is not None:
+            self.callback(keyword, schema_expr, seconds)
+
+    def report(self):
+        """
+        Summarize the profile.
+
+        :returns:
+            Dictionary with ``keywords`` and ``paths`` lists. Each item is a
+            dictionary with ``keyword`` (or ``path``), ``calls`` and
+            ``seconds``. The most expensive items come first.
+        """
+        def summarize(entries, key):
+            return [
+                collections.OrderedDict([
+                    (key, name),
+                    ("calls", entry.calls),
+                    ("seconds", entry.seconds),
+                ])
+                for name, entry in sorted(
+                    entries.items(),
+                    key=lambda item: (-item[1].seconds, item[0]))]
+        return collections.OrderedDict([
+            ("keywords", summarize(self.keywords, "keyword")),
+            ("paths", summarize(self.paths, "path")),
+        ])
+
+
+class ProfilingValidator(Validator):
+    """
+    JSON Schema validator that measures each keyword handler.
+
+    :param profile:
+        Profile to record measurements in, a new one is created if None
+    """
+
+    def __init__(self, profile=None):
+        super(ProfilingValidator, self).__init__()
+        if profile is None:
+            profile = ValidationProfile()
+        self._profile = profile
+
+    @classmethod
+    def profile(cls, schema, obj, callback=None):
+        """
+        Validate obj with schema and measure where the time goes.
+
+        All the problems are collected, validation does not stop at the
+        first one.
+
+        :param schema:
+            Schema to validate against
+        :type schema:
+            :class:`json_schema_validator.schema.Schema`
+        :param obj:
+            JSON object to validate
+        :param callback:
+            Callback passed to :class:`ValidationProfile`
+        :returns:
+            :class:`ValidationProfile` with the measurements and errors
+        """
+        if not isinstance(schema, Schema):
+            raise ValueError(
+                "schema value {0!r} is not a Schema"
+                " object".format(schema))
+        self = cls(ValidationProfile(callback))
+        self._profile.errors.extend(self.iter_errors_toplevel(schema, obj))
+        return self._profile
+
+    def _make_sub_validator(self):
+        return self.__class__(self._profile)
+
+    def _measure(self, keyword, handler):
+        # Only the time spent inside the handler counts, not the time the
+        # consumer of errors spends between them.
+        schema_expr = self._get_schema_expression()
+        timer = timeit.default_timer
+        errors = handler()
+        seconds = 0.0
+        while True:
+            start = timer()
+            try:
+                error = next(errors)
+            except StopIteration:
+                seconds += timer() - start
+                break
+            seconds += timer() - start
+            yield error
+        self._profile.record(keyword, schema_expr, seconds)
+
+    def _validate_type(self):
+        return self._measure(
+            "type", super(ProfilingValidator, self)._validate_type)
+
+    def _validate_disallow(self):
+        return self._measure(
+            "disallow", super(ProfilingValidator, self)._validate_disallow)
+
+    def _validate_requires(self):
+        return self._measure(
+            "requires", super(ProfilingValidator, self)._validate_requires)
+
+    def _validate_properties(self):
+        return self._measure(
+            "properties",
+            super(ProfilingValidator, self)._validate_properties)
+
+    def _validate_additional_properties(self):
+        return self._measure(
+            "additionalProperties",
+            super(ProfilingValidator, self)._validate_additional_properties)
+
+    def _validate_items(self):
+        return self._measure(
+            "items", super(ProfilingValidator, self)._validate_items)
+
+    def _validate_enum(self):
+        return self._measure(
+            "enum", super(ProfilingValidator, self)._validate_enum)
+
+    def _validate_format(self):
+        return self._measure(
+            "format", super(ProfilingValidator, self)._validate_format)
+
+    def _validate_pattern(self):
+        return self._measure(
+            "pattern", super(ProfilingValidator, self)._validate_pattern)
+
+    def _validate_length(self):
+        return self._measure(
+            "length", super(ProfilingValidator, self)._validate_length)
+
+    def _validate_range(self):
+        return self._measure(
+            "range", super(ProfilingValidator, self)._validate_range)
+
+    def _validate_extends(self):
+        return self._measure(
+            "extends", super(ProfilingValidator, self)._validate_extends)
@@ -0,0 +1,341 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Schemas that refer to each other with ``$ref``.
+
+A schema with ``$ref`` is replaced by the schema the reference points to.
+References are URIs, resolved against the ``id`` of the enclosing schemas.
+The fragment, if any, is a JSON Pointer (such as ``#/definitions/address``)
+into the referenced document.
+
+References within a single schema work out of the box:
+
+    >>> from json_schema_validator.validator import Validator
+    >>> tree = Schema({
+    ...     "type": "object",
+    ...     "properties": {
+    ...         "value": {"type": "integer"},
+    ...         "children": {
+    ...             "type": "array", "optional": True, "items": {"$ref": "#"}
+    ...         }
+    ...     }
+    ... })
+    >>> Validator.validate(tree, {"value": 1, "children": [{"value": 2}]})
+    True
+
+References to other documents are found in a :class:`SchemaRegistry`:
+
+    >>> from json_schema_validator.compiler import compile
+    >>> registry = SchemaRegistry({
+    ...     "http://example.com/point.json": {
+    ...         "type": "object",
+    ...         "properties": {"x": {"$ref": "#/definitions/coordinate"},
+    ...                        "y": {"$ref": "#/definitions/coordinate"}},
+    ...         "definitions": {"coordinate": {"type": "number"}},
+    ...     },
+    ... })
+    >>> line = Schema({
+    ...     "id": "http://example.com/line.json",
+    ...     "type": "array",
+    ...     "items": {"$ref": "point.json"},
+    ... })
+    >>> compile(line, schema_registry=registry).validate([{"x": 0, "y": 1}])
+    True
+
+Each reference is resolved only once. The referenced schemas are shared by
+all the references to them, so recursive schemas are never expanded.
+"""
+
+import json
+import os
+import sys
+import weakref
+
+from json_schema_validator.errors import SchemaError
+from json_schema_validator.schema import Schema
+
+if sys.version_info[0] > 2:
+    from urllib.parse import unquote, urldefrag, urljoin
+    from urllib.request import pathname2url
+    basestring = (str, )
+else:
+    from urllib import pathname2url, unquote
+    from urlparse import urldefrag, urljoin
+
+# Keywords whose values are not schemas and are not searched for ids
+_NOT_SCHEMAS = frozenset(["enum", "default"])
+
+
+class SchemaRegistry(object):
+    """
+    Collection of schema documents, indexed by URI.
+
+    Documents are JSON objects (python dictionaries). They must not be
+    modified after they are added.
+
+    :param schemas:
+        Mapping of URIs to documents to add, see :meth:`add`
+    """
+
+    def __init__(self, schemas=None):
+        # URI without fragment -> document
+        self._documents = {}
+        # URI (possibly with a fragment) from an "id" -> schema JSON
+        self._ids = {}
+        # id() of each schema JSON in the documents -> base URI
+        self._bases = {}
+        # id() of schema JSON -> Schema
+        self._schemas = {}
+        # id() of schema JSON with $ref -> referenced Schema
+        self._resolved = {}
+        # Registry consulted for documents that are not found here
+        self._parent = None
+        # (schema_json, uri) given to add(), in order
+        self._added = []
+        if schemas is not None:
+            for uri, schema_json in schemas.items():
+                self.add(schema_json, uri)
+
+    def add(self, schema_json, uri=None):
+        """
+        Add a schema document.
+
+        :param schema_json:
+            The document, a JSON object (python dictionary)
+        :param uri:
+            URI of the document. The ``id`` of the document is used by
+            default.
+        :raises ValueError:
+            if there is no URI
+        """
+        if not isinstance(schema_json, dict):
+            raise SchemaError("Schema definition must be a JSON object")
+        if uri is None:
+            uri = schema_json.get("id")
+            if not isinstance(uri, basestring):
+                raise ValueError("schema has no id, the uri is required")
+        uri = urldefrag(uri)[0]
+        self._added.append((schema_json, uri))
+        self._documents[uri] = schema_json
+        self._index(schema_json, uri)
+
+    def __reduce__(self):
+        # The indices are keyed by id() of the documents, they are rebuilt
+        # for the copies of the documents
+        return (_restore_registry, (self._added, self._parent))
+
+    def load_directory(self, path, base_uri=None):
+        """
+        Add all the ``.json`` files in a directory and its subdirectories.
+
+        :param path:
+            Directory to load
+        :param base_uri:
+            URI of the directory. Each document gets the URI of its path
+            relative to the directory, for example
+            ``http://example.com/schemas/`` and ``event/login.json``
+            make ``http://example.com/schemas/event/login.json``. By default
+            ``file:`` URIs are used.
+        """
+        if base_uri is None:
+            base_uri = "file://" + pathname2url(os.path.abspath(path))
+        if not base_uri.endswith("/"):
+            base_uri += "/"
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if not filename.endswith(".json"):
+                    continue
+                filepath = os.path.join(dirpath, filename)
+                relpath = os.path.relpath(filepath, path)
+                with open(filepath) as stream:
+                    schema_json = json.load(stream)
+                self.add(schema_json, urljoin(base_uri, pathname2url(relpath)))
+
+    def _index(self, schema_json, base):
+        pending = [(schema_json, base)]
+        while pending:
+            node, base = pending.pop()
+            if isinstance(node, dict):
+                node_id = node.get("id")
+                if isinstance(node_id, basestring):
+                    base = _join_uri(base, node_id)
+                    self._ids[base] = node
+                    doc_uri, fragment = urldefrag(base)
+                    if not fragment:
+                        self._documents.setdefault(doc_uri, node)
+                self._bases[id(node)] = base
+                for key, value in node.items():
+                    if key not in _NOT_SCHEMAS and isinstance(
+                            value, (dict, list)):
+                        pending.append((value, base))
+            else:
+                for value in node:
+                    if isinstance(value, (dict, list)):
+                        pending.append((value, base))
+
+    def get(self, uri):
+        """
+        Find the schema with the given URI.
+
+        :param uri:
+            URI, possibly with a JSON Pointer fragment
+        :rtype:
+            :class:`json_schema_validator.schema.Schema`
+        :raises `json_schema_validator.errors.SchemaError`:
+            if there is no such schema
+        """
+        return self._get_schema(self._lookup(uri, uri))
+
+    def resolve(self, schema):
+        """
+        Find the schema referred to by a schema with ``$ref``.
+
+        References to schemas that have ``$ref`` themselves are followed
+        until a schema without ``$ref`` is found. The result is remembered,
+        resolving the same schema again is a dictionary lookup.
+
+        :param schema:
+            Schema with ``$ref``
+        :type schema:
+            :class:`json_schema_validator.schema.Schema`
+        :rtype:
+            :class:`json_schema_validator.schema.Schema`
+        :raises `json_schema_validator.errors.SchemaError`:
+            if the reference cannot be resolved
+        """
+        node = schema._schema
+        try:
+            return self._resolved[id(node)]
+        except KeyError:
+            pass
+        seen = set()
+        target = schema
+        while target.ref is not None:
+            if id(target._schema) in seen:
+                raise SchemaError(
+                    "$ref value {0!r} refers to itself".format(schema.ref))
+            seen.add(id(target._schema))
+            target = self._resolve_ref(target)
+        if id(node) in self._bases:
+            # Only nodes kept alive by the documents are remembered
+            self._resolved[id(node)] = target
+        return target
+
+    def _resolve_ref(self, schema):
+        ref = schema.ref
+        base = self._bases.get(id(schema._schema))
+        if base is None:
+            if self._parent is not None:
+                return self._parent._resolve_ref(schema)
+            base = ""
+        return self._get_schema(self._lookup(_join_uri(base, ref), ref))
+
+    def _lookup(self, uri, ref):
+        try:
+            return self._ids[uri]
+        except KeyError:
+            pass
+        doc_uri, fragment = urldefrag(uri)
+        try:
+            node = self._documents[doc_uri]
+        except KeyError:
+            if self._parent is not None:
+                return self._parent._lookup(uri, ref)
+            raise SchemaError(
+                "$ref value {0!r} cannot be resolved".format(ref))
+        if fragment:
+            node = _follow_pointer(node, fragment, ref)
+        return node
+
+    def _get_schema(self, node):
+        try:
+            return self._schemas[id(node)]
+        except KeyError:
+            pass
+        schema = Schema(node)
+        if id(node) in self._bases:
+            # Only nodes kept alive by the documents are remembered
+            self._schemas[id(node)] = schema
+        return schema
+
+
+def _restore_registry(added, parent):
+    registry = SchemaRegistry()
+    registry._parent = parent
+    for schema_json, uri in added:
+        registry.add(schema_json, uri)
+    return registry
+
+
+def _join_uri(base, ref):
+    """Resolve ref relative to base."""
+    if ref.startswith("#"):
+        # urljoin() ignores the base if it is not a URL, such as "urn:x"
+        return urldefrag(base)[0] + ref
+    return urljoin(base, ref)
+
+
+def _follow_pointer(node, pointer, ref):
+    """Find the part of node designated by a JSON Pointer."""
+    pointer = unquote(pointer)
+    if pointer.startswith("/"):
+        pointer = pointer[1:]
+    for token in pointer.split("/"):
+        token = token.replace("~1", "/").replace("~0", "~")
+        if isinstance(node, dict) and token in node:
+            node = node[token]
+        elif (isinstance(node, list) and token.isdigit() and
+                int(token) < len(node)):
+            node = node[int(token)]
+        else:
+            raise SchemaError(
+                "$ref value {0!r} cannot be resolved".format(ref))
+    if not isinstance(node, dict):
+        raise SchemaError(
+            "$ref value {0!r} does not refer to a schema".format(ref))
+    return node
+
+
+_root_registries = weakref.WeakKeyDictionary()
+
+
+def _get_root_registry(root, registry):
+    """
+    Get the registry that resolves references found in root.
+
+    References may point into root itself, which is usually not a part of
+    the given registry (which may be None). A registry that knows about
+    root, and falls back to the given registry, is created once per root.
+    """
+    if registry is not None and id(root._schema) in registry._bases:
+        return registry
+    by_registry = _root_registries.get(root)
+    if by_registry is None:
+        by_registry = _root_registries[root] = {}
+    try:
+        return by_registry[registry]
+    except KeyError:
+        pass
+    root_registry = SchemaRegistry()
+    root_registry._parent = registry
+    root_registry.add(root._schema, "")
+    by_registry[registry] = root_registry
+    return root_registry
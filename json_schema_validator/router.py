@@ -0,0 +1,248 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Dispatching documents to the schemas they match.
+
+:meth:`json_schema_validator.validator.Validator.first_match` tries each
+schema in turn, which is slow when there are hundreds of them (one schema
+per kind of message, for example). :class:`SchemaRouter` looks at the
+schemas once and builds an index from facts that are cheap to check:
+
+* the ``type`` of the document,
+* the ``enum`` of top-level properties, such as ``{"kind": {"enum":
+  ["login"]}}``,
+* the names of the properties that are not optional.
+
+A document is then fully validated only against the few schemas that the
+index could not rule out.
+
+    >>> from json_schema_validator.schema import Schema
+    >>> router = SchemaRouter([
+    ...     Schema({"type": "object",
+    ...             "properties": {"kind": {"enum": ["login"]},
+    ...                            "user": {"type": "string"}}}),
+    ...     Schema({"type": "object",
+    ...             "properties": {"kind": {"enum": ["logout"]}}}),
+    ...     Schema({"type": "string"}),
+    ... ])
+    >>> router.candidates({"kind": "logout"})
+    [1]
+    >>> router.first_match({"kind": "login", "user": "bob"})
+    0
+    >>> router.first_match({"kind": "login"}) is None
+    True
+
+The index never rules out a schema that the document matches, so the
+results are the same as trying each schema with
+:meth:`json_schema_validator.validator.Validator.is_valid`.
+"""
+
+import collections
+import sys
+
+from json_schema_validator.compiler import type_predicate
+from json_schema_validator.misc import json_key
+from json_schema_validator.schema import Schema
+from json_schema_validator.validator import Validator, _get_layout
+
+if sys.version_info[0] > 2:
+    basestring = (str, )
+
+_SIMPLE_TYPES = (
+    "string", "number", "integer", "boolean", "object", "array", "null")
+
+
+class _PropertyIndex(object):
+    """Schemas indexed by the value of one property."""
+
+    __slots__ = ('by_value', 'absent', 'unconstrained')
+
+    def __init__(self):
+        # json_key(value) -> indices of schemas that allow the value
+        self.by_value = collections.defaultdict(set)
+        # indices of schemas that allow the property to be missing
+        self.absent = set()
+        # indices of schemas that do not restrict the value, they are
+        # included in the two above as well
+        self.unconstrained = frozenset()
+
+
+def _enum_keys(prop_schema):
+    """Keys of the values allowed by prop_schema or None for any value."""
+    if prop_schema.ref is not None:
+        # The enum of a reference is not used, the referenced one is not
+        # indexed
+        return None
+    enum = prop_schema.enum
+    if enum is None:
+        return None
+    return frozenset(json_key(item) for item in enum)
+
+
+class SchemaRouter(object):
+    """
+    Index of schemas for finding the ones a document matches.
+
+    The schemas must not be modified after the router is created.
+
+    :param schemas:
+        Sequence of :class:`json_schema_validator.schema.Schema`. Matches
+        are reported as indices into this sequence.
+    :param validator_cls:
+        Class whose ``is_valid`` method checks the candidates
+    :raises `json_schema_validator.errors.SchemaError`:
+        if one of the schemas is wrong.
+    """
+
+    def __init__(self, schemas, validator_cls=Validator):
+        self.schemas = list(schemas)
+        self.validator_cls = validator_cls
+        for schema in self.schemas:
+            if not isinstance(schema, Schema):
+                raise ValueError(
+                    "schema value {0!r} is not a Schema"
+                    " object".format(schema))
+        self._build_type_index()
+        self._build_property_index()
+        self._build_required_index()
+
+    def _build_type_index(self):
+        # Indices of schemas that accept any type
+        self._any_type = set()
+        by_type = dict((name, set()) for name in _SIMPLE_TYPES)
+        for index, schema in enumerate(self.schemas):
+            if schema.ref is not None:
+                # The validators use the referenced schema instead, which
+                # is not indexed. The other keywords are ignored.
+                self._any_type.add(index)
+                continue
+            json_type = schema.type
+            if isinstance(json_type, basestring):
+                json_type = [json_type]
+            elif isinstance(json_type, dict):
+                json_type = ["any"]
+            if "any" in json_type or not all(
+                    isinstance(alt_type, basestring)
+                    for alt_type in json_type):
+                # Nested schemas in union types are not indexed
+                self._any_type.add(index)
+                continue
+            for name in json_type:
+                by_type[name].add(index)
+        # (predicate, indices) using the same notion of types as the
+        # validators
+        self._by_type = [
+            (type_predicate([name]), frozenset(by_type[name]))
+            for name in _SIMPLE_TYPES if by_type[name]]
+
+    def _build_property_index(self):
+        enums = []
+        names = set()
+        for index, schema in enumerate(self.schemas):
+            if schema.ref is not None:
+                continue
+            layout = _get_layout(schema)
+            for prop, prop_schema, schema_path, object_path in (
+                    layout.properties):
+                keys = _enum_keys(prop_schema)
+                if keys is not None:
+                    enums.append(
+                        (index, prop, keys, prop in layout.required))
+                    names.add(prop)
+        self._by_property = collections.OrderedDict(
+            (prop, _PropertyIndex()) for prop in sorted(names))
+        constrained = collections.defaultdict(set)
+        for index, prop, keys, required in enums:
+            prop_index = self._by_property[prop]
+            for key in keys:
+                prop_index.by_value[key].add(index)
+            if not required:
+                prop_index.absent.add(index)
+            constrained[prop].add(index)
+        everything = set(range(len(self.schemas)))
+        for prop, prop_index in self._by_property.items():
+            unconstrained = frozenset(everything - constrained[prop])
+            prop_index.unconstrained = unconstrained
+            prop_index.absent = frozenset(prop_index.absent | unconstrained)
+            prop_index.by_value = dict(
+                (key, frozenset(indices | unconstrained))
+                for key, indices in prop_index.by_value.items())
+
+    def _build_required_index(self):
+        self._required = [
+            frozenset() if schema.ref is not None
+            else _get_layout(schema).required
+            for schema in self.schemas]
+
+    def candidates(self, obj):
+        """
+        Find the schemas that obj might match.
+
+        :param obj:
+            JSON object to route
+        :returns:
+            Sorted list of indices of schemas that were not ruled out
+        """
+        matching = set(self._any_type)
+        for has_type, indices in self._by_type:
+            if has_type(obj):
+                matching |= indices
+        if matching and isinstance(obj, dict):
+            for prop, prop_index in self._by_property.items():
+                if prop not in obj:
+                    matching &= prop_index.absent
+                else:
+                    matching &= prop_index.by_value.get(
+                        json_key(obj[prop]), prop_index.unconstrained)
+                if not matching:
+                    break
+            required = self._required
+            matching = [
+                index for index in matching if required[index].issubset(obj)]
+        return sorted(matching)
+
+    def first_match(self, obj):
+        """
+        Find the first schema that obj matches.
+
+        :param obj:
+            JSON object to route
+        :returns:
+            Index of the first matching schema or None if there is no match
+        """
+        is_valid = self.validator_cls.is_valid
+        for index in self.candidates(obj):
+            if is_valid(self.schemas[index], obj):
+                return index
+        return None
+
+    def matches(self, obj):
+        """
+        Find all the schemas that obj matches.
+
+        :param obj:
+            JSON object to route
+        :returns:
+            Sorted list of indices of matching schemas
+        """
+        is_valid = self.validator_cls.is_valid
+        return [
+            index for index in self.candidates(obj)
+            if is_valid(self.schemas[index], obj)]
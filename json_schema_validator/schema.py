@@ -23,12 +23,34 @@ import re
 import sys
 
 from json_schema_validator.errors import SchemaError
-from json_schema_validator.misc import NUMERIC_TYPES
+from json_schema_validator.misc import NUMERIC_TYPES, json_key, regex_cache
 
 if sys.version_info[0] > 2:
     basestring = (str, )
 
 
+def _keyword(getter):
+    """
+    Turn getter into a property that reads a schema keyword.
+
+    Once the schema is checked (see :meth:`Schema.check`) the value computed
+    by the check is returned as-is, without checking it again.
+    """
+    name = getter.__name__
+
+    def get(self):
+        values = self._values
+        if values is not None:
+            try:
+                return values[name]
+            except KeyError:
+                pass
+        return getter(self)
+    get.__name__ = name
+    get.__doc__ = getter.__doc__
+    return property(get)
+
+
 class Schema(object):
     """
     JSON schema object.
@@ -38,21 +60,149 @@ class Schema(object):
     rules described by the schema.
     """
 
-    def __init__(self, json_obj):
+    __slots__ = (
+        '_schema', '_values', '_children', '_layout', '__weakref__')
+
+    # Keywords computed and remembered by check()
+    _CHECKED_KEYWORDS = (
+        "type", "properties", "items", "optional", "additionalProperties",
+        "requires", "minimum", "maximum", "minItems", "maxItems",
+        "uniqueItems", "pattern", "minLength", "maxLength", "enum", "title",
+        "description", "format", "contentEncoding", "divisibleBy",
+        "disallow", "ref", "id", "extends")
+
+    def __init__(self, json_obj, strict=False):
         """
         Initialize a schema with a schema representation.
 
         :param json_obj:
             A JSON object (python dictionary) describing the schema.
+        :param strict:
+            If true the whole schema is checked right away, see
+            :meth:`check`.
         """
         if not isinstance(json_obj, dict):
             raise SchemaError("Schema definition must be a JSON object")
         self._schema = json_obj
+        # Values of keywords and nested schemas, set by check()
+        self._values = None
+        self._children = None
+        # Facts used by the validator, see json_schema_validator.validator
+        self._layout = None
+        if strict:
+            self.check()
+
+    def check(self, schema_expr="schema"):
+        """
+        Check the whole schema, including all the nested schemas.
+
+        Normally each keyword is checked every time it is read, which
+        happens each time an object is validated. This method checks
+        everything once. The checked values are remembered and
+        returned by the keyword properties without checking them again.
+        The nested schemas used by the validator are checked and
+        remembered too. The schema must not be modified afterwards.
+
+        Checking the same schema again does nothing.
+
+        :param schema_expr:
+            Expression that describes this schema in error messages
+        :raises `json_schema_validator.errors.SchemaError`:
+            For the first problem found. The message starts with an
+            expression, such as ``schema.properties.foo.minimum``, that
+            points at the problem. The same expression is available as the
+            schema_expr attribute of the exception.
+        :raises NotImplementedError:
+            If the schema uses features that are not supported
+        """
+        if self._values is not None:
+            return
+        values = {}
+        for name in self._CHECKED_KEYWORDS:
+            values[name] = self._check_keyword(name, schema_expr)
+        if values["minimum"] is not None or "minimumCanEqual" in self._schema:
+            values["minimumCanEqual"] = self._check_keyword(
+                "minimumCanEqual", schema_expr)
+        if values["maximum"] is not None or "maximumCanEqual" in self._schema:
+            values["maximumCanEqual"] = self._check_keyword(
+                "maximumCanEqual", schema_expr)
+        children = {}
+        for prop, child_json in values["properties"].items():
+            self._check_child(
+                children, child_json,
+                schema_expr + ".properties." + prop)
+        if isinstance(values["items"], list):
+            for index, child_json in enumerate(values["items"]):
+                self._check_child(
+                    children, child_json,
+                    "{0}.items[{1}]".format(schema_expr, index))
+        else:
+            self._check_child(
+                children, values["items"], schema_expr + ".items")
+        if values["additionalProperties"] is not False:
+            self._check_child(
+                children, values["additionalProperties"],
+                schema_expr + ".additionalProperties")
+        if isinstance(values["requires"], dict):
+            self._check_child(
+                children, values["requires"], schema_expr + ".requires")
+        # Nested schemas of these keywords use the same paths as the
+        # validators, schema.type.1 or schema.type for a single schema
+        for name in ("type", "disallow", "extends"):
+            raw_value = self._schema.get(name)
+            if isinstance(raw_value, dict):
+                self._check_child(
+                    children, raw_value, schema_expr + "." + name)
+            elif isinstance(raw_value, list):
+                for index, child_json in enumerate(values[name]):
+                    if isinstance(child_json, dict):
+                        self._check_child(
+                            children, child_json,
+                            "{0}.{1}.{2}".format(schema_expr, name, index))
+        self._children = children
+        self._values = values
+
+    def _check_keyword(self, name, schema_expr):
+        try:
+            return getattr(self, name)
+        except SchemaError as exc:
+            _raise_with_path(exc, "{0}.{1}".format(schema_expr, name))
+
+    def _check_child(self, children, child_json, schema_expr):
+        if child_json == {} or id(child_json) in children:
+            # The empty schema has nothing to check. This also stops the
+            # default items and additionalProperties from recursing forever.
+            return
+        try:
+            child = Schema(child_json)
+        except SchemaError as exc:
+            _raise_with_path(exc, schema_expr)
+        child.check(schema_expr)
+        children[id(child_json)] = child
+
+    def _subschema(self, json_obj):
+        """
+        Get the schema for a nested part of this schema.
+
+        If this schema was checked the checked nested schema is returned.
+        """
+        children = self._children
+        if children is not None:
+            try:
+                return children[id(json_obj)]
+            except KeyError:
+                pass
+        return Schema(json_obj)
+
+    def __reduce__(self):
+        # Nested schemas are remembered by id() of their JSON, which is not
+        # preserved by copies. The copy is checked again instead.
+        return (self.__class__, (self._schema, self._values is not None))
 
     def __repr__(self):
         return "Schema({0!r})".format(self._schema)
 
-    @property
+    @_keyword
     def type(self):
         """
         Type of a valid object.
@@ -97,7 +247,7 @@ class Schema(object):
                         "name".format(js_type))
         return value
 
-    @property
+    @_keyword
     def properties(self):
         """Schema for particular properties of the object."""
         value = self._schema.get("properties", {})
@@ -106,7 +256,7 @@ class Schema(object):
                 "properties value {0!r} is not an object".format(value))
         return value
 
-    @property
+    @_keyword
     def items(self):
         """
         Schema or a list of schemas describing particular elements of the object.
@@ -122,7 +272,7 @@ class Schema(object):
                 format(value))
         return value
 
-    @property
+    @_keyword
     def optional(self):
         """Flag indicating an optional property."""
         value = self._schema.get("optional", False)
@@ -131,7 +281,7 @@ class Schema(object):
                 "optional value {0!r} is not a boolean".format(value))
         return value
 
-    @property
+    @_keyword
     def additionalProperties(self):
         """Schema for all additional properties, or False."""
         value = self._schema.get("additionalProperties", {})
@@ -141,7 +291,7 @@ class Schema(object):
                 " an object".format(value))
         return value
 
-    @property
+    @_keyword
     def requires(self):
         """Additional object or objects required by this object."""
         # NOTE: spec says this can also be a list of strings
@@ -152,7 +302,7 @@ class Schema(object):
                 " object".format(value))
         return value
 
-    @property
+    @_keyword
     def minimum(self):
         """Minimum value of the object."""
         value = self._schema.get("minimum", None)
@@ -164,7 +314,7 @@ class Schema(object):
                     value))
         return value
 
-    @property
+    @_keyword
     def maximum(self):
         """Maximum value of the object."""
         value = self._schema.get("maximum", None)
@@ -176,7 +326,7 @@ class Schema(object):
                     value))
         return value
 
-    @property
+    @_keyword
     def minimumCanEqual(self):
         """Flag indicating if maximum value is inclusive or exclusive."""
         if self.minimum is None:
@@ -188,7 +338,7 @@ class Schema(object):
                     value))
         return value
 
-    @property
+    @_keyword
     def maximumCanEqual(self):
         """Flag indicating if the minimum value is inclusive or exclusive."""
         if self.maximum is None:
@@ -200,7 +350,7 @@ class Schema(object):
                     value))
         return value
 
-    @property
+    @_keyword
     def minItems(self):
         """Minimum number of items in the collection."""
         value = self._schema.get("minItems", 0)
@@ -212,7 +362,7 @@ class Schema(object):
                 "minItems value {0!r} cannot be negative".format(value))
         return value
 
-    @property
+    @_keyword
     def maxItems(self):
         """Maximum number of items in the collection."""
         value = self._schema.get("maxItems", None)
@@ -223,7 +373,7 @@ class Schema(object):
                 "maxItems value {0!r} is not an integer".format(value))
         return value
 
-    @property
+    @_keyword
     def uniqueItems(self):
         """Flag indicating that valid is a collection without duplicates."""
         value = self._schema.get("uniqueItems", False)
@@ -232,7 +382,7 @@ class Schema(object):
                 "uniqueItems value {0!r} is not a boolean".format(value))
         return value
 
-    @property
+    @_keyword
     def pattern(self):
         """
         Regular expression describing valid objects.
@@ -250,13 +400,13 @@ class Schema(object):
         if value is None:
             return
         try:
-            return re.compile(value)
+            return regex_cache.compile(value)
         except re.error as ex:
             raise SchemaError(
                 "pattern value {0!r} is not a valid regular expression:"
                 " {1}".format(value, str(ex)))
 
-    @property
+    @_keyword
     def minLength(self):
         """Minimum length of object."""
         value = self._schema.get("minLength", 0)
@@ -268,7 +418,7 @@ class Schema(object):
                 "minLength value {0!r} cannot be negative".format(value))
         return value
 
-    @property
+    @_keyword
     def maxLength(self):
         """Maximum length of object."""
         value = self._schema.get("maxLength", None)
@@ -279,12 +429,14 @@ class Schema(object):
                 "maxLength value {0!r} is not an integer".format(value))
         return value
 
-    @property
+    @_keyword
     def enum(self):
         """
         Enumeration of allowed object values.
 
-        The enumeration must not contain duplicates.
+        The enumeration must not contain duplicates. Values are compared as
+        JSON values, so ``true`` and ``1`` are different (see
+        :func:`json_schema_validator.misc.json_key`).
         """
         value = self._schema.get("enum", None)
         if value is None:
@@ -298,15 +450,16 @@ class Schema(object):
                 " elements".format(value))
         seen = set()
         for item in value:
-            if item in seen:
+            key = json_key(item)
+            if key in seen:
                 raise SchemaError(
                     "enum value {0!r} contains duplicate element"
                     " {1!r}".format(value, item))
             else:
-                seen.add(item)
+                seen.add(key)
         return value
 
-    @property
+    @_keyword
     def title(self):
         """
         Title of the object.
@@ -321,7 +474,7 @@ class Schema(object):
                 "title value {0!r} is not a string".format(value))
         return value
 
-    @property
+    @_keyword
     def description(self):
         """
         Description of the object.
@@ -336,24 +489,24 @@ class Schema(object):
                 "description value {0!r} is not a string".format(value))
         return value
 
-    @property
+    @_keyword
     def format(self):
-        """Format of the (string) object."""
+        """
+        Format of the (string) object.
+
+        Any name is accepted here. The validators look the format up in a
+        :class:`json_schema_validator.formats.FormatRegistry` and raise
+        NotImplementedError if it is not there.
+        """
         value = self._schema.get("format", None)
         if value is None:
             return
         if not isinstance(value, basestring):
             raise SchemaError(
                 "format value {0!r} is not a string".format(value))
-        if value in [
-            'date-time',
-            'regex',
-        ]:
-            return value
-        raise NotImplementedError(
-            "format value {0!r} is not supported".format(value))
+        return value
 
-    @property
+    @_keyword
     def contentEncoding(self):
         value = self._schema.get("contentEncoding", None)
         if value is None:
@@ -370,7 +523,7 @@ class Schema(object):
                     value))
         return value
 
-    @property
+    @_keyword
     def divisibleBy(self):
         """Integer that divides the object without reminder."""
         value = self._schema.get("divisibleBy", 1)
@@ -386,7 +539,7 @@ class Schema(object):
                 " negative".format(value))
         return value
 
-    @property
+    @_keyword
     def disallow(self):
         """
         Description of disallowed objects.
@@ -426,9 +579,57 @@ class Schema(object):
                         " name".format(js_disallow))
         return disallow_list
 
-    @property
+    @_keyword
+    def ref(self):
+        """
+        URI of the schema that replaces this one (the ``$ref`` keyword).
+
+        The URI is resolved against the ``id`` of the enclosing schemas, see
+        :mod:`json_schema_validator.registry`.
+        """
+        value = self._schema.get("$ref", None)
+        if value is None:
+            return
+        if not isinstance(value, basestring):
+            raise SchemaError(
+                "$ref value {0!r} is not a string".format(value))
+        return value
+
+    @_keyword
+    def id(self):
+        """
+        URI of this schema.
+
+        Relative URIs are resolved against the ``id`` of the enclosing
+        schemas.
+        """
+        value = self._schema.get("id", None)
+        if value is None:
+            return
+        if not isinstance(value, basestring):
+            raise SchemaError(
+                "id value {0!r} is not a string".format(value))
+        return value
+
+    @_keyword
     def extends(self):
-        raise NotImplementedError("extends property is not supported")
+        """
+        Schema, or list of schemas, that a valid object must match as well.
+
+        The constraints of this schema and the extended schemas are all
+        applied to the object.
+        """
+        value = self._schema.get("extends", None)
+        if value is None:
+            return
+        if isinstance(value, dict):
+            return value
+        if not isinstance(value, list) or not all(
+                isinstance(base, dict) for base in value):
+            raise SchemaError(
+                "extends value {0!r} is not a schema nor a list of"
+                " schemas".format(value))
+        return value
 
     @property
     def default(self):
@@ -437,3 +638,150 @@ class Schema(object):
             return self._schema["default"]
         except KeyError:
             raise SchemaError("There is no schema default for this item")
+
+
+# Fields of SchemaNode, one for each keyword
+_NODE_FIELDS = Schema._CHECKED_KEYWORDS + (
+    "minimumCanEqual", "maximumCanEqual")
+
+
+class SchemaNode(Schema):
+    """
+    Compact, immutable and checked schema.
+
+    The schema is checked once (see :meth:`Schema.check`) when the node is
+    created. Each keyword that is present in the schema is then stored in a
+    slot, a node has no instance dictionary, so reading a keyword is a plain
+    attribute access. Keywords that have their default values are not stored
+    at all, they are read from the class of the node. Nested schemas are
+    built as nodes as well. Nodes can be used anywhere a :class:`Schema` is
+    expected and are cheap to keep around in large numbers.
+
+        >>> node = SchemaNode({"type": "string", "maxLength": 5})
+        >>> node.maxLength
+        5
+        >>> node.minLength
+        0
+        >>> node.maxLength = 6
+        Traceback (most recent call last):
+        ...
+        AttributeError: SchemaNode is immutable
+
+    Keywords have the same values as the corresponding :class:`Schema`
+    properties. The only exception is that ``minimumCanEqual`` (or
+    ``maximumCanEqual``) is None, rather than an error, when there is no
+    ``minimum`` (or ``maximum``).
+
+    A node refers to the JSON object it was made from and the JSON object
+    must not be modified after the node is created. A node for a schema with
+    fifty properties of two keywords each takes about 8KB on top of the 13KB
+    of the JSON object. That is an eighth of a checked :class:`Schema`, but
+    more than an unchecked one, which only refers to the JSON object and
+    checks each keyword every time it is read.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, json_obj, schema_expr="schema"):
+        """
+        Create a node from a schema representation.
+
+        :param json_obj:
+            A JSON object (python dictionary) describing the schema.
+        :param schema_expr:
+            Expression that describes this schema in error messages
+        :raises `json_schema_validator.errors.SchemaError`:
+            If there is a problem with the schema, see :meth:`Schema.check`
+        """
+        schema = Schema(json_obj)
+        schema.check(schema_expr)
+        return cls._from_checked(schema)
+
+    def __init__(self, json_obj, schema_expr="schema"):
+        """Do nothing, nodes are built by :meth:`__new__`."""
+
+    @classmethod
+    def _from_checked(cls, schema):
+        values = schema._values
+        fields = [
+            (name, values.get(name)) for name in _NODE_FIELDS
+            if not _is_node_default(name, values.get(name))]
+        self = object.__new__(_get_node_class(frozenset(
+            name for name, value in fields)))
+        set_field = super(SchemaNode, self).__setattr__
+        set_field("_schema", schema._schema)
+        set_field("_values", None)
+        set_field("_layout", None)
+        for name, value in fields:
+            set_field(name, value)
+        if schema._children:
+            set_field("_children", dict(
+                (key, SchemaNode._from_checked(child))
+                for key, child in schema._children.items()))
+        else:
+            set_field("_children", _NO_CHILDREN)
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SchemaNode is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("SchemaNode is immutable")
+
+    def __reduce__(self):
+        return (SchemaNode, (self._schema, ))
+
+    def __repr__(self):
+        return "SchemaNode({0!r})".format(self._schema)
+
+    def check(self, schema_expr="schema"):
+        """Do nothing, nodes are checked when they are created."""
+
+
+def _get_node_defaults():
+    schema = Schema({})
+    schema.check()
+    return dict((name, schema._values.get(name)) for name in _NODE_FIELDS)
+
+
+# Keyword values of the empty schema, shared by all nodes
+_NODE_DEFAULTS = _get_node_defaults()
+
+# Children of nodes without nested schemas, never modified
+_NO_CHILDREN = {}
+
+# frozenset of the names of stored keywords -> subclass of SchemaNode
+_node_classes = {}
+
+
+def _is_node_default(name, value):
+    default = _NODE_DEFAULTS[name]
+    return value is default or (
+        type(value) is type(default) and value == default)
+
+
+def _get_node_class(names):
+    """
+    Get the class of nodes that store the given keywords.
+
+    There is one class for each combination of keywords in use. It has a
+    slot for each of the keywords and a class attribute with the default
+    value for each of the other ones.
+    """
+    try:
+        return _node_classes[names]
+    except KeyError:
+        pass
+    namespace = dict(
+        (name, default) for name, default in _NODE_DEFAULTS.items()
+        if name not in names)
+    namespace["__slots__"] = tuple(
+        name for name in _NODE_FIELDS if name in names)
+    return _node_classes.setdefault(
+        names, type("SchemaNode", (SchemaNode, ), namespace))
+
+
+def _raise_with_path(exc, schema_expr):
+    error = SchemaError("{0}: {1}".format(schema_expr, exc))
+    error.schema_expr = schema_expr
+    raise error
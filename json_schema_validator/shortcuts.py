@@ -19,12 +19,17 @@
 
 """One liners that make the code shorter."""
 
+import codecs
+import mmap
+import os
+
 try:
     import simplejson as json
 except ImportError:
     import json
 
 from json_schema_validator.schema import Schema
+from json_schema_validator.streaming import iter_stream_errors
 from json_schema_validator.validator import Validator
 
 _default_deserializer = json.loads
@@ -64,3 +69,105 @@ def validate(schema_text, data_text, deserializer=_default_deserializer):
     schema = Schema(deserializer(schema_text))
     data = deserializer(data_text)
     return Validator.validate(schema, data)
+
+
+class _MappedTextReader(object):
+    """
+    Minimal text file object that decodes UTF-8 from a memory map.
+
+    Only the requested slice of the map is copied at a time, the rest of the
+    file stays in the page cache.
+    """
+
+    def __init__(self, mapped):
+        self._mapped = mapped
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def read(self, size):
+        while True:
+            data = self._mapped.read(size)
+            text = self._decoder.decode(data, not data)
+            # A slice can end in the middle of a multi-byte character, keep
+            # reading so that '' is only returned at the end of the file.
+            if text or not data:
+                return text
+
+
+def validate_file(schema, path, mode="document",
+                  deserializer=_default_deserializer):
+    """
+    Validate the JSON file at the specified path with specified schema.
+
+    The file is memory-mapped instead of being read into memory first. The
+    pages of the file are backed by the page cache and are never copied to
+    an intermediate byte string.
+
+    :param schema:
+        Schema to check against
+    :type schema:
+        :class:`json_schema_validator.schema.Schema`
+    :param path:
+        Path of the file to check
+    :param mode:
+        How to interpret the file:
+
+        ``"document"``
+            The file is one JSON document that is checked against the
+            schema. It is decoded straight from the map into one string.
+        ``"array"``
+            The file is one JSON array. Each element is decoded and checked
+            against the ``items`` schema in turn, see
+            :func:`json_schema_validator.streaming.iter_stream_errors`.
+            Memory usage does not depend on the size of the file.
+        ``"ndjson"``
+            The file is newline-delimited JSON. Each record is checked
+            against the ``items`` schema, as in ``"array"`` mode.
+    :param deserializer:
+        Function to convert the document, or each line in ``"ndjson"``
+        mode, to a JSON object. It is not used in ``"array"`` mode.
+    :returns:
+        True on success
+    :raises `json_schema_validator.errors.ValidationError`:
+        for the first problem found in the file
+    :raises ValueError:
+        if the file is not valid JSON
+    """
+    if mode not in ("document", "array", "ndjson"):
+        raise ValueError(
+            "mode value {0!r} is not one of 'document', 'array'"
+            " or 'ndjson'".format(mode))
+    with open(path, "rb") as stream:
+        if os.fstat(stream.fileno()).st_size == 0:
+            # Empty files cannot be mapped
+            mapped = None
+        else:
+            mapped = mmap.mmap(
+                stream.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return _validate_mapped(schema, mapped, mode, deserializer)
+        finally:
+            if mapped is not None:
+                mapped.close()
+
+
+def _validate_mapped(schema, mapped, mode, deserializer):
+    if mode == "document":
+        if mapped is None:
+            text = u""
+        else:
+            text, consumed = codecs.utf_8_decode(mapped, "strict", True)
+        return Validator.validate(schema, deserializer(text))
+    if mode == "array":
+        if mapped is None:
+            raise ValueError("Expecting a JSON array")
+        errors = iter_stream_errors(schema, _MappedTextReader(mapped))
+    else:
+        if mapped is None:
+            lines = iter(())
+        else:
+            lines = iter(mapped.readline, b"")
+        errors = iter_stream_errors(
+            schema, lines, ndjson=True, deserializer=deserializer)
+    for error in errors:
+        raise error
+    return True
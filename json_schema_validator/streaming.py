@@ -0,0 +1,277 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Validation of huge JSON arrays and newline-delimited JSON.
+
+:func:`json_schema_validator.shortcuts.validate` needs the whole document in
+memory before anything is checked. The functions in this module read from a
+file object instead, decode one element at a time and check each element
+against the ``items`` schema as soon as it is decoded. Memory usage is bound
+by the size of the largest element, not by the size of the input.
+
+Two input formats are supported: a single top-level JSON array and
+newline-delimited JSON (one JSON value per line).
+
+    >>> import io
+    >>> from json_schema_validator.schema import Schema
+    >>> schema = Schema({"items": {"type": "number"}})
+    >>> validate_stream(schema, io.StringIO(u'[1, 2, 3]'))
+    True
+
+Keywords that describe the array as a whole (such as ``minItems`` or
+``uniqueItems``) are not checked. The enclosing array is never materialized
+so an element cannot use ``requires``.
+"""
+
+import re
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from json_schema_validator.compiler import CompiledValidator
+from json_schema_validator.registry import _get_root_registry
+from json_schema_validator.schema import Schema
+from json_schema_validator.validator import Validator
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER_TAIL = frozenset('0123456789.eE+-')
+# Length of the longest token that the decoder reports at its start when it
+# is cut short, such as "-Infinity" or an escaped surrogate pair
+_LONGEST_TOKEN = 12
+
+
+class _StreamBuffer(object):
+    """Buffer with the part of the stream that was read but not decoded."""
+
+    def __init__(self, stream, bufsize):
+        self._stream = stream
+        self._bufsize = bufsize
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        # Position of the start of the buffer in the stream: characters,
+        # line (from 1) and column (from 0)
+        self._offset = 0
+        self._lineno = 1
+        self._colno = 0
+
+    def _read_more(self):
+        # Read at least as much as is pending so that re-decoding a large
+        # element does not become quadratic.
+        pending = len(self._buf) - self._pos
+        data = self._stream.read(max(self._bufsize, pending))
+        if not data:
+            self._eof = True
+        newlines = self._buf.count("\n", 0, self._pos)
+        if newlines:
+            self._lineno += newlines
+            self._colno = self._pos - self._buf.rfind("\n", 0, self._pos) - 1
+        else:
+            self._colno += self._pos
+        self._offset += self._pos
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+
+    def _is_truncated(self, exc):
+        """Check if a decoding error may go away once more data is read."""
+        pos = getattr(exc, "pos", None)
+        if pos is None:
+            # No position to go by
+            return True
+        # An incomplete token at the end of the buffer, or a string that
+        # does not end in the buffer, which is reported at its start
+        return (len(self._buf) - pos <= _LONGEST_TOKEN or
+                exc.msg.startswith("Unterminated string"))
+
+    def _locate(self, exc):
+        """Make the position of a decoding error relative to the stream."""
+        pos = getattr(exc, "pos", None)
+        if pos is None:
+            return exc
+        lineno = self._lineno + self._buf.count("\n", 0, pos)
+        if lineno == self._lineno:
+            colno = self._colno + pos + 1
+        else:
+            colno = pos - self._buf.rfind("\n", 0, pos)
+        exc.pos = self._offset + pos
+        exc.lineno = lineno
+        exc.colno = colno
+        exc.args = ("{0}: line {1} column {2} (char {3})".format(
+            exc.msg, lineno, colno, exc.pos), )
+        return exc
+
+    def peek(self):
+        """Skip whitespace and return the next character or '' at the end."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if self._eof:
+                return ''
+            self._read_more()
+
+    def advance(self):
+        """Consume the character returned by peek()."""
+        self._pos += 1
+
+    def decode(self, decoder):
+        """Decode the JSON value that starts at the next non-whitespace."""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self._buf, self._pos)
+            except ValueError as exc:
+                if self._eof or not self._is_truncated(exc):
+                    raise self._locate(exc)
+                self._read_more()
+                continue
+            if not self._eof and (
+                    end == len(self._buf) or
+                    self._buf[end] in _NUMBER_TAIL):
+                # A number might continue in the data that was not read yet,
+                # for example "12" followed by ".5" in the next read.
+                self._read_more()
+                continue
+            self._pos = end
+            return value
+
+
+def iter_array(stream, decoder=None, bufsize=65536):
+    """
+    Decode elements of the top-level JSON array read from stream.
+
+    :param stream:
+        Text file object
+    :param decoder:
+        :class:`json.JSONDecoder` instance used to decode each element
+    :param bufsize:
+        Amount of text to read at a time
+    :returns:
+        Iterator of decoded elements
+    :raises ValueError:
+        if the text is not a JSON array
+    """
+    if decoder is None:
+        decoder = json.JSONDecoder()
+    buf = _StreamBuffer(stream, bufsize)
+    if buf.peek() != '[':
+        raise ValueError("Expecting a JSON array")
+    buf.advance()
+    if buf.peek() == ']':
+        buf.advance()
+    else:
+        while True:
+            yield buf.decode(decoder)
+            char = buf.peek()
+            buf.advance()
+            if char == ']':
+                break
+            if char != ',':
+                raise ValueError("Expecting ',' or ']' after array element")
+    if buf.peek() != '':
+        raise ValueError("Extra data after the JSON array")
+
+
+def iter_ndjson(stream, deserializer=json.loads):
+    """
+    Decode newline-delimited JSON read from stream.
+
+    Empty lines are ignored.
+
+    :param stream:
+        Text file object
+    :param deserializer:
+        Function to convert each line to a JSON object
+    :returns:
+        Iterator of decoded records
+    """
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield deserializer(line)
+
+
+def _compile_items(schema):
+    if not isinstance(schema, Schema):
+        raise ValueError(
+            "schema value {0!r} is not a Schema"
+            " object".format(schema))
+    items = schema.items
+    if not isinstance(items, dict):
+        raise NotImplementedError(
+            "streaming validation requires items to be a single schema")
+    # References in items are resolved within the whole schema, as they are
+    # when the array is validated at once
+    return CompiledValidator(
+        Schema(items), "schema.items", Validator.format_registry,
+        _get_root_registry(schema, Validator.schema_registry))
+
+
+def iter_stream_errors(schema, stream, ndjson=False,
+                       deserializer=json.loads):
+    """
+    Validate each element read from stream and report invalid ones.
+
+    :param schema:
+        Schema of the whole array, each element is checked against the
+        ``items`` schema
+    :type schema:
+        :class:`json_schema_validator.schema.Schema`
+    :param stream:
+        Text file object with a JSON array or newline-delimited JSON
+    :param ndjson:
+        True if the stream contains newline-delimited JSON
+    :param deserializer:
+        Function to convert each line of newline-delimited JSON to a JSON
+        object
+    :returns:
+        Iterator of :class:`json_schema_validator.errors.ValidationError`,
+        the first problem of each invalid element. The object_expr of each
+        error starts with ``object[index]``.
+    :raises ValueError:
+        if the stream is not valid JSON
+    """
+    validator = _compile_items(schema)
+    if ndjson:
+        items = iter_ndjson(stream, deserializer)
+    else:
+        items = iter_array(stream)
+    for index, item in enumerate(items):
+        error = validator.first_error(item, "object[%d]" % index)
+        if error is not None:
+            yield error
+
+
+def validate_stream(schema, stream, ndjson=False):
+    """
+    Validate each element read from stream.
+
+    Arguments are the same as for :func:`iter_stream_errors`.
+
+    :returns:
+        True on success
+    :raises `json_schema_validator.errors.ValidationError`:
+        for the first element that does not match the schema.
+    """
+    for error in iter_stream_errors(schema, stream, ndjson):
+        raise error
+    return True
@@ -28,19 +28,38 @@ import unittest
 def app_modules():
     return [
         'json_schema_validator',
+        'json_schema_validator.bench',
+        'json_schema_validator.compiler',
         'json_schema_validator.errors',
         'json_schema_validator.extensions',
+        'json_schema_validator.formats',
         'json_schema_validator.misc',
+        'json_schema_validator.parallel',
+        'json_schema_validator.profiling',
+        'json_schema_validator.registry',
+        'json_schema_validator.router',
         'json_schema_validator.schema',
         'json_schema_validator.shortcuts',
+        'json_schema_validator.streaming',
         'json_schema_validator.validator',
     ]
 
 
 def test_modules():
     return [
+        'json_schema_validator.tests.test_bench',
+        'json_schema_validator.tests.test_compiler',
+        'json_schema_validator.tests.test_errors',
         'json_schema_validator.tests.test_extensions',
+        'json_schema_validator.tests.test_formats',
+        'json_schema_validator.tests.test_misc',
+        'json_schema_validator.tests.test_parallel',
+        'json_schema_validator.tests.test_profiling',
+        'json_schema_validator.tests.test_registry',
+        'json_schema_validator.tests.test_router',
         'json_schema_validator.tests.test_schema',
+        'json_schema_validator.tests.test_shortcuts',
+        'json_schema_validator.tests.test_streaming',
         'json_schema_validator.tests.test_validator',
     ]
 
@@ -0,0 +1,67 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Unit tests for the benchmark suite
+"""
+
+import json
+
+from testscenarios import TestWithScenarios
+from testtools import TestCase
+
+from json_schema_validator.bench import (
+    BENCHMARKS,
+    VALIDATORS,
+    _format_json,
+    count_nodes,
+    run_benchmark,
+)
+
+
+class BenchmarkTests(TestWithScenarios, TestCase):
+
+    scenarios = [
+        ("{0}_{1}".format(benchmark, validator),
+         {"benchmark": benchmark, "validator": validator})
+        for benchmark in BENCHMARKS
+        for validator in VALIDATORS
+    ]
+
+    def test_benchmark_runs(self):
+        # Benchmark documents are valid, otherwise this raises
+        result = run_benchmark(
+            self.benchmark, self.validator, size=2, repeat=1)
+        self.assertEqual(result["benchmark"], self.benchmark)
+        self.assertEqual(result["validator"], self.validator)
+        self.assertTrue(result["nodes"] >= result["documents"] > 0)
+
+
+class BenchmarkReportTests(TestCase):
+
+    def test_count_nodes(self):
+        self.assertEqual(count_nodes({"a": [1, 2], "b": None}), 5)
+
+    def test_json_format(self):
+        results = [run_benchmark("enums", "compiled", size=1, repeat=1)]
+        data = json.loads(_format_json(results))
+        self.assertEqual(data["results"][0]["benchmark"], "enums")
+        self.assertIn("ns_per_node", data["results"][0])
+        self.assertIn("docs_per_sec", data["results"][0])
+        self.assertIn("peak_memory", data["results"][0])
@@ -0,0 +1,316 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Unit tests for the schema compiler
+"""
+
+import json
+import sys
+
+from testscenarios import TestWithScenarios
+from testtools import TestCase
+
+from json_schema_validator.compiler import (
+    CompiledValidator,
+    compile,
+    type_predicate,
+)
+from json_schema_validator.errors import SchemaError, ValidationError
+from json_schema_validator.formats import FormatRegistry
+from json_schema_validator.schema import Schema
+from json_schema_validator.tests import test_validator
+from json_schema_validator.validator import Validator
+
+PY2 = sys.version_info[0] == 2
+
+if PY2:
+    import yaml
+    deserializer = yaml.safe_load
+else:
+    deserializer = json.loads
+
+
+def validate(schema_text, data_text):
+    schema = Schema(deserializer(schema_text))
+    data = deserializer(data_text)
+    return compile(schema).validate(data)
+
+
+class CompiledValidatorFailureTests(TestWithScenarios, TestCase):
+
+    scenarios = test_validator.ValidatorFailureTests.scenarios
+
+    def test_validation_error_has_proper_message(self):
+        ex = self.assertRaises(ValidationError,
+                               validate, self.schema, self.data)
+        self.assertEqual(ex.message, self.raises.message)
+
+    def test_validation_error_has_proper_new_message(self):
+        ex = self.assertRaises(ValidationError,
+                               validate, self.schema, self.data)
+        self.assertEqual(ex.new_message, self.raises.new_message)
+
+    def test_validation_error_has_proper_object_expr(self):
+        ex = self.assertRaises(ValidationError,
+                               validate, self.schema, self.data)
+        self.assertEqual(ex.object_expr, self.object_expr)
+
+    def test_validation_error_has_proper_schema_expr(self):
+        ex = self.assertRaises(ValidationError,
+                               validate, self.schema, self.data)
+        self.assertEqual(ex.schema_expr, self.schema_expr)
+
+    def test_first_error_is_returned(self):
+        validator = compile(Schema(deserializer(self.schema)))
+        error = validator.first_error(deserializer(self.data))
+        self.assertEqual(error.message, self.raises.message)
+        self.assertEqual(error.object_expr, self.object_expr)
+        self.assertEqual(error.schema_expr, self.schema_expr)
+
+    def test_is_valid_is_false(self):
+        validator = compile(Schema(deserializer(self.schema)))
+        self.assertFalse(validator.is_valid(deserializer(self.data)))
+
+
+class CompiledValidatorSuccessTests(TestWithScenarios, TestCase):
+
+    scenarios = test_validator.ValidatorSuccessTests.scenarios
+
+    def test_validator_does_not_raise_an_exception(self):
+        self.assertEqual(
+            True, validate(self.schema, self.data))
+
+    def test_is_valid_is_true(self):
+        validator = compile(Schema(deserializer(self.schema)))
+        self.assertTrue(validator.is_valid(deserializer(self.data)))
+        self.assertEqual(
+            validator.first_error(deserializer(self.data)), None)
+
+
+class CompileTests(TestCase):
+
+    def test_compile_returns_compiled_validator(self):
+        validator = compile(Schema({}))
+        self.assertIsInstance(validator, CompiledValidator)
+
+    def test_compile_rejects_non_schema(self):
+        self.assertRaises(ValueError, compile, {})
+
+    def test_compile_checks_schema_up_front(self):
+        self.assertRaises(SchemaError, compile, Schema({"type": 5}))
+
+    def test_compile_checks_nested_schema_up_front(self):
+        schema = Schema({"properties": {"foo": {"optional": "yes"}}})
+        self.assertRaises(SchemaError, compile, schema)
+
+    def test_compile_reports_unsupported_keywords(self):
+        self.assertRaises(
+            NotImplementedError, compile, Schema({"divisibleBy": 2}))
+
+    def test_compile_reports_unknown_formats(self):
+        self.assertRaises(
+            NotImplementedError, compile, Schema({"format": "x-custom"}))
+
+    def test_compile_with_format_registry(self):
+        registry = FormatRegistry()
+        registry.register("even", lambda obj: obj % 2 == 0, "an even number")
+        validator = compile(Schema({"format": "even"}), registry)
+        self.assertTrue(validator.validate(4))
+        ex = self.assertRaises(ValidationError, validator.validate, 5)
+        self.assertEqual(ex.message, "5 is not an even number")
+        self.assertEqual(ex.new_message, "Object is not an even number")
+        self.assertEqual(ex.schema_expr, "schema.format")
+
+    def test_compile_resolves_formats_once(self):
+        registry = FormatRegistry()
+        registry.register("even", lambda obj: obj % 2 == 0)
+        validator = compile(Schema({"format": "even"}), registry)
+        registry.unregister("even")
+        self.assertTrue(validator.is_valid(2))
+
+    def test_compiled_validator_is_reusable(self):
+        validator = compile(Schema({"items": {"type": "number"}}))
+        self.assertTrue(validator.validate([1, 2, 3]))
+        self.assertRaises(ValidationError, validator.validate, [1, "2"])
+        self.assertTrue(validator.validate([4, 5]))
+
+
+class TypePredicateTests(TestWithScenarios, TestCase):
+
+    scenarios = [
+        ('string', {'types': ['string'], 'good': ["", u"a"],
+                    'bad': [1, None, True, [], {}]}),
+        ('boolean', {'types': ['boolean'], 'good': [True, False],
+                     'bad': [0, 1, None, ""]}),
+        ('null', {'types': ['null'], 'good': [None],
+                  'bad': [0, False, "", []]}),
+        ('number_or_boolean', {'types': ['number', 'boolean'],
+                               'good': [1, 1.5, True], 'bad': ["1", None]}),
+        ('object_or_array', {'types': ['object', 'array'],
+                             'good': [{}, []], 'bad': [1, "", None]}),
+        ('any', {'types': ['string', 'any'], 'good': [1, None, {}],
+                 'bad': []}),
+    ]
+
+    def test_predicate(self):
+        has_type = type_predicate(self.types)
+        for obj in self.good:
+            self.assertTrue(has_type(obj), obj)
+        for obj in self.bad:
+            self.assertFalse(has_type(obj), obj)
+
+
+class CompiledUnionTypeTests(TestCase):
+
+    schema = Schema({"type": [
+        {"type": "object", "properties": {"x": {"type": "number"}}},
+        "null",
+        ["string", "boolean"],
+    ]})
+
+    def test_simple_types_match(self):
+        validator = compile(self.schema)
+        self.assertTrue(validator.validate(None))
+        self.assertTrue(validator.validate({"x": 1}))
+
+    def test_nested_union_matches(self):
+        validator = compile(self.schema)
+        self.assertTrue(validator.validate("a"))
+        self.assertTrue(validator.validate(False))
+
+    def test_mismatch(self):
+        validator = compile(self.schema)
+        ex = self.assertRaises(
+            ValidationError, validator.validate, {"x": "1"})
+        self.assertEqual(ex.schema_expr, "schema.type")
+        self.assertEqual(
+            ex.new_message,
+            "Object has incorrect type (multiple types possible)")
+
+
+class CompiledExtendsTests(TestCase):
+
+    def _chain(self, depth):
+        # Each level adds a property and repeats the type of the base
+        schema = {"type": "object", "properties": {"p0": {"type": "integer"}}}
+        for level in range(1, depth):
+            schema = {
+                "type": "object",
+                "properties": {"p%d" % level: {"type": "integer"}},
+                "extends": schema,
+            }
+        return Schema(schema)
+
+    def test_inheritance_chain(self):
+        schema = self._chain(50)
+        validator = compile(schema)
+        obj = dict(("p%d" % level, level) for level in range(50))
+        self.assertTrue(validator.validate(obj))
+        obj["p0"] = "0"
+        self.assertFalse(validator.is_valid(obj))
+        error = validator.first_error(obj)
+        self.assertEqual(error.object_expr, "object.p0")
+        self.assertEqual(
+            error.schema_expr, "schema" + ".extends" * 49 +
+            ".properties.p0.type")
+        self.assertEqual(
+            error.schema_expr,
+            next(Validator.iter_errors(schema, obj)).schema_expr)
+
+    def test_merged_property_uses_all_levels(self):
+        validator = compile(Schema({
+            "properties": {"a": {"minimum": 0, "optional": True}},
+            "extends": [
+                {"properties": {"a": {"maximum": 10, "optional": True}}},
+                {"properties": {"a": {"type": "integer"}}},
+            ]}))
+        self.assertTrue(validator.is_valid({"a": 5}))
+        self.assertFalse(validator.is_valid({"a": -1}))
+        self.assertFalse(validator.is_valid({"a": 11}))
+        self.assertFalse(validator.is_valid({"a": 5.5}))
+        self.assertFalse(validator.is_valid({}))
+
+    def test_additional_properties_of_base(self):
+        # The base does not allow properties it does not describe
+        schema = Schema({
+            "properties": {"b": {"optional": True}},
+            "extends": {
+                "properties": {"a": {}}, "additionalProperties": False}})
+        validator = compile(schema)
+        self.assertTrue(validator.is_valid({"a": 1}))
+        self.assertFalse(validator.is_valid({"a": 1, "b": 2}))
+        self.assertEqual(
+            validator.first_error({"a": 1, "b": 2}).schema_expr,
+            "schema.extends.additionalProperties")
+
+    def test_diamond(self):
+        schema = Schema({
+            "extends": [
+                {"extends": {"$ref": "#/definitions/base"}, "minLength": 1},
+                {"extends": {"$ref": "#/definitions/base"}, "maxLength": 3},
+            ],
+            "definitions": {"base": {"type": "string"}}})
+        validator = compile(schema)
+        self.assertTrue(validator.is_valid("ab"))
+        self.assertFalse(validator.is_valid(""))
+        self.assertFalse(validator.is_valid("abcd"))
+        self.assertFalse(validator.is_valid(1))
+
+    def test_base_containing_the_schema(self):
+        # The base is the root, which contains the extending schema again
+        schema = Schema({
+            "type": "object",
+            "properties": {"child": {
+                "optional": True,
+                "extends": {"$ref": "#"},
+                "properties": {
+                    "extra": {"type": "string", "optional": True}}}}})
+        validator = compile(schema)
+        obj = {"child": {"extra": "a", "child": {"extra": 1}}}
+        self.assertTrue(validator.is_valid({"child": {"child": {}}}))
+        self.assertFalse(validator.is_valid({"child": 1}))
+        self.assertFalse(validator.is_valid(obj))
+        self.assertEqual(
+            validator.first_error(obj).schema_expr,
+            next(Validator.iter_errors(schema, obj)).schema_expr)
+        self.assertEqual(
+            [result.valid for result in Validator.validate_many(
+                schema, [{"child": {}}, obj])],
+            [True, False])
+
+    def test_property_of_several_levels_containing_the_schema(self):
+        schema = Schema({
+            "extends": {
+                "properties": {"child": {"type": "object", "optional": True}}},
+            "properties": {"child": {"$ref": "#", "optional": True}}})
+        validator = compile(schema)
+        self.assertTrue(validator.is_valid({"child": {"child": {}}}))
+        self.assertFalse(validator.is_valid({"child": 1}))
+        obj = {"child": {"child": 2}}
+        self.assertFalse(validator.is_valid(obj))
+        self.assertEqual(
+            validator.first_error(obj).schema_expr,
+            next(Validator.iter_errors(schema, obj)).schema_expr)
+        self.assertTrue(Validator.is_valid(schema, {"child": {"child": {}}}))
+
+    def test_schema_extending_itself(self):
+        schema = Schema({"extends": {"$ref": "#"}})
+        ex = self.assertRaises(SchemaError, compile, schema)
+        self.assertEqual(str(ex), "schema.extends: schema extends itself")
@@ -0,0 +1,67 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Unit tests for error classes
+"""
+
+import pickle
+
+from testtools import TestCase
+
+from json_schema_validator.errors import ValidationError
+
+
+class ValidationErrorTests(TestCase):
+
+    def test_plain_attributes(self):
+        error = ValidationError("message", "new", "object", "schema")
+        self.assertEqual(error.message, "message")
+        self.assertEqual(error.new_message, "new")
+        self.assertEqual(error.object_expr, "object")
+        self.assertEqual(error.schema_expr, "schema")
+
+    def test_deferred_attributes_are_computed_once(self):
+        calls = []
+
+        def make_message():
+            calls.append(None)
+            return "message"
+        error = ValidationError(
+            make_message, "new", lambda: "object", lambda: "schema")
+        self.assertEqual(calls, [])
+        self.assertEqual(error.message, "message")
+        self.assertEqual(error.message, "message")
+        self.assertEqual(calls, [None])
+        self.assertEqual(error.object_expr, "object")
+        self.assertEqual(error.schema_expr, "schema")
+
+    def test_attributes_can_be_assigned(self):
+        error = ValidationError(lambda: "message")
+        error.message = "other"
+        self.assertEqual(error.message, "other")
+
+    def test_pickle_uses_computed_values(self):
+        error = ValidationError(
+            lambda: "message", "new", lambda: "object", lambda: "schema")
+        error = pickle.loads(pickle.dumps(error))
+        self.assertEqual(error.message, "message")
+        self.assertEqual(error.new_message, "new")
+        self.assertEqual(error.object_expr, "object")
+        self.assertEqual(error.schema_expr, "schema")
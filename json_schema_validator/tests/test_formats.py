@@ -0,0 +1,135 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Unit tests for format checkers
+"""
+
+from testscenarios import TestWithScenarios
+from testtools import TestCase
+
+from json_schema_validator.formats import (
+    FormatChecker,
+    FormatRegistry,
+    format_registry,
+)
+
+
+class BuiltinFormatTests(TestWithScenarios, TestCase):
+
+    scenarios = [
+        ('date_time', {'format': 'date-time', 'valid': [
+            '2010-11-12T14:38:55Z'], 'invalid': [
+            '2010-11-12 14:38:55', '2010-11-31T14:38:55Z', None]}),
+        ('regex', {'format': 'regex', 'valid': ['^a+$', ''], 'invalid': [
+            '(', '[a-', 5]}),
+        ('date', {'format': 'date', 'valid': [
+            '2012-02-29', '0001-01-01'], 'invalid': [
+            '2013-02-29', '2012-2-1', '2012-02-01T00:00:00Z', 20120201]}),
+        ('time', {'format': 'time', 'valid': [
+            '00:00:00', '23:59:59'], 'invalid': [
+            '24:00:00', '12:60:00', '1:00:00', '12:00', None]}),
+        ('utc_millisec', {'format': 'utc-millisec', 'valid': [
+            1291766398000, 0, 1.5], 'invalid': ['1291766398000', True]}),
+        ('ip_address', {'format': 'ip-address', 'valid': [
+            '127.0.0.1', '255.255.255.255', '0.0.0.0'], 'invalid': [
+            '256.0.0.1', '1.2.3', '1.2.3.4.5', '01.2.3.4', ' 1.2.3.4',
+            '1.2.3.4\n', 1234]}),
+        ('ipv6', {'format': 'ipv6', 'valid': [
+            '::', '::1', '1::', 'fe80::1:2', '2001:db8:0:0:0:0:2:1',
+            '::ffff:192.168.0.1', '1:2:3:4:5:6:1.2.3.4'], 'invalid': [
+            '1:2:3:4:5:6:7:8:9', '1::2::3', '12345::', 'g::', ':1',
+            '1:2:3:4:5:6:7::8', '::1.2.3.256', '1.2.3.4', '', None]}),
+        ('host_name', {'format': 'host-name', 'valid': [
+            'localhost', 'example.com', 'a-b.example.com', 'x' * 63],
+            'invalid': [
+            '', '-a.example.com', 'a-.example.com', 'a..b', 'x' * 64,
+            'under_score.com', None]}),
+        ('email', {'format': 'email', 'valid': [
+            'user@example.com', 'first.last+tag@mail.example.org'],
+            'invalid': ['user', '@example.com', 'user@', 'us er@example.com',
+                        'user@exa mple.com', None]}),
+        ('uri', {'format': 'uri', 'valid': [
+            'http://example.com/path?q=1#frag', 'urn:isbn:0451450523',
+            'mailto:user@example.com'], 'invalid': [
+            'example.com', '/relative/path', 'http://exa mple.com', '',
+            None]}),
+        ('uuid', {'format': 'uuid', 'valid': [
+            '123e4567-e89b-12d3-a456-426655440000'], 'invalid': [
+            '123e4567e89b12d3a456426655440000',
+            '123e4567-e89b-12d3-a456-42665544000g', None]}),
+        ('color', {'format': 'color', 'valid': [
+            'red', 'Maroon', '#f00', '#FF0000', 'rgb(255, 0, 0)',
+            'rgb(100%,0%,0%)'], 'invalid': [
+            'reddish', '#ff00', 'rgb(255, 0)', '', None]}),
+    ]
+
+    def setUp(self):
+        super(BuiltinFormatTests, self).setUp()
+        self.check = format_registry.get(self.format).check
+
+    def test_valid_values(self):
+        for value in self.valid:
+            self.assertTrue(self.check(value), value)
+
+    def test_invalid_values(self):
+        for value in self.invalid:
+            self.assertFalse(self.check(value), value)
+
+
+class FormatRegistryTests(TestCase):
+
+    def setUp(self):
+        super(FormatRegistryTests, self).setUp()
+        self.registry = FormatRegistry()
+
+    def test_register(self):
+        self.registry.register("even", lambda obj: obj % 2 == 0)
+        self.assertIn("even", self.registry)
+        self.assertEqual(self.registry.names(), ["even"])
+        self.assertTrue(self.registry.get("even").check(2))
+
+    def test_default_description(self):
+        self.registry.register("even", lambda obj: obj % 2 == 0)
+        checker = self.registry.get("even")
+        self.assertEqual(checker.new_message,
+                         "Object is not a string in even format")
+
+    def test_get_missing_format(self):
+        ex = self.assertRaises(
+            NotImplementedError, self.registry.get, "missing")
+        self.assertEqual(str(ex), "format 'missing' is not supported")
+
+    def test_unregister(self):
+        self.registry.register("even", lambda obj: obj % 2 == 0)
+        self.registry.unregister("even")
+        self.assertNotIn("even", self.registry)
+        self.assertRaises(KeyError, self.registry.unregister, "even")
+
+    def test_copy_is_independent(self):
+        registry = format_registry.copy()
+        registry.unregister("color")
+        self.assertNotIn("color", registry)
+        self.assertIn("color", format_registry)
+
+    def test_legacy_message_escapes_braces(self):
+        checker = FormatChecker("json", bool, "a string like {}")
+        self.assertEqual(
+            checker.legacy_message.format(obj="x"),
+            "'x' is not a string like {}")
@@ -0,0 +1,183 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Unit tests for miscellaneous helpers
+"""
+
+import datetime
+import re
+
+from testscenarios import TestWithScenarios
+from testtools import TestCase
+
+from json_schema_validator.misc import (
+    RegexCache,
+    find_duplicate,
+    is_date_time,
+    json_key,
+    parse_date_time,
+)
+
+
+class RegexCacheTests(TestCase):
+
+    def setUp(self):
+        super(RegexCacheTests, self).setUp()
+        self.cache = RegexCache(maxsize=2)
+
+    def test_compile_returns_compiled_expression(self):
+        regex = self.cache.compile("^a+$")
+        self.assertIsNotNone(regex.match("aaa"))
+        self.assertIsNone(regex.match("aab"))
+
+    def test_compile_counts_hits_and_misses(self):
+        self.cache.compile("a")
+        self.cache.compile("a")
+        self.cache.compile("b")
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_least_recently_used_pattern_is_evicted(self):
+        first = self.cache.compile("a")
+        self.cache.compile("b")
+        # Touch "a" so that "b" becomes the least recently used entry
+        self.cache.compile("a")
+        self.cache.compile("c")
+        self.assertEqual(len(self.cache), 2)
+        self.assertIs(self.cache.compile("a"), first)
+        misses = self.cache.misses
+        self.cache.compile("b")
+        self.assertEqual(self.cache.misses, misses + 1)
+
+    def test_shrinking_maxsize_evicts_entries(self):
+        self.cache.compile("a")
+        self.cache.compile("b")
+        self.cache.maxsize = 1
+        self.assertEqual(len(self.cache), 1)
+
+    def test_zero_maxsize_disables_caching(self):
+        self.cache.maxsize = 0
+        self.cache.compile("a")
+        self.assertEqual(len(self.cache), 0)
+
+    def test_negative_maxsize_is_rejected(self):
+        self.assertRaises(ValueError, RegexCache, -1)
+
+    def test_invalid_pattern_raises_re_error(self):
+        self.assertRaises(re.error, self.cache.compile, "(")
+        self.assertEqual(len(self.cache), 0)
+
+    def test_clear_resets_cache_and_counters(self):
+        self.cache.compile("a")
+        self.cache.compile("a")
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 0))
+
+
+class JSONKeyTests(TestCase):
+
+    def test_booleans_are_not_numbers(self):
+        self.assertNotEqual(json_key(True), json_key(1))
+        self.assertNotEqual(json_key(False), json_key(0))
+        self.assertNotEqual(json_key(False), json_key(0.0))
+
+    def test_numbers_are_compared_by_value(self):
+        self.assertEqual(json_key(1), json_key(1.0))
+
+    def test_objects_ignore_key_order(self):
+        self.assertEqual(
+            json_key({"a": 1, "b": [2]}), json_key({"b": [2], "a": 1}))
+
+    def test_nested_booleans_are_not_numbers(self):
+        self.assertNotEqual(json_key({"a": [True]}), json_key({"a": [1]}))
+
+    def test_arrays_are_ordered(self):
+        self.assertNotEqual(json_key([1, 2]), json_key([2, 1]))
+
+    def test_keys_are_hashable(self):
+        keys = set([json_key({"a": [1, None]}), json_key([{"b": "c"}])])
+        self.assertIn(json_key([{"b": "c"}]), keys)
+
+
+class FindDuplicateTests(TestCase):
+
+    def test_unique_values(self):
+        self.assertIsNone(find_duplicate([1, "1", True, None, [], {}]))
+
+    def test_empty_array(self):
+        self.assertIsNone(find_duplicate([]))
+
+    def test_first_duplicate_is_reported(self):
+        self.assertEqual(find_duplicate(["a", "b", "b", "a"]), (1, 2))
+
+    def test_repeated_objects(self):
+        self.assertEqual(
+            find_duplicate([{"a": [1]}, {"a": [2]}, {"a": [1]}]), (0, 2))
+
+
+class DateTimeTests(TestWithScenarios, TestCase):
+
+    scenarios = [
+        ('typical', {'text': '2010-11-12T14:38:55Z', 'valid': True}),
+        ('first_moment', {'text': '0001-01-01T00:00:00Z', 'valid': True}),
+        ('last_moment', {'text': '9999-12-31T23:59:59Z', 'valid': True}),
+        ('leap_year', {'text': '2012-02-29T00:00:00Z', 'valid': True}),
+        ('leap_century', {'text': '2000-02-29T00:00:00Z', 'valid': True}),
+        ('non_leap_year', {'text': '2013-02-29T00:00:00Z', 'valid': False}),
+        ('non_leap_century', {'text': '1900-02-29T00:00:00Z', 'valid': False}),
+        ('day_31_of_april', {'text': '2010-04-31T00:00:00Z', 'valid': False}),
+        ('day_zero', {'text': '2010-04-00T00:00:00Z', 'valid': False}),
+        ('month_zero', {'text': '2010-00-01T00:00:00Z', 'valid': False}),
+        ('month_13', {'text': '2010-13-01T00:00:00Z', 'valid': False}),
+        ('year_zero', {'text': '0000-01-01T00:00:00Z', 'valid': False}),
+        ('hour_24', {'text': '2010-01-01T24:00:00Z', 'valid': False}),
+        ('minute_60', {'text': '2010-01-01T00:60:00Z', 'valid': False}),
+        ('second_60', {'text': '2010-01-01T00:00:60Z', 'valid': False}),
+        ('single_digits', {'text': '2010-1-1T0:0:0Z', 'valid': False}),
+        ('no_zone', {'text': '2010-01-01T00:00:00', 'valid': False}),
+        ('lowercase', {'text': '2010-01-01t00:00:00z', 'valid': False}),
+        ('trailing_newline', {'text': '2010-01-01T00:00:00Z\n',
+                              'valid': False}),
+        ('non_ascii_digits', {'text': u'\u0662010-01-01T00:00:00Z',
+                              'valid': False}),
+        ('empty', {'text': '', 'valid': False}),
+    ]
+
+    def test_is_date_time(self):
+        self.assertEqual(is_date_time(self.text), self.valid)
+
+    def test_parse_date_time(self):
+        if self.valid:
+            self.assertEqual(
+                parse_date_time(self.text),
+                datetime.datetime.strptime(self.text, "%Y-%m-%dT%H:%M:%SZ"))
+        else:
+            self.assertRaises(ValueError, parse_date_time, self.text)
+
+
+class DateTimeTypeTests(TestCase):
+
+    def test_is_date_time_of_non_string(self):
+        self.assertFalse(is_date_time(20101112))
+        self.assertFalse(is_date_time(None))
+
+    def test_parse_date_time_of_non_string(self):
+        self.assertRaises(TypeError, parse_date_time, 20101112)
@@ -0,0 +1,103 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Unit tests for parallel validation
+"""
+
+import json
+
+from testtools import TestCase
+
+from json_schema_validator.errors import SchemaError
+from json_schema_validator.formats import FormatRegistry
+from json_schema_validator.parallel import ParallelValidator, validate_many
+from json_schema_validator.registry import SchemaRegistry
+from json_schema_validator.schema import Schema
+from json_schema_validator.validator import Validator
+
+
+def _is_even(obj):
+    return obj % 2 == 0
+
+
+class _RegistryValidator(Validator):
+
+    format_registry = FormatRegistry()
+    format_registry.register("even", _is_even)
+    schema_registry = SchemaRegistry({
+        "urn:even": {"type": "integer", "format": "even"}})
+
+
+class ParallelValidatorTests(TestCase):
+
+    schema = Schema({"items": {"type": "number"}})
+
+    def setUp(self):
+        super(ParallelValidatorTests, self).setUp()
+        self.documents = [[i] if i % 3 else [str(i)] for i in range(50)]
+
+    def test_results_are_in_order(self):
+        with ParallelValidator(
+                self.schema, max_workers=2, chunksize=4) as validator:
+            results = list(validator.validate_many(self.documents))
+        self.assertEqual(
+            [result.valid for result in results],
+            [i % 3 != 0 for i in range(50)])
+
+    def test_unordered_results_have_indices(self):
+        with ParallelValidator(
+                self.schema, max_workers=2, chunksize=4) as validator:
+            results = sorted(
+                validator.validate_many_unordered(self.documents))
+        self.assertEqual([index for index, result in results], list(range(50)))
+        self.assertEqual(
+            [result.valid for index, result in results],
+            [i % 3 != 0 for i in range(50)])
+
+    def test_errors_survive_process_boundary(self):
+        with ParallelValidator(self.schema, max_workers=1) as validator:
+            result, = validator.validate_many([[1, "2"]])
+        error, = result.errors
+        self.assertEqual(error.object_expr, "object[1]")
+        self.assertEqual(error.schema_expr, "schema.items.type")
+        self.assertEqual(error.message, "'2' does not match type 'number'")
+
+    def test_json_text_is_deserialized_by_workers(self):
+        results = list(validate_many(
+            self.schema, ['[1, 2]', '["x"]'], max_workers=1,
+            deserializer=json.loads))
+        self.assertEqual([result.valid for result in results], [True, False])
+
+    def test_schema_errors_are_reported_up_front(self):
+        self.assertRaises(
+            SchemaError, ParallelValidator, Schema({"type": 5}))
+
+    def test_workers_use_registries_of_validator_cls(self):
+        schema = Schema({"items": {"$ref": "urn:even"}})
+        documents = [[2, 4], [1], ["2"]]
+        results = list(validate_many(
+            schema, documents, max_workers=1,
+            validator_cls=_RegistryValidator))
+        self.assertEqual(
+            [result.valid for result in results],
+            [result.valid for result in _RegistryValidator.validate_many(
+                schema, documents)])
+        self.assertEqual(
+            [result.valid for result in results], [True, False, False])
@@ -0,0 +1,137 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Unit tests for the profiling validator
+"""
+
+import json
+
+from testscenarios import TestWithScenarios
+from testtools import TestCase
+
+from json_schema_validator.errors import ValidationError
+from json_schema_validator.profiling import (
+    ProfilingValidator,
+    ValidationProfile,
+)
+from json_schema_validator.schema import Schema
+from json_schema_validator.tests import test_validator
+
+
+class ProfilingValidatorFailureTests(TestWithScenarios, TestCase):
+
+    scenarios = test_validator.ValidatorFailureTests.scenarios
+
+    def test_validation_error_matches_validator(self):
+        schema = Schema(json.loads(self.schema))
+        ex = self.assertRaises(
+            ValidationError, ProfilingValidator.validate, schema,
+            json.loads(self.data))
+        self.assertEqual(ex.message, self.raises.message)
+        self.assertEqual(ex.new_message, self.raises.new_message)
+        self.assertEqual(ex.object_expr, self.object_expr)
+        self.assertEqual(ex.schema_expr, self.schema_expr)
+
+
+class ProfilingValidatorTests(TestCase):
+
+    schema = Schema({
+        "type": "object",
+        "properties": {
+            "name": {"type": "string", "pattern": "^[a-z]+$"},
+            "tags": {
+                "type": "array",
+                "items": {"type": "string", "enum": ["a", "b"]},
+            },
+            "parent": {
+                "type": "string",
+                "optional": True,
+                "requires": {"properties": {"name": {"type": "string"}}},
+            },
+        },
+    })
+
+    def test_keywords_are_counted(self):
+        profile = ProfilingValidator.profile(
+            self.schema, {"name": "x", "tags": ["a", "b", "a"]})
+        self.assertEqual(profile.keywords["properties"].calls, 1)
+        self.assertEqual(profile.keywords["items"].calls, 1)
+        # Enum is looked at for each value: the document, the name, the
+        # tags and each tag
+        self.assertEqual(profile.keywords["enum"].calls, 6)
+        self.assertEqual(profile.keywords["pattern"].calls, 4)
+        self.assertEqual(profile.errors, [])
+
+    def test_paths_are_counted(self):
+        profile = ProfilingValidator.profile(
+            self.schema, {"name": "x", "tags": ["a", "b"]})
+        self.assertIn("schema.properties.tags.items", profile.paths)
+        # Six keyword handlers apply to each of the two string tags
+        self.assertEqual(
+            profile.paths["schema.properties.tags.items"].calls, 12)
+
+    def test_requires_is_profiled_in_the_same_profile(self):
+        profile = ProfilingValidator.profile(
+            self.schema, {"name": "x", "tags": [], "parent": "y"})
+        self.assertIn(
+            "schema.properties.parent.requires.properties.name",
+            profile.paths)
+
+    def test_extends_is_profiled(self):
+        schema = Schema({"extends": {"type": "string", "maxLength": 3}})
+        profile = ProfilingValidator.profile(schema, "abcd")
+        self.assertEqual(profile.keywords["extends"].calls, 1)
+        self.assertIn("schema", profile.paths)
+        self.assertIn("schema.extends", profile.paths)
+        self.assertEqual(
+            [error.schema_expr for error in profile.errors],
+            ["schema.extends.maxLength"])
+
+    def test_errors_are_collected(self):
+        profile = ProfilingValidator.profile(
+            self.schema, {"name": "X", "tags": ["c"]})
+        self.assertEqual(
+            [error.schema_expr for error in profile.errors], [
+                "schema.properties.name.pattern",
+                "schema.properties.tags.items.enum",
+            ])
+
+    def test_callback(self):
+        calls = []
+        ProfilingValidator.profile(
+            self.schema, {"name": "x", "tags": []},
+            callback=lambda keyword, schema_expr, seconds: calls.append(
+                (keyword, schema_expr)))
+        self.assertIn(("pattern", "schema.properties.name"), calls)
+        self.assertIn(("properties", "schema"), calls)
+
+    def test_report(self):
+        profile = ValidationProfile()
+        profile.record("type", "schema", 1.0)
+        profile.record("enum", "schema.properties.a", 2.0)
+        profile.record("type", "schema.properties.a", 0.5)
+        report = profile.report()
+        self.assertEqual(
+            [(item["keyword"], item["calls"], item["seconds"])
+             for item in report["keywords"]],
+            [("enum", 1, 2.0), ("type", 2, 1.5)])
+        self.assertEqual(
+            [(item["path"], item["calls"]) for item in report["paths"]],
+            [("schema.properties.a", 2), ("schema", 1)])
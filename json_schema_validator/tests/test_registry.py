@@ -0,0 +1,257 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Unit tests for the schema registry and $ref resolution
+"""
+
+import json
+import os
+import pickle
+import shutil
+import tempfile
+
+from testtools import TestCase
+
+from json_schema_validator.compiler import compile
+from json_schema_validator.errors import SchemaError, ValidationError
+from json_schema_validator.registry import SchemaRegistry
+from json_schema_validator.schema import Schema, SchemaNode
+from json_schema_validator.validator import IterativeValidator, Validator
+
+
+class SchemaRegistryTests(TestCase):
+
+    def setUp(self):
+        super(SchemaRegistryTests, self).setUp()
+        self.registry = SchemaRegistry({
+            "http://example.com/a.json": {
+                "definitions": {
+                    "name": {"type": "string"},
+                    "pair": [{"type": "null"}, {"type": "boolean"}],
+                    "alias": {"$ref": "#/definitions/name"},
+                    "inner": {"id": "#inner", "type": "integer"},
+                    "other": {"id": "other.json", "type": "number"},
+                },
+            },
+        })
+
+    def test_get_document(self):
+        schema = self.registry.get("http://example.com/a.json")
+        self.assertIn("definitions", schema._schema)
+
+    def test_get_pointer(self):
+        schema = self.registry.get(
+            "http://example.com/a.json#/definitions/name")
+        self.assertEqual(schema.type, "string")
+
+    def test_get_pointer_into_list(self):
+        schema = self.registry.get(
+            "http://example.com/a.json#/definitions/pair/1")
+        self.assertEqual(schema.type, "boolean")
+
+    def test_get_is_cached(self):
+        uri = "http://example.com/a.json#/definitions/name"
+        self.assertIs(self.registry.get(uri), self.registry.get(uri))
+
+    def test_get_by_id(self):
+        self.assertEqual(
+            self.registry.get("http://example.com/a.json#inner").type,
+            "integer")
+        self.assertEqual(
+            self.registry.get("http://example.com/other.json").type,
+            "number")
+
+    def test_get_unknown(self):
+        ex = self.assertRaises(
+            SchemaError, self.registry.get, "http://example.com/b.json")
+        self.assertEqual(
+            str(ex), "$ref value 'http://example.com/b.json' cannot be"
+            " resolved")
+        self.assertRaises(
+            SchemaError, self.registry.get,
+            "http://example.com/a.json#/definitions/missing")
+        self.assertRaises(
+            SchemaError, self.registry.get,
+            "http://example.com/a.json#/definitions/pair/2")
+
+    def test_get_non_schema(self):
+        ex = self.assertRaises(
+            SchemaError, self.registry.get,
+            "http://example.com/a.json#/definitions/pair")
+        self.assertIn("does not refer to a schema", str(ex))
+
+    def test_resolve_follows_references(self):
+        alias = self.registry.get(
+            "http://example.com/a.json#/definitions/alias")
+        target = self.registry.resolve(alias)
+        self.assertEqual(target.type, "string")
+        self.assertIs(self.registry.resolve(alias), target)
+
+    def test_resolve_reference_cycle(self):
+        registry = SchemaRegistry({"urn:a": {
+            "a": {"$ref": "#/b"}, "b": {"$ref": "#/a"}}})
+        ex = self.assertRaises(
+            SchemaError, registry.resolve, registry.get("urn:a#/a"))
+        self.assertEqual(str(ex), "$ref value '#/b' refers to itself")
+
+    def test_add_uses_id(self):
+        registry = SchemaRegistry()
+        registry.add({"id": "http://example.com/c.json", "type": "null"})
+        self.assertEqual(
+            registry.get("http://example.com/c.json").type, "null")
+
+    def test_pickle(self):
+        registry = pickle.loads(pickle.dumps(self.registry))
+        alias = registry.get("http://example.com/a.json#/definitions/alias")
+        self.assertEqual(registry.resolve(alias).type, "string")
+        self.assertEqual(
+            registry.get("http://example.com/a.json#inner").type, "integer")
+
+    def test_add_without_uri(self):
+        self.assertRaises(ValueError, SchemaRegistry().add, {})
+
+
+class SchemaRegistryDirectoryTests(TestCase):
+
+    def setUp(self):
+        super(SchemaRegistryDirectoryTests, self).setUp()
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        os.mkdir(os.path.join(self.path, "types"))
+        self._write("event.json", {
+            "type": "object",
+            "properties": {"user": {"$ref": "types/user.json"}}})
+        self._write(os.path.join("types", "user.json"), {"type": "string"})
+        self._write("README", "not a schema")
+
+    def _write(self, name, obj):
+        with open(os.path.join(self.path, name), "w") as stream:
+            json.dump(obj, stream)
+
+    def test_load_directory(self):
+        registry = SchemaRegistry()
+        registry.load_directory(self.path, "http://example.com/schemas")
+        event = registry.get("http://example.com/schemas/event.json")
+        self.assertEqual(
+            registry.get("http://example.com/schemas/types/user.json").type,
+            "string")
+        compiled = compile(event, schema_registry=registry)
+        self.assertTrue(compiled.validate({"user": "bob"}))
+        self.assertRaises(ValidationError, compiled.validate, {"user": 1})
+
+    def test_load_directory_with_file_uris(self):
+        registry = SchemaRegistry()
+        registry.load_directory(self.path)
+        uri = "file://" + "/".join(
+            os.path.abspath(self.path).split(os.sep)) + "/event.json"
+        event = registry.get(uri)
+
+        class DirectoryValidator(Validator):
+            schema_registry = registry
+        self.assertRaises(
+            ValidationError, DirectoryValidator.validate, event, {"user": 1})
+
+
+class ReferenceValidationTests(TestCase):
+
+    registry = SchemaRegistry({
+        "http://example.com/point.json": {
+            "type": "object",
+            "properties": {"x": {"type": "number"}, "y": {"type": "number"}},
+        },
+    })
+
+    schema = Schema({
+        "id": "http://example.com/line.json",
+        "type": "array",
+        "items": {"$ref": "point.json"},
+    })
+
+    tree = {
+        "type": "object",
+        "properties": {
+            "value": {"type": "integer"},
+            "children": {
+                "type": "array", "optional": True, "items": {"$ref": "#"}},
+        },
+    }
+
+    def _validator_cls(self):
+        class PointValidator(Validator):
+            schema_registry = self.registry
+        return PointValidator
+
+    def test_validator(self):
+        cls = self._validator_cls()
+        self.assertTrue(cls.validate(self.schema, [{"x": 1, "y": 2}]))
+        ex = self.assertRaises(
+            ValidationError, cls.validate, self.schema, [{"x": 1, "y": "2"}])
+        self.assertEqual(ex.object_expr, "object[0].y")
+        self.assertEqual(ex.schema_expr, "schema.items.properties.y.type")
+
+    def test_validator_without_registry(self):
+        self.assertRaises(
+            SchemaError, Validator.validate, self.schema, [{}])
+
+    def test_is_valid(self):
+        cls = self._validator_cls()
+        self.assertTrue(cls.is_valid(self.schema, [{"x": 1, "y": 2}]))
+        self.assertFalse(cls.is_valid(self.schema, [{"x": 1}]))
+        self.assertRaises(SchemaError, Validator.is_valid, self.schema, [{}])
+
+    def test_compile(self):
+        compiled = compile(self.schema, schema_registry=self.registry)
+        self.assertTrue(compiled.is_valid([{"x": 1, "y": 2}]))
+        error = compiled.first_error([{"x": 1, "y": "2"}])
+        self.assertEqual(error.schema_expr, "schema.items.properties.y.type")
+
+    def test_recursive_schema(self):
+        obj = {"value": 0}
+        for value in range(1, 50):
+            obj = {"value": value, "children": [obj]}
+        for schema in (Schema(self.tree), SchemaNode(self.tree)):
+            self.assertTrue(IterativeValidator.validate(schema, obj))
+            self.assertTrue(compile(schema).validate(obj))
+
+    def test_recursive_schema_error(self):
+        obj = {"value": 0, "children": [{"value": "1"}]}
+        for error in (
+                next(Validator.iter_errors(Schema(self.tree), obj)),
+                compile(Schema(self.tree)).first_error(obj)):
+            self.assertEqual(error.object_expr, "object.children[0].value")
+            self.assertEqual(
+                error.schema_expr,
+                "schema.properties.children.items.properties.value.type")
+
+    def test_recursive_schema_error_in_compiled_recursion(self):
+        obj = {"value": 0, "children": [{"value": 1, "children": [
+            {"value": "2"}]}]}
+        error = compile(Schema(self.tree)).first_error(obj)
+        self.assertEqual(
+            error.object_expr, "object.children[0].children[0].value")
+        # The checks of the first occurrence of the reference are reused
+        self.assertEqual(
+            error.schema_expr,
+            "schema.properties.children.items.properties.value.type")
+
+    def test_reference_to_itself(self):
+        schema = Schema({"$ref": "#"})
+        self.assertRaises(SchemaError, Validator.validate, schema, None)
+        self.assertRaises(SchemaError, compile, schema)
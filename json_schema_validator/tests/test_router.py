@@ -0,0 +1,155 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Unit tests for routing documents to matching schemas
+"""
+
+from testscenarios import TestWithScenarios
+from testtools import TestCase
+
+from json_schema_validator.errors import SchemaError
+from json_schema_validator.router import SchemaRouter
+from json_schema_validator.schema import Schema
+from json_schema_validator.validator import Validator
+
+
+def _event(kind, **properties):
+    properties["kind"] = {"type": "string", "enum": [kind]}
+    return {"type": "object", "properties": properties}
+
+
+SCHEMAS = [
+    _event("login", user={"type": "string"}),
+    _event("logout", user={"type": "string"}),
+    _event("ping"),
+    {"type": "object", "properties": {
+        "kind": {"enum": ["login", "ping"], "optional": True},
+        "level": {"type": "integer", "optional": True}}},
+    {"type": "object", "properties": {"version": {"enum": [1, 2]}}},
+    {"type": ["string", "null"]},
+    {"type": "integer", "minimum": 10},
+    {"type": ["null", {"type": "array"}]},
+    {"properties": {"flag": {"enum": [True, "yes"]}}},
+    {"properties": {"point": {"enum": [{"x": 1}, [1, 2]]}}},
+    {},
+]
+
+
+class SchemaRouterTests(TestWithScenarios, TestCase):
+
+    scenarios = [
+        ('login', {'obj': {"kind": "login", "user": "bob"}}),
+        ('login_without_user', {'obj': {"kind": "login"}}),
+        ('logout', {'obj': {"kind": "logout", "user": "bob"}}),
+        ('ping', {'obj': {"kind": "ping"}}),
+        ('unknown_kind', {'obj': {"kind": "reboot"}}),
+        ('array_kind', {'obj': {"kind": ["login"]}}),
+        ('no_kind', {'obj': {"level": 3}}),
+        ('version', {'obj': {"version": 2}}),
+        ('version_float', {'obj': {"version": 2.0}}),
+        ('flag_true', {'obj': {"flag": True}}),
+        ('flag_one', {'obj': {"flag": 1}}),
+        ('flag_list', {'obj': {"flag": [1]}}),
+        ('point_object', {'obj': {"point": {"x": 1.0}}}),
+        ('point_other_object', {'obj': {"point": {"x": 2}}}),
+        ('point_array', {'obj': {"point": [1, 2]}}),
+        ('empty_object', {'obj': {}}),
+        ('string', {'obj': "text"}),
+        ('null', {'obj': None}),
+        ('integer', {'obj': 42}),
+        ('small_integer', {'obj': 5}),
+        ('float', {'obj': 42.5}),
+        ('boolean', {'obj': False}),
+        ('array', {'obj': [1, 2]}),
+    ]
+
+    def setUp(self):
+        super(SchemaRouterTests, self).setUp()
+        self.schemas = [Schema(schema) for schema in SCHEMAS]
+        self.router = SchemaRouter(self.schemas)
+
+    def expected_matches(self):
+        return [
+            index for index, schema in enumerate(self.schemas)
+            if Validator.is_valid(schema, self.obj)]
+
+    def test_candidates_include_all_matches(self):
+        candidates = self.router.candidates(self.obj)
+        for index in self.expected_matches():
+            self.assertIn(index, candidates)
+
+    def test_matches(self):
+        self.assertEqual(
+            self.router.matches(self.obj), self.expected_matches())
+
+    def test_first_match(self):
+        self.assertEqual(
+            self.router.first_match(self.obj),
+            Validator.first_match(self.schemas, self.obj))
+
+
+class SchemaRouterIndexTests(TestCase):
+
+    def setUp(self):
+        super(SchemaRouterIndexTests, self).setUp()
+        self.router = SchemaRouter(
+            [Schema(_event("kind%d" % i)) for i in range(200)] +
+            [Schema({"type": "string"})])
+
+    def test_discriminator_selects_one_schema(self):
+        self.assertEqual(self.router.candidates({"kind": "kind123"}), [123])
+
+    def test_unknown_discriminator_selects_nothing(self):
+        self.assertEqual(self.router.candidates({"kind": "other"}), [])
+
+    def test_discriminator_with_object_values(self):
+        router = SchemaRouter([
+            Schema({"properties": {"kind": {"enum": [{"a": 1}]}}}),
+            Schema({"properties": {"kind": {"enum": [[1]]}}})])
+        self.assertEqual(router.candidates({"kind": {"a": 1}}), [0])
+        self.assertEqual(router.candidates({"kind": [1]}), [1])
+        self.assertEqual(router.candidates({"kind": {"a": 2}}), [])
+
+    def test_type_selects_schemas(self):
+        self.assertEqual(self.router.candidates("text"), [200])
+
+    def test_missing_required_property(self):
+        router = SchemaRouter([Schema({"properties": {"a": {}}})])
+        self.assertEqual(router.candidates({"b": 1}), [])
+        self.assertEqual(router.candidates({"a": 1}), [0])
+
+    def test_reference_is_not_indexed(self):
+        # Only the referenced schema is used by the validators, the other
+        # keywords next to $ref are ignored
+        router = SchemaRouter([Schema({
+            "$ref": "#/definitions/any",
+            "type": "string",
+            "properties": {"kind": {"enum": ["a"]}, "id": {}},
+            "definitions": {"any": {}},
+        })])
+        for obj in ({"kind": "b"}, {}, 1):
+            self.assertEqual(router.candidates(obj), [0])
+            self.assertEqual(router.first_match(obj), 0)
+
+    def test_not_a_schema(self):
+        self.assertRaises(ValueError, SchemaRouter, [{"type": "string"}])
+
+    def test_bad_schema(self):
+        self.assertRaises(SchemaError, SchemaRouter, [Schema({"type": 1})])
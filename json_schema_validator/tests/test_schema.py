@@ -21,14 +21,16 @@
 Unit tests for JSON schema
 """
 
+import copy
 import json
+import pickle
 import sys
 
 from testscenarios import TestWithScenarios
 from testtools import TestCase
 
 from json_schema_validator.errors import SchemaError
-from json_schema_validator.schema import Schema
+from json_schema_validator.schema import Schema, SchemaNode
 
 PY2 = sys.version_info[0] == 2
 PY35 = sys.version_info[0:2] >= (3, 5)
@@ -546,6 +548,18 @@ class SchemaTests(TestWithScenarios, TestCase):
                 'enum':[5, False, "foobar"]
             }
         }),
+        ("enum_booleans_and_numbers", {
+            'schema': '{"enum": [1, true, 0, false]}',
+            'expected': {
+                'enum': [1, True, 0, False]
+            }
+        }),
+        ("enum_objects_and_arrays", {
+            'schema': '{"enum": [{"a": [1]}, {"a": [true]}, [1], [true]]}',
+            'expected': {
+                'enum': [{"a": [1]}, {"a": [True]}, [1], [True]]
+            }
+        }),
         ("enum_wrong_type", {
             'schema': '{"enum": "foobar"}',
             'access': 'enum',
@@ -565,6 +579,19 @@ class SchemaTests(TestWithScenarios, TestCase):
                 "enum value ['foo', 'foo'] contains duplicate element"
                 " 'foo'"),
         }),
+        ("enum_duplicate_numbers", {
+            'schema': '{"enum": [1, 1.0]}',
+            'access': 'enum',
+            'raises': SchemaError(
+                "enum value [1, 1.0] contains duplicate element 1.0"),
+        }),
+        ("enum_duplicate_objects", {
+            'schema': '{"enum": [{"a": 1}, {"a": 1}]}',
+            'access': 'enum',
+            'raises': SchemaError(
+                "enum value [{'a': 1}, {'a': 1}] contains duplicate element"
+                " {'a': 1}"),
+        }),
         ("title_default", {
             'schema': '{}',
             'expected': {
@@ -622,11 +649,17 @@ class SchemaTests(TestWithScenarios, TestCase):
             'access': 'format',
             'raises': SchemaError('format value 5 is not a string')
         }),
-        ("format_not_implemented", {
+        ("format_color", {
             'schema': '{"format": "color"}',
-            'access': 'format',
-            'raises': NotImplementedError(
-                "format value 'color' is not supported")
+            'expected': {
+                'format': "color"
+            },
+        }),
+        ("format_unknown_name", {
+            'schema': '{"format": "x-custom"}',
+            'expected': {
+                'format': "x-custom"
+            },
         }),
         ("contentEncoding_default", {
             'schema': '{}',
@@ -762,11 +795,65 @@ class SchemaTests(TestWithScenarios, TestCase):
                 "disallow value ['string', 'string'] contains"
                 " duplicate element 'string'")
         }),
-        ('extends_not_supported', {
+        ('ref_default', {
             'schema': '{}',
+            'expected': {
+                'ref': None
+            },
+        }),
+        ('ref_uri', {
+            'schema': '{"$ref": "#/definitions/a"}',
+            'expected': {
+                'ref': "#/definitions/a"
+            },
+        }),
+        ('ref_wrong_type', {
+            'schema': '{"$ref": 5}',
+            'access': 'ref',
+            'raises': SchemaError("$ref value 5 is not a string"),
+        }),
+        ('id_uri', {
+            'schema': '{"id": "http://example.com/a.json"}',
+            'expected': {
+                'id': "http://example.com/a.json"
+            },
+        }),
+        ('id_wrong_type', {
+            'schema': '{"id": []}',
+            'access': 'id',
+            'raises': SchemaError("id value [] is not a string"),
+        }),
+        ('extends_default', {
+            'schema': '{}',
+            'expected': {
+                'extends': None
+            },
+        }),
+        ('extends_schema', {
+            'schema': '{"extends": {"type": "object"}}',
+            'expected': {
+                'extends': {"type": "object"}
+            },
+        }),
+        ('extends_list', {
+            'schema': '{"extends": [{"type": "object"}, {}]}',
+            'expected': {
+                'extends': [{"type": "object"}, {}]
+            },
+        }),
+        ('extends_wrong_type', {
+            'schema': '{"extends": "object"}',
             'access': 'extends',
-            'raises': NotImplementedError(
-                "extends property is not supported"),
+            'raises': SchemaError(
+                "extends value 'object' is not a schema nor a list of"
+                " schemas"),
+        }),
+        ('extends_list_of_wrong_type', {
+            'schema': '{"extends": [{}, 5]}',
+            'access': 'extends',
+            'raises': SchemaError(
+                "extends value [{}, 5] is not a schema nor a list of"
+                " schemas"),
         }),
         ('default_with_value', {
             'schema': '{"default": 5}',
@@ -806,3 +893,170 @@ class SchemaTests(TestWithScenarios, TestCase):
         else:
             self.fail("Broken test definition, must define 'expected' "
                       "or 'access' and 'raises' scenario attributes")
+
+    def test_checked_schema_attribute(self):
+        if hasattr(self, 'expected'):
+            schema = Schema(deserializer(self.schema), strict=True)
+            for attr, expected_value in self.expected.items():
+                self.assertEqual(
+                    expected_value, getattr(schema, attr))
+        elif self.schema == '{}':
+            # Reading some attributes of the empty schema fails but the
+            # schema itself is fine
+            Schema(deserializer(self.schema), strict=True)
+        elif isinstance(self.raises, SchemaError):
+            ex = self.assertRaises(
+                SchemaError, Schema, deserializer(self.schema), strict=True)
+            self.assertEqual(ex.schema_expr, "schema." + self.access)
+            self.assertEqual(
+                str(ex), "schema.{0}: {1}".format(self.access, self.raises))
+        else:
+            self.assertRaises(
+                type(self.raises), Schema, deserializer(self.schema),
+                strict=True)
+
+
+class SchemaCheckTests(TestCase):
+
+    def test_nested_problems_are_reported_with_a_path(self):
+        ex = self.assertRaises(SchemaError, Schema, {
+            "properties": {
+                "foo": {"items": [{}, {"minimum": "1"}]},
+            },
+        }, strict=True)
+        self.assertEqual(
+            ex.schema_expr, "schema.properties.foo.items[1].minimum")
+
+    def test_nested_schema_must_be_an_object(self):
+        ex = self.assertRaises(SchemaError, Schema, {
+            "additionalProperties": {"type": ["string", 5]},
+        }, strict=True)
+        self.assertEqual(ex.schema_expr, "schema.additionalProperties.type")
+        ex = self.assertRaises(SchemaError, Schema, {
+            "properties": {"foo": 5},
+        }, strict=True)
+        self.assertEqual(ex.schema_expr, "schema.properties.foo")
+        self.assertEqual(
+            str(ex),
+            "schema.properties.foo: Schema definition must be a JSON object")
+
+    def test_nested_paths_match_validator_paths(self):
+        for schema_json, schema_expr in [
+                ({"type": ["null", {"minimum": "1"}]},
+                 "schema.type.1.minimum"),
+                ({"disallow": ["null", {"minimum": "1"}]},
+                 "schema.disallow.1.minimum"),
+                ({"disallow": {"minimum": "1"}},
+                 "schema.disallow.minimum"),
+                ({"extends": [{}, {"minimum": "1"}]},
+                 "schema.extends.1.minimum"),
+                ({"extends": {"minimum": "1"}},
+                 "schema.extends.minimum")]:
+            ex = self.assertRaises(
+                SchemaError, Schema, schema_json, strict=True)
+            self.assertEqual(ex.schema_expr, schema_expr)
+
+    def test_schema_is_not_checked_by_default(self):
+        schema = Schema({"minimum": "1"})
+        self.assertRaises(SchemaError, schema.check)
+
+    def test_checked_values_are_remembered(self):
+        schema_json = {"minimum": 1, "properties": {"foo": {"maximum": 2}}}
+        schema = Schema(schema_json)
+        schema.check()
+        # The checked values are not computed again
+        schema_json["minimum"] = "1"
+        self.assertEqual(schema.minimum, 1)
+
+    def test_nested_schemas_are_remembered(self):
+        child_json = {"type": "string"}
+        schema = Schema({"properties": {"foo": child_json}}, strict=True)
+        child = schema._subschema(child_json)
+        self.assertIs(child, schema._subschema(child_json))
+        self.assertEqual(child.type, "string")
+        # Unchecked schemas create a new nested schema each time
+        schema = Schema({"properties": {"foo": child_json}})
+        self.assertIsNot(
+            schema._subschema(child_json), schema._subschema(child_json))
+
+
+class SchemaCopyTests(TestCase):
+
+    def _assert_children_match(self, schema):
+        child_json = schema._schema["properties"]["foo"]
+        child = schema._subschema(child_json)
+        self.assertIs(child, schema._subschema(child_json))
+        self.assertIs(child._schema, child_json)
+        self.assertEqual(child.type, "string")
+
+    def test_checked_schema_can_be_pickled(self):
+        schema = Schema({"properties": {"foo": {"type": "string"}}},
+                        strict=True)
+        restored = pickle.loads(pickle.dumps(schema))
+        self.assertIsNot(restored._values, None)
+        self._assert_children_match(restored)
+
+    def test_checked_schema_can_be_deep_copied(self):
+        schema = Schema({"properties": {"foo": {"type": "string"}}},
+                        strict=True)
+        self._assert_children_match(copy.deepcopy(schema))
+
+    def test_unchecked_schema_stays_unchecked(self):
+        schema = pickle.loads(pickle.dumps(Schema({"minimum": "1"})))
+        self.assertIs(schema._values, None)
+
+
+class SchemaNodeTests(TestWithScenarios, TestCase):
+
+    # Only the scenarios that read a keyword successfully apply to nodes
+    scenarios = [
+        (name, scenario) for name, scenario in SchemaTests.scenarios
+        if 'expected' in scenario
+    ]
+
+    def test_node_attribute(self):
+        node = SchemaNode(deserializer(self.schema))
+        for attr, expected_value in self.expected.items():
+            self.assertEqual(expected_value, getattr(node, attr))
+
+
+class SchemaNodeBehaviorTests(TestCase):
+
+    def test_node_is_a_schema(self):
+        self.assertIsInstance(SchemaNode({}), Schema)
+
+    def test_node_has_no_instance_dictionary(self):
+        self.assertFalse(hasattr(SchemaNode({}), '__dict__'))
+
+    def test_node_stores_only_keywords_with_values(self):
+        node = SchemaNode({"type": "string", "optional": False})
+        self.assertEqual(type(node).__slots__, ("type", ))
+        self.assertEqual(node.optional, False)
+        self.assertIs(type(node), type(SchemaNode({"type": "integer"})))
+
+    def test_node_is_immutable(self):
+        node = SchemaNode({"minimum": 1})
+        self.assertRaises(AttributeError, setattr, node, "minimum", 2)
+        self.assertRaises(AttributeError, delattr, node, "minimum")
+        self.assertEqual(node.minimum, 1)
+
+    def test_nested_schemas_are_nodes(self):
+        node = SchemaNode({"properties": {"foo": {"type": "string"}}})
+        child = node._subschema(node.properties["foo"])
+        self.assertIsInstance(child, SchemaNode)
+        self.assertEqual(child.type, "string")
+
+    def test_problems_are_reported_when_the_node_is_created(self):
+        ex = self.assertRaises(
+            SchemaError, SchemaNode, {"items": {"maxItems": "5"}})
+        self.assertEqual(ex.schema_expr, "schema.items.maxItems")
+
+    def test_can_equal_without_limit_is_none(self):
+        node = SchemaNode({})
+        self.assertEqual(node.minimumCanEqual, None)
+        self.assertEqual(node.maximumCanEqual, None)
+
+    def test_node_can_be_pickled(self):
+        node = pickle.loads(pickle.dumps(SchemaNode({"pattern": "^a"})))
+        self.assertIsInstance(node, SchemaNode)
+        self.assertTrue(node.pattern.match("abc"))
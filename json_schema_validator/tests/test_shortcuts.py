@@ -0,0 +1,93 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Unit tests for shortcut functions
+"""
+
+import os
+import shutil
+import tempfile
+
+from testtools import TestCase
+
+from json_schema_validator.errors import ValidationError
+from json_schema_validator.schema import Schema
+from json_schema_validator.shortcuts import validate_file
+
+
+class ValidateFileTests(TestCase):
+
+    schema = Schema({"type": "array", "items": {"type": "string"}})
+
+    def setUp(self):
+        super(ValidateFileTests, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def make_file(self, text):
+        path = os.path.join(self.tmpdir, "data.json")
+        with open(path, "wb") as stream:
+            stream.write(text.encode("utf-8"))
+        return path
+
+    def test_document(self):
+        path = self.make_file(u'["za\u017c\xf3\u0142\u0107", "b"]')
+        self.assertTrue(validate_file(self.schema, path))
+
+    def test_invalid_document(self):
+        path = self.make_file(u'["a", 1]')
+        ex = self.assertRaises(
+            ValidationError, validate_file, self.schema, path)
+        self.assertEqual(ex.object_expr, "object[1]")
+
+    def test_empty_document(self):
+        path = self.make_file(u'')
+        self.assertRaises(ValueError, validate_file, self.schema, path)
+
+    def test_array(self):
+        # Multi-byte characters are split across reads of the map
+        items = u", ".join([u"\"\u0142\u0105ka\""] * 5000)
+        path = self.make_file(u"[" + items + u"]")
+        self.assertTrue(validate_file(self.schema, path, mode="array"))
+
+    def test_invalid_array(self):
+        path = self.make_file(u'["a", "b", null]')
+        ex = self.assertRaises(
+            ValidationError, validate_file, self.schema, path, mode="array")
+        self.assertEqual(ex.object_expr, "object[2]")
+
+    def test_ndjson(self):
+        path = self.make_file(u'"a"\n\n"\u0142"\n')
+        self.assertTrue(validate_file(self.schema, path, mode="ndjson"))
+
+    def test_invalid_ndjson(self):
+        path = self.make_file(u'"a"\n2\n')
+        ex = self.assertRaises(
+            ValidationError, validate_file, self.schema, path, mode="ndjson")
+        self.assertEqual(ex.object_expr, "object[1]")
+
+    def test_empty_ndjson(self):
+        path = self.make_file(u'')
+        self.assertTrue(validate_file(self.schema, path, mode="ndjson"))
+
+    def test_unknown_mode(self):
+        path = self.make_file(u'[]')
+        self.assertRaises(
+            ValueError, validate_file, self.schema, path, mode="xml")
@@ -0,0 +1,155 @@
+# Copyright (C) 2010, 2011 Linaro Limited
+# Copyright (C) 2016 Zygmunt Krynicki
+#
+# Author: Zygmunt Krynicki <me@zygoon.pl>
+#
+# This file is part of json-schema-validator.
+#
+# json-schema-validator is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License version 3
+# as published by the Free Software Foundation
+#
+# json-schema-validator is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with json-schema-validator.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Unit tests for streaming validation
+"""
+
+import io
+
+from testscenarios import TestWithScenarios
+from testtools import TestCase
+
+from json_schema_validator.errors import ValidationError
+from json_schema_validator.schema import Schema
+from json_schema_validator.streaming import (
+    iter_array,
+    iter_ndjson,
+    iter_stream_errors,
+    validate_stream,
+)
+
+
+class IterArrayTests(TestWithScenarios, TestCase):
+
+    # Tiny buffers exercise elements split across reads
+    scenarios = [
+        ('bufsize_1', {'bufsize': 1}),
+        ('bufsize_3', {'bufsize': 3}),
+        ('bufsize_default', {'bufsize': 65536}),
+    ]
+
+    def parse(self, text):
+        return list(iter_array(io.StringIO(text), bufsize=self.bufsize))
+
+    def test_empty_array(self):
+        self.assertEqual(self.parse(u' [ ] '), [])
+
+    def test_elements(self):
+        self.assertEqual(
+            self.parse(u'[1, "two", {"three": [3]}, null, 12345.5e1]'),
+            [1, "two", {"three": [3]}, None, 123455.0])
+
+    def test_number_at_end_of_array(self):
+        self.assertEqual(self.parse(u'[123456789]'), [123456789])
+
+    def test_not_an_array(self):
+        self.assertRaises(ValueError, self.parse, u'{"a": 1}')
+
+    def test_missing_comma(self):
+        self.assertRaises(ValueError, self.parse, u'[1 2]')
+
+    def test_trailing_data(self):
+        self.assertRaises(ValueError, self.parse, u'[1] 2')
+
+    def test_truncated_array(self):
+        self.assertRaises(ValueError, self.parse, u'[1, 2')
+
+    def test_tokens_split_across_reads(self):
+        self.assertEqual(
+            self.parse(u'[true, false, null, -1, "a\\u00e9b", {"k": []}]'),
+            [True, False, None, -1, u"a\u00e9b", {"k": []}])
+
+    def test_malformed_element_position(self):
+        ex = self.assertRaises(ValueError, self.parse, u'[\n1,\n bogus]')
+        self.assertIn("line 3 column 2 (char 6)", str(ex))
+
+    def test_malformed_element_is_reported_before_the_rest_is_read(self):
+        text = u'[1, bogus, ' + u'1, ' * 100000 + u'1]'
+        stream = io.StringIO(text)
+        iterator = iter_array(stream, bufsize=self.bufsize)
+        self.assertEqual(next(iterator), 1)
+        self.assertRaises(ValueError, next, iterator)
+        self.assertLess(stream.tell(), 2 * self.bufsize + 100)
+
+
+class IterNdjsonTests(TestCase):
+
+    def test_records(self):
+        stream = io.StringIO(u'{"a": 1}\n\n[2]\n"three"\n')
+        self.assertEqual(list(iter_ndjson(stream)), [{"a": 1}, [2], "three"])
+
+
+class ValidateStreamTests(TestCase):
+
+    schema = Schema({"type": "array", "items": {"type": "number"}})
+
+    def test_valid_array(self):
+        self.assertTrue(
+            validate_stream(self.schema, io.StringIO(u'[1, 2, 3]')))
+
+    def test_invalid_array_element(self):
+        ex = self.assertRaises(
+            ValidationError, validate_stream, self.schema,
+            io.StringIO(u'[1, "2", 3]'))
+        self.assertEqual(ex.object_expr, "object[1]")
+        self.assertEqual(ex.schema_expr, "schema.items.type")
+
+    def test_invalid_ndjson_record(self):
+        ex = self.assertRaises(
+            ValidationError, validate_stream, self.schema,
+            io.StringIO(u'1\n2\nnull\n'), ndjson=True)
+        self.assertEqual(ex.object_expr, "object[2]")
+
+    def test_iter_stream_errors_reports_each_invalid_element(self):
+        errors = iter_stream_errors(
+            self.schema, io.StringIO(u'["a", 1, "b"]'))
+        self.assertEqual(
+            [error.object_expr for error in errors],
+            ["object[0]", "object[2]"])
+
+    def test_references_in_items(self):
+        schema = Schema({
+            "type": "array",
+            "items": {"$ref": "#/definitions/point"},
+            "definitions": {"point": {
+                "type": "object",
+                "properties": {
+                    "x": {"type": "number"},
+                    "next": {"$ref": "#/definitions/point",
+                             "optional": True}}}},
+        })
+        self.assertTrue(validate_stream(
+            schema, io.StringIO(u'[{"x": 1}, {"x": 2, "next": {"x": 3}}]')))
+        ex = self.assertRaises(
+            ValidationError, validate_stream, schema,
+            io.StringIO(u'[{"x": 1, "next": {"x": "3"}}]'))
+        self.assertEqual(ex.object_expr, "object[0].next.x")
+
+    def test_root_reference_in_items(self):
+        schema = Schema({"type": "array", "items": {"$ref": "#"}})
+        self.assertTrue(validate_stream(schema, io.StringIO(u'[[], [[]]]')))
+        self.assertRaises(
+            ValidationError, validate_stream, schema,
+            io.StringIO(u'[[], 1]'))
+
+    def test_tuple_items_are_not_supported(self):
+        schema = Schema({"items": [{"type": "number"}]})
+        self.assertRaises(
+            NotImplementedError, validate_stream, schema, io.StringIO(u'[]'))
@@ -22,15 +22,19 @@ Unit tests for JSON schema
 """
 
 import functools
+import gc
 import json
 import sys
+import weakref
 
 from testscenarios import TestWithScenarios
 from testtools import TestCase
 
-from json_schema_validator.errors import ValidationError
+from json_schema_validator.errors import SchemaError, ValidationError
+from json_schema_validator.formats import FormatRegistry
+from json_schema_validator.schema import Schema, SchemaNode
 from json_schema_validator.shortcuts import validate
-from json_schema_validator.validator import Validator
+from json_schema_validator.validator import IterativeValidator, Validator
 
 PY2 = sys.version_info[0] == 2
 if PY2:
@@ -321,6 +325,44 @@ class ValidatorFailureTests(TestWithScenarios, TestCase):
             'object_expr': 'object',
             'schema_expr': 'schema.enum',
         }),
+        ("enum_check_does_not_confuse_booleans_and_numbers", {
+            'schema': '{"enum": [1, 0]}',
+            'data': 'true',
+            'raises': ValidationError(
+                'True does not match any value in enumeration [1, 0]',
+                "Object does not match any value in enumeration"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.enum',
+        }),
+        ("enum_check_does_not_confuse_numbers_and_booleans", {
+            'schema': '{"enum": [true, "1"]}',
+            'data': '1',
+            'raises': ValidationError(
+                "1 does not match any value in enumeration [True, '1']",
+                "Object does not match any value in enumeration"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.enum',
+        }),
+        ("enum_check_reports_unlisted_objects", {
+            'schema': '{"enum": [{"a": 1}, [1, 2]]}',
+            'data': '{"a": 2}',
+            'raises': ValidationError(
+                "{'a': 2} does not match any value in enumeration"
+                " [{'a': 1}, [1, 2]]",
+                "Object does not match any value in enumeration"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.enum',
+        }),
+        ("enum_check_reports_unlisted_arrays", {
+            'schema': '{"enum": [{"a": 1}, [1, 2]]}',
+            'data': '[3]',
+            'raises': ValidationError(
+                "[3] does not match any value in enumeration"
+                " [{'a': 1}, [1, 2]]",
+                "Object does not match any value in enumeration"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.enum',
+        }),
         ("items_with_single_schema_finds_problems", {
             'schema': '{"items": {"type": "string"}}',
             'data': '["foo", null, "froz"]',
@@ -382,6 +424,24 @@ class ValidatorFailureTests(TestWithScenarios, TestCase):
             'object_expr': 'object[4]',
             'schema_expr': 'schema.additionalProperties.type',
         }),
+        ("items_with_min_items_finds_problems", {
+            'schema': '{"items": {"type": "string"}, "minItems": 2}',
+            'data': '["foo"]',
+            'raises': ValidationError(
+                "['foo'] has fewer than the minimum number of items 2",
+                "Object has fewer than the minimum number of items"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.minItems',
+        }),
+        ("items_with_max_items_finds_problems", {
+            'schema': '{"items": {"type": "string"}, "maxItems": 1}',
+            'data': '["foo", "bar"]',
+            'raises': ValidationError(
+                "['foo', 'bar'] has more than the maximum number of items 1",
+                "Object has more than the maximum number of items"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.maxItems',
+        }),
         ("array_with_array_schema_and_uniqueItems_is_True", {
             'schema': """
             {
@@ -392,7 +452,26 @@ class ValidatorFailureTests(TestWithScenarios, TestCase):
             'data': '["foo", "bar", "foo"]',
             'raises': ValidationError(
                 "Repeated items found in ['foo', 'bar', 'foo']",
-                "Repeated items found in array"),
+                "Repeated items found in array (item 2 repeats item 0)"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.items',
+        }),
+        ("uniqueItems_finds_repeated_objects", {
+            'schema': '{"uniqueItems": true}',
+            'data': '[{"a": 1, "b": [2]}, {"a": 2}, {"b": [2], "a": 1.0}]',
+            'raises': ValidationError(
+                "Repeated items found in [{'a': 1, 'b': [2]}, {'a': 2},"
+                " {'b': [2], 'a': 1.0}]",
+                "Repeated items found in array (item 2 repeats item 0)"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.items',
+        }),
+        ("uniqueItems_finds_repeated_arrays", {
+            'schema': '{"type": "array", "uniqueItems": true}',
+            'data': '[[1], [2], [2]]',
+            'raises': ValidationError(
+                "Repeated items found in [[1], [2], [2]]",
+                "Repeated items found in array (item 2 repeats item 1)"),
             'object_expr': 'object',
             'schema_expr': 'schema.items',
         }),
@@ -510,6 +589,139 @@ class ValidatorFailureTests(TestWithScenarios, TestCase):
             'object_expr': 'object',
             'schema_expr': 'schema.format'
         }),
+        ("format_date_time_checks_day_of_month", {
+            'schema': '{"format": "date-time"}',
+            'data': '"2011-02-29T00:00:00Z"',
+            'raises': ValidationError(
+                "'2011-02-29T00:00:00Z' is not a string representing JSON"
+                " date-time",
+                "Object is not a string representing JSON date-time"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.format'
+        }),
+        ("format_ip_address_finds_problems", {
+            'schema': '{"format": "ip-address"}',
+            'data': '"10.0.0.256"',
+            'raises': ValidationError(
+                "'10.0.0.256' is not a string representing an IPv4 address",
+                "Object is not a string representing an IPv4 address"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.format'
+        }),
+        ("format_date_time_rejects_numbers", {
+            'schema': '{"format": "date-time"}',
+            'data': '20101112',
+            'raises': ValidationError(
+                "20101112 is not a string representing JSON date-time",
+                "Object is not a string representing JSON date-time"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.format'
+        }),
+        ("ref_to_definition", {
+            'schema': '{"properties": {"a": {"$ref": "#/definitions/pos"}},'
+            ' "definitions": {"pos": {"type": "integer", "minimum": 0}}}',
+            'data': '{"a": -1}',
+            'raises': ValidationError(
+                "-1 is less than the minimum 0",
+                "Object is less than the minimum"),
+            'object_expr': 'object.a',
+            'schema_expr': 'schema.properties.a.minimum',
+        }),
+        ("disallow_type", {
+            'schema': '{"disallow": "string"}',
+            'data': '"x"',
+            'raises': ValidationError(
+                "'x' matches disallowed type 'string'",
+                "Object has disallowed type (string)"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.disallow',
+        }),
+        ("disallow_number_got_integer", {
+            'schema': '{"disallow": ["null", "number"]}',
+            'data': '1',
+            'raises': ValidationError(
+                "1 matches disallowed type 'number'",
+                "Object has disallowed type (number)"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.disallow',
+        }),
+        ("disallow_any", {
+            'schema': '{"disallow": "any"}',
+            'data': 'null',
+            'raises': ValidationError(
+                "None matches disallowed type 'any'",
+                "Object has disallowed type (any)"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.disallow',
+        }),
+        ("disallow_nested_schema", {
+            'schema': '{"disallow": ["null", {"type": "string",'
+            ' "maxLength": 2}]}',
+            'data': '"ab"',
+            'raises': ValidationError(
+                "'ab' matches a disallowed schema",
+                "Object matches a disallowed schema"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.disallow.1',
+        }),
+        ("disallow_schema", {
+            'schema': '{"properties": {"a": {"disallow": {"minimum": 0}}}}',
+            'data': '{"a": 1}',
+            'raises': ValidationError(
+                "1 matches a disallowed schema",
+                "Object matches a disallowed schema"),
+            'object_expr': 'object.a',
+            'schema_expr': 'schema.properties.a.disallow',
+        }),
+        ("extends_base_property", {
+            'schema': '{"properties": {"a": {"type": "string"}},'
+            ' "extends": {"properties": {"b": {"type": "integer"}}}}',
+            'data': '{"a": "x", "b": "y"}',
+            'raises': ValidationError(
+                "'y' does not match type 'integer'",
+                "Object has incorrect type (expected integer)"),
+            'object_expr': 'object.b',
+            'schema_expr': 'schema.extends.properties.b.type',
+        }),
+        ("extends_own_keywords_first", {
+            'schema': '{"maxLength": 1, "extends": [{"minLength": 3},'
+            ' {"pattern": "^b"}]}',
+            'data': '"ab"',
+            'raises': ValidationError(
+                "'ab' exceeds the maximum length 1",
+                "Object exceeds the maximum length"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.maxLength',
+        }),
+        ("extends_second_base", {
+            'schema': '{"extends": [{"minLength": 1},'
+            ' {"extends": {"maxLength": 2}}]}',
+            'data': '"abc"',
+            'raises': ValidationError(
+                "'abc' exceeds the maximum length 2",
+                "Object exceeds the maximum length"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.extends.1.extends.maxLength',
+        }),
+        ("extends_merged_property_required", {
+            'schema': '{"properties": {"a": {"optional": true}},'
+            ' "extends": {"properties": {"a": {"type": "integer"}}}}',
+            'data': '{}',
+            'raises': ValidationError(
+                "{} does not have property 'a'",
+                "Object lacks property 'a'"),
+            'object_expr': 'object',
+            'schema_expr': 'schema.extends.properties.a.optional',
+        }),
+        ("ref_to_root", {
+            'schema': '{"type": ["string", "array"], "items": {"$ref": "#"}}',
+            'data': '["a", 1]',
+            'raises': ValidationError(
+                "1 does not match any of the types in ['string', 'array']",
+                "Object has incorrect type (multiple types possible)"),
+            'object_expr': 'object[1]',
+            'schema_expr': 'schema.items.type',
+        }),
     ]
 
     def test_validation_error_has_proper_message(self):
@@ -536,6 +748,47 @@ class ValidatorFailureTests(TestWithScenarios, TestCase):
 class ValidatorSuccessTests(TestWithScenarios, TestCase):
 
     scenarios = [
+        ("ref_to_definition", {
+            'schema': '{"items": {"$ref": "#/definitions/pos"},'
+            ' "definitions": {"pos": {"type": "integer", "minimum": 0}}}',
+            'data': '[0, 1, 2]',
+        }),
+        ("disallow_other_type", {
+            'schema': '{"disallow": ["string", "boolean"]}',
+            'data': '0',
+        }),
+        ("disallow_nested_schema_not_matched", {
+            'schema': '{"disallow": [{"type": "string", "maxLength": 2}]}',
+            'data': '"abc"',
+        }),
+        ("disallow_integer_got_number", {
+            'schema': '{"disallow": {"type": "integer"}}',
+            'data': '1.5',
+        }),
+        ("extends_schema", {
+            'schema': '{"properties": {"a": {"type": "string"}},'
+            ' "extends": {"properties": {"b": {"type": "integer"}}}}',
+            'data': '{"a": "x", "b": 1}',
+        }),
+        ("extends_list", {
+            'schema': '{"type": "string", "extends": [{"minLength": 1},'
+            ' {"maxLength": 2}, {"type": "string"}]}',
+            'data': '"ab"',
+        }),
+        ("extends_reference", {
+            'schema': '{"extends": {"$ref": "#/definitions/base"},'
+            ' "definitions": {"base": {"properties": {"a": {}}}}}',
+            'data': '{"a": null}',
+        }),
+        ("ref_to_root", {
+            'schema': '{"type": ["string", "array"], "items": {"$ref": "#"}}',
+            'data': '["a", ["b", ["c"]]]',
+        }),
+        ("ref_escaped_pointer", {
+            'schema': '{"$ref": "#/definitions/a~1b~0c%20d",'
+            ' "definitions": {"a/b~c d": {"type": "null"}}}',
+            'data': 'null',
+        }),
         ("type_string_got_string", {
             'schema': '{"type": "string"}',
             'data': '"foobar"'
@@ -677,6 +930,31 @@ class ValidatorSuccessTests(TestWithScenarios, TestCase):
             'schema': '{"enum": [1, 2, 3]}',
             'data': '2',
         }),
+        ("enum_check_accepts_booleans_next_to_numbers", {
+            'schema': '{"enum": [1, true, 0, false]}',
+            'data': 'false',
+        }),
+        ("enum_check_compares_numbers_by_value", {
+            'schema': '{"enum": [1, 2, 3]}',
+            'data': '2.0',
+        }),
+        ("enum_check_with_object_and_array_values", {
+            'schema': '{"enum": [{"a": 1}, [1, 2], null]}',
+            'data': 'null',
+        }),
+        ("enum_check_accepts_listed_objects", {
+            'schema': '{"enum": [{"a": 1}, [1, 2]]}',
+            'data': '{"a": 1.0}',
+        }),
+        ("enum_check_accepts_listed_arrays", {
+            'schema': '{"enum": [{"a": 1}, [1, 2]]}',
+            'data': '[1, 2]',
+        }),
+        ("enum_check_with_many_values", {
+            'schema': '{"enum": [%s]}' % ", ".join(
+                '"code%d"' % i for i in range(5000)),
+            'data': '"code4321"',
+        }),
         ("items_check_does_nothing_for_non_arrays", {
             'schema': '{"items": {"type": "string"}}',
             'data': '5',
@@ -766,6 +1044,36 @@ class ValidatorSuccessTests(TestWithScenarios, TestCase):
             'schema': '{"format": "date-time"}',
             'data': '"2010-11-12T14:38:55Z"',
         }),
+        ("format_date_time_accepts_leap_day", {
+            'schema': '{"format": "date-time"}',
+            'data': '"2000-02-29T23:59:59Z"',
+        }),
+        ("format_draft3_formats_work", {
+            'schema': """
+            {
+                "properties": {
+                    "host": {"format": "host-name"},
+                    "ip": {"format": "ip-address"},
+                    "email": {"format": "email"},
+                    "homepage": {"format": "uri"},
+                    "born": {"format": "date"},
+                    "wakes": {"format": "time"},
+                    "seen": {"format": "utc-millisec"},
+                    "eyes": {"format": "color"}
+                }
+            }""",
+            'data': """
+            {
+                "host": "example.com",
+                "ip": "192.168.0.1",
+                "email": "user@example.com",
+                "homepage": "http://example.com/",
+                "born": "1980-02-29",
+                "wakes": "07:30:00",
+                "seen": 1291766398000,
+                "eyes": "#00ff00"
+            }""",
+        }),
         ("array_with_array_schema_and_uniqueItems_is_True", {
             'schema': """
             {
@@ -775,8 +1083,489 @@ class ValidatorSuccessTests(TestWithScenarios, TestCase):
             }""",
             'data': '["foo", "bar", "baz"]',
         }),
+        ("uniqueItems_does_not_confuse_booleans_and_numbers", {
+            'schema': '{"uniqueItems": true}',
+            'data': '[1, true, 0, false, [1], [true], {"a": 0}, {"a": false}]',
+        }),
+        ("uniqueItems_with_many_records", {
+            'schema': '{"uniqueItems": true}',
+            'data': '[%s]' % ", ".join(
+                '{"id": %d, "tags": ["t%d"]}' % (i, i) for i in range(5000)),
+        }),
     ]
 
     def test_validator_does_not_raise_an_exception(self):
         self.assertEqual(
             True, validate(self.schema, self.data))
+
+
+class ValidatorIterErrorsTests(TestCase):
+
+    schema = Schema({
+        "type": "object",
+        "properties": {
+            "foo": {"type": "number"},
+            "bar": {"type": "string"},
+            "froz": {"type": "boolean"},
+        },
+        "additionalProperties": False,
+    })
+
+    def test_valid_object_has_no_errors(self):
+        errors = list(Validator.iter_errors(
+            self.schema, {"foo": 1, "bar": "", "froz": True}))
+        self.assertEqual(errors, [])
+
+    def test_all_errors_are_reported(self):
+        errors = list(Validator.iter_errors(
+            self.schema, {"foo": "1", "bar": 2, "other": None}))
+        self.assertEqual(
+            sorted(error.schema_expr for error in errors), [
+                "schema.additionalProperties",
+                "schema.properties.bar.type",
+                "schema.properties.foo.type",
+                "schema.properties.froz.optional",
+            ])
+
+    def test_first_error_matches_validate(self):
+        obj = {"foo": "1", "bar": 2}
+        error = next(Validator.iter_errors(self.schema, obj))
+        ex = self.assertRaises(
+            ValidationError, Validator.validate, self.schema, obj)
+        self.assertEqual(error.object_expr, ex.object_expr)
+        self.assertEqual(error.schema_expr, ex.schema_expr)
+
+    def test_max_errors_limits_the_number_of_errors(self):
+        errors = list(Validator.iter_errors(
+            Schema({"items": {"type": "string"}}), [1, 2, 3, 4],
+            max_errors=2))
+        self.assertEqual(
+            [error.object_expr for error in errors],
+            ["object[0]", "object[1]"])
+
+    def test_errors_are_produced_lazily(self):
+        seen = []
+
+        class Item(object):
+            def __repr__(self):
+                return "Item"
+
+        class RecordingList(list):
+            def __getitem__(self, index):
+                seen.append(index)
+                return list.__getitem__(self, index)
+
+        obj = RecordingList([Item(), Item(), Item()])
+        errors = Validator.iter_errors(
+            Schema({"items": {"type": "string"}}), obj)
+        next(errors)
+        self.assertEqual(seen, [0])
+
+    def test_tuple_items_shorter_than_schema(self):
+        schema = Schema({"items": [{"type": "string"}, {"type": "number"}]})
+        errors = list(Validator.iter_errors(schema, [1]))
+        self.assertEqual(
+            [error.object_expr for error in errors],
+            ["object", "object[0]"])
+
+    def test_non_schema_is_rejected(self):
+        self.assertRaises(ValueError, Validator.iter_errors, {}, None)
+
+
+class ValidatorWideObjectTests(TestCase):
+
+    schema = Schema({
+        "type": "object",
+        "properties": dict(
+            ("p%d" % i, {"type": "integer", "optional": i % 2 == 0})
+            for i in range(200)),
+        "additionalProperties": False,
+    })
+
+    def test_wide_object_is_valid(self):
+        obj = dict(("p%d" % i, i) for i in range(200))
+        self.assertTrue(Validator.validate(self.schema, obj))
+        # The second run reuses what was learned about the schema
+        self.assertTrue(Validator.validate(self.schema, obj))
+
+    def test_missing_and_unknown_properties_are_reported(self):
+        obj = dict(("p%d" % i, i) for i in range(200) if i not in (2, 3, 5))
+        obj["x"] = 1
+        errors = list(Validator.iter_errors(self.schema, obj))
+        self.assertEqual(
+            [error.schema_expr for error in errors], [
+                "schema.properties.p3.optional",
+                "schema.properties.p5.optional",
+                "schema.additionalProperties",
+            ])
+
+
+class ValidatorLazyErrorTests(TestCase):
+
+    def setUp(self):
+        super(ValidatorLazyErrorTests, self).setUp()
+        self.repr_calls = []
+        repr_calls = self.repr_calls
+
+        class Item(object):
+            def __repr__(self):
+                repr_calls.append(None)
+                return "Item"
+        self.obj = [Item()]
+
+    def test_message_is_formatted_on_access(self):
+        ex = self.assertRaises(
+            ValidationError, Validator.validate,
+            Schema({"type": "string"}), self.obj)
+        self.assertEqual(self.repr_calls, [])
+        self.assertEqual(ex.message, "[Item] does not match type 'string'")
+        self.assertEqual(len(self.repr_calls), 1)
+
+    def test_expressions_reflect_the_point_of_failure(self):
+        error = next(Validator.iter_errors(
+            Schema({"items": {"type": "string"}}), self.obj))
+        self.assertEqual(error.object_expr, "object[0]")
+        self.assertEqual(error.schema_expr, "schema.items.type")
+
+
+def iterative_validate(schema_text, data_text):
+    loads = deserializer if PY2 else json.loads
+    return IterativeValidator.validate(
+        Schema(loads(schema_text)), loads(data_text))
+
+
+class IterativeValidatorFailureTests(TestWithScenarios, TestCase):
+
+    scenarios = ValidatorFailureTests.scenarios
+
+    def test_validation_error_matches_validator(self):
+        ex = self.assertRaises(ValidationError,
+                               iterative_validate, self.schema, self.data)
+        self.assertEqual(ex.message, self.raises.message)
+        self.assertEqual(ex.new_message, self.raises.new_message)
+        self.assertEqual(ex.object_expr, self.object_expr)
+        self.assertEqual(ex.schema_expr, self.schema_expr)
+
+
+class IterativeValidatorSuccessTests(TestWithScenarios, TestCase):
+
+    scenarios = ValidatorSuccessTests.scenarios
+
+    def test_validator_does_not_raise_an_exception(self):
+        self.assertEqual(
+            True, iterative_validate(self.schema, self.data))
+
+
+def checked_validate(schema_text, data_text):
+    loads = deserializer if PY2 else json.loads
+    return Validator.validate(
+        Schema(loads(schema_text), strict=True), loads(data_text))
+
+
+class CheckedSchemaValidatorFailureTests(TestWithScenarios, TestCase):
+
+    scenarios = ValidatorFailureTests.scenarios
+
+    def test_validation_error_matches_validator(self):
+        ex = self.assertRaises(ValidationError,
+                               checked_validate, self.schema, self.data)
+        self.assertEqual(ex.message, self.raises.message)
+        self.assertEqual(ex.new_message, self.raises.new_message)
+        self.assertEqual(ex.object_expr, self.object_expr)
+        self.assertEqual(ex.schema_expr, self.schema_expr)
+
+
+class CheckedSchemaValidatorSuccessTests(TestWithScenarios, TestCase):
+
+    scenarios = ValidatorSuccessTests.scenarios
+
+    def test_validator_does_not_raise_an_exception(self):
+        self.assertEqual(
+            True, checked_validate(self.schema, self.data))
+
+
+def node_validate(schema_text, data_text):
+    loads = deserializer if PY2 else json.loads
+    return Validator.validate(
+        SchemaNode(loads(schema_text)), loads(data_text))
+
+
+class SchemaNodeValidatorFailureTests(TestWithScenarios, TestCase):
+
+    scenarios = ValidatorFailureTests.scenarios
+
+    def test_validation_error_matches_validator(self):
+        ex = self.assertRaises(ValidationError,
+                               node_validate, self.schema, self.data)
+        self.assertEqual(ex.message, self.raises.message)
+        self.assertEqual(ex.new_message, self.raises.new_message)
+        self.assertEqual(ex.object_expr, self.object_expr)
+        self.assertEqual(ex.schema_expr, self.schema_expr)
+
+
+class SchemaNodeValidatorSuccessTests(TestWithScenarios, TestCase):
+
+    scenarios = ValidatorSuccessTests.scenarios
+
+    def test_validator_does_not_raise_an_exception(self):
+        self.assertEqual(
+            True, node_validate(self.schema, self.data))
+
+
+class IterativeValidatorTests(TestCase):
+
+    depth = 3000
+
+    def make_deep(self, leaf):
+        schema = {"type": "string"}
+        obj = leaf
+        for i in range(self.depth):
+            schema = {"type": "object", "properties": {"child": schema}}
+            obj = {"child": obj}
+        return Schema(schema), obj
+
+    def test_deep_document_is_valid(self):
+        schema, obj = self.make_deep("leaf")
+        self.assertTrue(IterativeValidator.validate(schema, obj))
+
+    def test_deep_document_reports_error_location(self):
+        schema, obj = self.make_deep(None)
+        ex = self.assertRaises(
+            ValidationError, IterativeValidator.validate, schema, obj)
+        self.assertEqual(ex.object_expr, "object" + ".child" * self.depth)
+        self.assertEqual(
+            ex.schema_expr,
+            "schema" + ".properties.child" * self.depth + ".type")
+
+    def test_deep_union_type(self):
+        schema = {}
+        obj = []
+        for i in range(5000):
+            schema = {"type": ["null", {"type": "array", "items": schema}]}
+            obj = [obj]
+        self.assertTrue(IterativeValidator.validate(Schema(schema), obj))
+
+    def test_deep_recursive_union_type(self):
+        schema = Schema({
+            "type": "object",
+            "properties": {
+                "child": {"type": ["null", {"$ref": "#"}]},
+            },
+        })
+        obj = {"child": None}
+        for i in range(self.depth):
+            obj = {"child": obj}
+        self.assertTrue(IterativeValidator.validate(schema, obj))
+        obj["child"] = {"child": 1}
+        ex = self.assertRaises(
+            ValidationError, IterativeValidator.validate, schema, obj)
+        self.assertEqual(ex.object_expr, "object.child")
+        self.assertEqual(ex.schema_expr, "schema.properties.child.type")
+
+    def test_deep_disallow(self):
+        # Each level is valid when the level below is not
+        schema = {"type": "string"}
+        obj = "leaf"
+        for i in range(self.depth):
+            schema = {"disallow": [{"properties": {"child": schema}}]}
+            obj = {"child": obj}
+        self.assertTrue(IterativeValidator.validate(Schema(schema), obj))
+
+    def test_deep_requires(self):
+        schema = {"type": "string"}
+        obj = "leaf"
+        for i in range(self.depth):
+            schema = {
+                "properties": {
+                    "other": {"requires": {"properties": {"child": schema}}},
+                },
+            }
+            obj = {"child": obj, "other": 1}
+        self.assertTrue(IterativeValidator.validate(Schema(schema), obj))
+
+    def test_all_errors_are_reported_in_order(self):
+        schema = Schema({
+            "items": {
+                "properties": {
+                    "a": {"type": "number"},
+                    "b": {"type": "number"},
+                },
+            },
+        })
+        obj = [{"a": "x"}, {"b": "y"}]
+        self.assertEqual(
+            [(error.object_expr, error.schema_expr)
+             for error in IterativeValidator.iter_errors(schema, obj)],
+            [(error.object_expr, error.schema_expr)
+             for error in Validator.iter_errors(schema, obj)])
+
+
+class ValidatorUnionTypeTests(TestCase):
+
+    def test_failed_alternative_does_not_corrupt_state(self):
+        # The first alternative fails deep inside the object, the second
+        # one matches. The requires check that follows must still see the
+        # correct enclosing object.
+        schema = Schema({
+            "properties": {
+                "x": {
+                    "type": [
+                        {"properties": {"a": {"type": "number"}}},
+                        "object",
+                    ],
+                    "requires": {"properties": {"q": {"type": "string"}}},
+                },
+            },
+        })
+        for validator in (Validator, IterativeValidator):
+            ex = self.assertRaises(
+                ValidationError, validator.validate, schema,
+                {"x": {"a": "no"}, "q": 5})
+            self.assertEqual(ex.object_expr, "object.q")
+
+
+class ValidatorValidateManyTests(TestCase):
+
+    schema = Schema({
+        "type": "object",
+        "properties": {
+            "foo": {"type": "number"},
+            "bar": {"type": "string"},
+        },
+    })
+
+    objects = [
+        {"foo": 1, "bar": "a"},
+        {"foo": "1", "bar": 2},
+        {"foo": 2, "bar": "b"},
+    ]
+
+    def test_results_are_in_order(self):
+        results = list(Validator.validate_many(self.schema, self.objects))
+        self.assertEqual(
+            [result.valid for result in results], [True, False, True])
+
+    def test_result_is_true_when_valid(self):
+        results = list(Validator.validate_many(self.schema, self.objects))
+        self.assertTrue(results[0])
+        self.assertFalse(results[1])
+
+    def test_report_ok(self):
+        results = list(Validator.validate_many(
+            self.schema, self.objects, report="ok"))
+        self.assertEqual(results[1].errors, ())
+
+    def test_report_first(self):
+        results = list(Validator.validate_many(
+            self.schema, self.objects, report="first"))
+        self.assertEqual(
+            [error.object_expr for error in results[1].errors],
+            ["object.foo"])
+        self.assertEqual(results[0].errors, ())
+
+    def test_report_all(self):
+        results = list(Validator.validate_many(
+            self.schema, self.objects, report="all"))
+        self.assertEqual(
+            [error.object_expr for error in results[1].errors],
+            ["object.foo", "object.bar"])
+
+    def test_results_are_produced_lazily(self):
+        def objects():
+            yield {"foo": 1, "bar": "a"}
+            raise AssertionError("iterated too far")
+        results = Validator.validate_many(self.schema, objects())
+        self.assertTrue(next(results).valid)
+
+    def test_bad_report_value(self):
+        self.assertRaises(
+            ValueError, Validator.validate_many, self.schema, [],
+            report="some")
+
+
+class ValidatorIsValidTests(TestCase):
+
+    schemas = [
+        Schema({"type": "object", "properties": {"kind": {"enum": ["a"]}}}),
+        Schema({"type": "object", "properties": {"kind": {"enum": ["b"]}}}),
+        Schema({"type": "array"}),
+    ]
+
+    def test_is_valid(self):
+        self.assertTrue(Validator.is_valid(self.schemas[0], {"kind": "a"}))
+        self.assertFalse(Validator.is_valid(self.schemas[0], {"kind": "b"}))
+
+    def test_is_valid_rejects_non_schema(self):
+        self.assertRaises(ValueError, Validator.is_valid, {}, None)
+
+    def test_is_valid_reports_schema_errors(self):
+        self.assertRaises(
+            SchemaError, Validator.is_valid, Schema({"type": 5}), None)
+
+    def test_is_valid_does_not_keep_schema_alive(self):
+        schema = Schema({"type": "object", "properties": {"a": {}}})
+        self.assertTrue(Validator.is_valid(schema, {"a": 1}))
+        schema_ref = weakref.ref(schema)
+        del schema
+        gc.collect()
+        self.assertIsNone(schema_ref())
+
+    def test_is_valid_does_not_keep_schema_with_extends_alive(self):
+        schema = Schema({
+            "properties": {"a": {}}, "extends": {"properties": {"b": {}}}})
+        self.assertFalse(Validator.is_valid(schema, {"a": 1}))
+        schema_ref = weakref.ref(schema)
+        del schema
+        gc.collect()
+        self.assertIsNone(schema_ref())
+
+    def test_first_match(self):
+        self.assertEqual(
+            Validator.first_match(self.schemas, {"kind": "b"}), 1)
+        self.assertEqual(Validator.first_match(self.schemas, []), 2)
+
+    def test_first_match_without_a_match(self):
+        self.assertEqual(Validator.first_match(self.schemas, None), None)
+        self.assertEqual(Validator.first_match([], None), None)
+
+
+class ValidatorFormatRegistryTests(TestCase):
+
+    def setUp(self):
+        super(ValidatorFormatRegistryTests, self).setUp()
+        registry = FormatRegistry()
+        registry.register("even", lambda obj: obj % 2 == 0, "an even number")
+
+        class EvenValidator(Validator):
+            format_registry = registry
+        self.validator_cls = EvenValidator
+        self.schema = Schema({"format": "even"})
+
+    def test_validate(self):
+        self.assertTrue(self.validator_cls.validate(self.schema, 4))
+        ex = self.assertRaises(
+            ValidationError, self.validator_cls.validate, self.schema, 5)
+        self.assertEqual(ex.message, "5 is not an even number")
+        self.assertEqual(ex.new_message, "Object is not an even number")
+
+    def test_is_valid(self):
+        self.assertTrue(self.validator_cls.is_valid(self.schema, 4))
+        self.assertFalse(self.validator_cls.is_valid(self.schema, 5))
+
+    def test_changed_format_is_used(self):
+        self.assertTrue(self.validator_cls.validate(self.schema, 4))
+        self.validator_cls.format_registry.register(
+            "even", lambda obj: obj % 2 == 1, "an odd number")
+        self.assertRaises(
+            ValidationError, self.validator_cls.validate, self.schema, 4)
+        self.validator_cls.format_registry.unregister("even")
+        self.assertRaises(
+            NotImplementedError, self.validator_cls.validate, self.schema, 4)
+
+    def test_validate_many(self):
+        results = self.validator_cls.validate_many(self.schema, [2, 3])
+        self.assertEqual([result.valid for result in results], [True, False])
+
+    def test_default_registry_does_not_know_the_format(self):
+        self.assertRaises(
+            NotImplementedError, Validator.validate, self.schema, 4)
@@ -19,14 +19,22 @@
 
 """Validator implementation."""
 
-import re
-import datetime
+import collections
+import functools
 import itertools
 import types
 import sys
+import weakref
 
+from json_schema_validator import formats
+from json_schema_validator.compiler import compile, type_predicate
 from json_schema_validator.errors import ValidationError
-from json_schema_validator.misc import NUMERIC_TYPES
+from json_schema_validator.misc import (
+    NUMERIC_TYPES,
+    find_duplicate,
+    json_key,
+)
+from json_schema_validator.registry import _get_root_registry
 from json_schema_validator.schema import Schema
 
 if sys.version_info[0] > 2:
@@ -36,6 +44,250 @@ else:
     zip_longest = itertools.izip_longest
 
 
+def _join_paths(stack, suffix=None):
+    """Build an object or schema expression from a stack of (item, path)."""
+    expr = "".join([path for item, path in stack])
+    if suffix:
+        expr += suffix
+    return expr
+
+
+class _SchemaLayout(object):
+    """
+    Facts about one schema that are needed to validate each object.
+
+    The layout is computed once per :class:`Schema` instance, and kept by the
+    schema itself. It keeps the nested :class:`Schema` instances so that
+    their own layouts are reused too. Objects are validated with a few set
+    operations instead of asking the schema about each property again.
+
+    Schemas are often used once, for example by
+    :func:`json_schema_validator.shortcuts.validate`, so the layout is cheap
+    to build. Keywords that are not in the schema are not read and the
+    parts that only apply to objects or arrays are computed when they are
+    first used.
+    """
+
+    __slots__ = ('properties', 'required', 'known', 'additional', 'items',
+                 'has_type', 'type_schemas', 'enum', 'bases', 'disallow_type',
+                 'disallow_predicates', 'disallow_schemas', 'has_unsupported',
+                 'format_checkers', '_schema_ref')
+
+    def __init__(self, schema):
+        # The schema refers to the layout, a reference back would make a
+        # cycle that only the garbage collector can free
+        self._schema_ref = weakref.ref(schema)
+        self._init_type(schema)
+        json_obj = schema._schema
+        if "enum" in json_obj:
+            self._init_enum(schema)
+        else:
+            self.enum = None
+        # Format registry -> (registry version, checker of the format), see
+        # Validator._validate_format()
+        if "format" in json_obj:
+            self.format_checkers = {}
+        else:
+            self.format_checkers = None
+        if "disallow" in json_obj:
+            self._init_disallow(schema)
+        else:
+            self.disallow_type = None
+            self.disallow_predicates = self.disallow_schemas = ()
+        if "extends" in json_obj:
+            self._init_bases(schema)
+        else:
+            self.bases = ()
+        # Keywords that are not supported, they are rare so the validator
+        # only looks at them when the schema has them
+        self.has_unsupported = (
+            "contentEncoding" in json_obj or "divisibleBy" in json_obj)
+
+    def __getattr__(self, name):
+        # Only called for the slots that are not set yet
+        try:
+            init = self._PARTS[name]
+        except KeyError:
+            raise AttributeError(name)
+        init(self, self._schema_ref())
+        return getattr(self, name)
+
+    def _init_type(self, schema):
+        # Predicate for the simple types and, for union types, the nested
+        # schemas to try when the predicate says no.
+        json_type = schema.type
+        if isinstance(json_type, list):
+            self.has_type = _get_type_predicate(tuple(
+                alt_type for alt_type in json_type
+                if isinstance(alt_type, basestring)))
+            type_schemas = []
+            for index, alt_type in enumerate(json_type):
+                if isinstance(alt_type, dict):
+                    type_schemas.append(
+                        (index, schema._subschema(alt_type)))
+                elif isinstance(alt_type, list):
+                    # A nested union
+                    type_schemas.append(
+                        (index, Schema({"type": alt_type})))
+            self.type_schemas = type_schemas
+        elif isinstance(json_type, dict):
+            self.has_type = None
+            self.type_schemas = ()
+        else:
+            self.has_type = _get_type_predicate((json_type, ))
+            self.type_schemas = ()
+
+    def _init_object(self, schema):
+        # (prop, schema, schema path, object path) for each property
+        properties = [
+            (prop, schema._subschema(prop_schema_json), ".properties." + prop,
+             "." + prop)
+            for prop, prop_schema_json in schema.properties.items()]
+        self.required = frozenset(
+            prop for prop, prop_schema, schema_path, object_path
+            in properties if not prop_schema.optional)
+        self.known = frozenset(schema.properties)
+        additional = schema.additionalProperties
+        if additional is False:
+            self.additional = False
+        elif additional == {}:
+            # The default, empty schema accepts everything
+            self.additional = None
+        else:
+            self.additional = schema._subschema(additional)
+        self.properties = properties
+
+    def _init_items(self, schema):
+        items = schema.items
+        if isinstance(items, dict) and items != {}:
+            self.items = schema._subschema(items)
+        else:
+            self.items = None
+
+    def _init_enum(self, schema):
+        # Keys of the allowed values, see json_key()
+        enum = schema.enum
+        if enum is None:
+            self.enum = None
+        else:
+            self.enum = frozenset(json_key(item) for item in enum)
+
+    def _init_disallow(self, schema):
+        # Predicate for the disallowed simple types, (name, predicate) for
+        # each of them and the disallowed nested schemas with their paths
+        disallow_type = None
+        disallow_predicates = []
+        disallow_schemas = []
+        disallow = schema.disallow
+        if disallow is not None:
+            disallow_names = [
+                name for name in disallow if isinstance(name, basestring)]
+            if disallow_names:
+                disallow_type = _get_type_predicate(tuple(disallow_names))
+                disallow_predicates = [
+                    (name, _get_type_predicate((name, )))
+                    for name in disallow_names]
+            if isinstance(schema._schema["disallow"], dict):
+                disallow_schemas = [
+                    (schema._subschema(disallow[0]), ".disallow")]
+            else:
+                disallow_schemas = [
+                    (schema._subschema(alt), ".disallow.%d" % index)
+                    for index, alt in enumerate(disallow)
+                    if isinstance(alt, dict)]
+        self.disallow_predicates = disallow_predicates
+        self.disallow_schemas = disallow_schemas
+        self.disallow_type = disallow_type
+
+    def _init_bases(self, schema):
+        # (schema, schema path) for each extended schema
+        bases = schema.extends
+        if bases is None:
+            self.bases = []
+        elif isinstance(bases, dict):
+            self.bases = [(schema._subschema(bases), ".extends")]
+        else:
+            self.bases = [
+                (schema._subschema(base), ".extends.%d" % index)
+                for index, base in enumerate(bases)]
+
+    # Slot -> method that computes it, for the parts computed on first use
+    _PARTS = {
+        "properties": _init_object,
+        "required": _init_object,
+        "known": _init_object,
+        "additional": _init_object,
+        "items": _init_items,
+    }
+
+
+# Tuple of type names -> type_predicate()
+_type_predicates = {}
+
+
+def _get_type_predicate(type_names):
+    try:
+        return _type_predicates[type_names]
+    except KeyError:
+        return _type_predicates.setdefault(
+            type_names, type_predicate(type_names))
+
+
+def _get_layout(schema):
+    layout = schema._layout
+    if layout is None:
+        layout = _SchemaLayout(schema)
+        # SchemaNode does not allow setting attributes
+        object.__setattr__(schema, "_layout", layout)
+    return layout
+
+
+_compiled_checks = weakref.WeakKeyDictionary()
+
+
+def _get_compiled_check(schema, format_registry, schema_registry):
+    # Only the check is kept. CompiledValidator refers to the schema, it
+    # would keep the weak key alive forever.
+    by_registry = _compiled_checks.get(schema)
+    if by_registry is None:
+        by_registry = _compiled_checks[schema] = {}
+    key = (format_registry, schema_registry)
+    try:
+        return by_registry[key]
+    except KeyError:
+        check = by_registry[key] = compile(
+            schema, format_registry, schema_registry)._check
+        return check
+
+
+class ValidationResult(collections.namedtuple(
+        "ValidationResult", "valid errors")):
+    """
+    Outcome of validating one document with
+    :meth:`Validator.validate_many`.
+
+    .. attribute:: valid
+
+        True if the document matches the schema.
+
+    .. attribute:: errors
+
+        Tuple of :class:`json_schema_validator.errors.ValidationError`
+        describing the problems found in the document. Depending on how
+        much detail was requested it contains no errors, just the first error
+        or all of them.
+
+    The result is true when the document is valid.
+    """
+
+    __slots__ = ()
+
+    def __bool__(self):
+        return self.valid
+
+    __nonzero__ = __bool__
+
+
 class Validator(object):
     """
     JSON Schema validator.
@@ -53,6 +305,13 @@ class Validator(object):
         "null": None.__class__,
     }
 
+    # Checkers of the format keyword, see json_schema_validator.formats
+    format_registry = formats.format_registry
+
+    # Schemas that $ref may refer to, see json_schema_validator.registry.
+    # References within the validated schema are always resolved.
+    schema_registry = None
+
     def __init__(self):
         self._schema_stack = []
         self._object_stack = []
@@ -105,42 +364,262 @@ class Validator(object):
         self.validate_toplevel(schema, obj)
         return True
 
+    @classmethod
+    def iter_errors(cls, schema, obj, max_errors=None):
+        """
+        Iterate over all the problems found in obj.
+
+        Errors are produced lazily, as the object is walked. Stopping the
+        iteration early (or using max_errors) stops the validation process so
+        the remaining parts of the object are never looked at.
+
+        :param schema:
+            Schema to validate against
+        :type schema:
+            :class:`json_schema_validator.schema.Schema`
+        :param obj:
+            JSON object to validate
+        :param max_errors:
+            Maximum number of errors to report or None for no limit
+        :type max_errors:
+            :class:`int`
+        :returns:
+            Iterator of :class:`json_schema_validator.errors.ValidationError`
+        :raises `json_schema_validator.errors.SchemaError`:
+            if the schema itself is wrong.
+        """
+        if not isinstance(schema, Schema):
+            raise ValueError(
+                "schema value {0!r} is not a Schema"
+                " object".format(schema))
+        if max_errors is not None and max_errors < 0:
+            raise ValueError("max_errors cannot be negative")
+        self = cls()
+        errors = self.iter_errors_toplevel(schema, obj)
+        if max_errors is not None:
+            errors = itertools.islice(errors, max_errors)
+        return errors
+
+    @classmethod
+    def is_valid(cls, schema, obj):
+        """
+        Check if specified JSON object obj matches specified schema.
+
+        This is meant for using schemas as predicates, when the details of
+        a mismatch are not interesting. The schema is compiled (see
+        :func:`json_schema_validator.compiler.compile`) on first use and
+        the compiled form is kept for as long as the schema exists, so the
+        schema must not be modified afterwards. Checking stops at the first
+        mismatch and no error, message or expression is built.
+
+        :param schema:
+            Schema to validate against
+        :type schema:
+            :class:`json_schema_validator.schema.Schema`
+        :param obj:
+            JSON object to check
+        :rtype:
+            bool
+        :raises `json_schema_validator.errors.SchemaError`:
+            if the schema itself is wrong.
+        """
+        if not isinstance(schema, Schema):
+            raise ValueError(
+                "schema value {0!r} is not a Schema"
+                " object".format(schema))
+        check = _get_compiled_check(
+            schema, cls.format_registry, cls.schema_registry)
+        return check is None or check(obj, [(obj, "object")], False) is None
+
+    @classmethod
+    def first_match(cls, schemas, obj):
+        """
+        Find the first of specified schemas that obj matches.
+
+            >>> schemas = [Schema({"type": "string"}),
+            ...            Schema({"type": "number"})]
+            >>> Validator.first_match(schemas, 5)
+            1
+            >>> Validator.first_match(schemas, None) is None
+            True
+
+        :param schemas:
+            Sequence of :class:`json_schema_validator.schema.Schema`, they
+            are tried in order with :meth:`is_valid`
+        :param obj:
+            JSON object to check
+        :returns:
+            Index of the first matching schema or None if there is no match
+        """
+        for index, schema in enumerate(schemas):
+            if cls.is_valid(schema, obj):
+                return index
+        return None
+
+    @classmethod
+    def validate_many(cls, schema, iterable, report="first"):
+        """
+        Validate each JSON object from iterable with specified schema.
+
+        The schema is compiled (see
+        :func:`json_schema_validator.compiler.compile`) once and the compiled
+        checks are shared by all the objects. Valid objects never pay for
+        anything else. Results are produced lazily, one per object.
+
+        :param schema:
+            Schema to validate against
+        :type schema:
+            :class:`json_schema_validator.schema.Schema`
+        :param iterable:
+            Iterable of JSON objects to validate
+        :param report:
+            Amount of detail to report about invalid objects. Either
+            ``"ok"`` (no errors, just the outcome), ``"first"`` (the first
+            error) or ``"all"`` (all the errors, as found by
+            :meth:`iter_errors`)
+        :returns:
+            Iterator of :class:`ValidationResult`, in the same order as
+            iterable
+        :raises `json_schema_validator.errors.SchemaError`:
+            if the schema itself is wrong.
+        """
+        if report not in ("ok", "first", "all"):
+            raise ValueError(
+                "report value {0!r} is not one of 'ok', 'first'"
+                " or 'all'".format(report))
+        compiled = compile(schema, cls.format_registry, cls.schema_registry)
+        return cls._validate_many(schema, compiled, iterable, report)
+
+    @classmethod
+    def _validate_many(cls, schema, compiled, iterable, report):
+        valid_result = ValidationResult(True, ())
+        invalid_result = ValidationResult(False, ())
+        if report == "ok":
+            is_valid = compiled.is_valid
+            for obj in iterable:
+                yield valid_result if is_valid(obj) else invalid_result
+            return
+        first_error = compiled.first_error
+        for obj in iterable:
+            error = first_error(obj)
+            if error is None:
+                yield valid_result
+            elif report == "first":
+                yield ValidationResult(False, (error, ))
+            else:
+                yield ValidationResult(
+                    False, tuple(cls.iter_errors(schema, obj)))
+
+    def _make_sub_validator(self):
+        """Create a validator used to check the enclosing object."""
+        return self.__class__()
+
     def _get_object_expression(self):
-        return "".join(map(lambda x: x[1], self._object_stack))
+        return _join_paths(self._object_stack)
 
     def _get_schema_expression(self):
-        return "".join(map(lambda x: x[1], self._schema_stack))
+        return _join_paths(self._schema_stack)
 
     def validate_toplevel(self, schema, obj):
+        for error in self.iter_errors_toplevel(schema, obj):
+            raise error
+
+    def iter_errors_toplevel(self, schema, obj):
         self._object_stack = []
         self._schema_stack = []
         self._push_schema(schema, "schema")
         self._push_object(obj, "object")
-        self._validate()
+        for error in self._walk():
+            yield error
         self._pop_schema()
         self._pop_object()
 
+    def _walk(self):
+        """
+        Validate the object on top of the stack, including nested objects.
+
+        This is used to start validation from the top of the stacks.
+        Validator simply recurses through nested objects, see
+        :class:`IterativeValidator` for an alternative.
+        """
+        return self._validate()
+
+    def _walk_nested(self, walk):
+        """
+        Walk the object on top of the stacks of another (or the same)
+        validator while the current check is suspended.
+
+        :param walk:
+            :class:`_NestedWalk` describing the walk
+        :returns:
+            Iterable that the calling check must yield from. Unless the walk
+            is a trial it contains the errors that were found. Trials stop
+            at the first error and store the outcome in ``walk.matched``
+            instead.
+        """
+        errors = walk.validator._walk()
+        if not walk.trial:
+            return errors
+        for error in errors:
+            walk.matched = False
+            break
+        else:
+            walk.matched = True
+        return ()
+
     def _validate(self):
+        """
+        Validate the object on top of the stack with the current schema.
+
+        This method (and all the _validate_xxx() methods) are generators
+        yielding each problem that was found.
+        """
+        schema = self._schema
+        if schema.ref is not None:
+            # The referenced schema is used instead, in the same place
+            self._push_schema(self._resolve_ref(schema), "")
+            for error in self._validate():
+                yield error
+            self._pop_schema()
+            return
         obj = self._object
-        self._validate_type()
-        self._validate_requires()
+        layout = _get_layout(schema)
+        for error in self._validate_type():
+            yield error
+        if layout.disallow_type is not None or layout.disallow_schemas:
+            for error in self._validate_disallow():
+                yield error
+        for error in self._validate_requires():
+            yield error
+        for error in self._validate_enum():
+            yield error
         if isinstance(obj, dict):
-            self._validate_properties()
-            self._validate_additional_properties()
+            for error in self._validate_properties():
+                yield error
+            for error in self._validate_additional_properties():
+                yield error
         elif isinstance(obj, list):
-            self._validate_items()
+            for error in self._validate_items():
+                yield error
         else:
-            self._validate_enum()
-            self._validate_format()
-            self._validate_pattern()
+            for error in self._validate_format():
+                yield error
+            for error in self._validate_pattern():
+                yield error
             if isinstance(obj, basestring):
-                self._validate_length()
+                for error in self._validate_length():
+                    yield error
             elif isinstance(obj, NUMERIC_TYPES):
-                self._validate_range()
-        self._report_unsupported()
+                for error in self._validate_range():
+                    yield error
+        if layout.bases:
+            for error in self._validate_extends():
+                yield error
+        if layout.has_unsupported:
+            self._report_unsupported()
 
     def _report_error(self, legacy_message, new_message=None,
-                      schema_suffix=None):
+                      schema_suffix=None, **legacy_args):
         """
         Report an error during validation.
 
@@ -155,32 +634,40 @@ class Validator(object):
         is quite handy to specify the bit that the validator looked at (such as
         the type or optional flag, etc). object_suffix serves the same purpose
         but is used for object expressions instead.
+
+        The legacy message is a format string, it is formatted with
+        legacy_args only when the message is accessed. Likewise object_expr
+        and schema_expr are computed from a snapshot of the stacks only when
+        they are accessed.
+
+        The error is returned, it is up to the caller to yield it.
         """
-        object_expr = self._get_object_expression()
-        schema_expr = self._get_schema_expression()
-        if schema_suffix:
-            schema_expr += schema_suffix
-        raise ValidationError(legacy_message, new_message, object_expr,
-                              schema_expr)
-
-    def _push_property_schema(self, prop):
-        """Construct a sub-schema from a property of the current schema."""
-        schema = Schema(self._schema.properties[prop])
-        self._push_schema(schema, ".properties." + prop)
-
-    def _push_additional_property_schema(self):
-        schema = Schema(self._schema.additionalProperties)
-        self._push_schema(schema, ".additionalProperties")
+        return ValidationError(
+            functools.partial(legacy_message.format, **legacy_args),
+            new_message,
+            functools.partial(_join_paths, list(self._object_stack)),
+            functools.partial(_join_paths, list(self._schema_stack),
+                              schema_suffix))
 
     def _push_array_schema(self):
-        schema = Schema(self._schema.items)
-        self._push_schema(schema, ".items")
+        self._push_schema(_get_layout(self._schema).items, ".items")
 
     def _push_array_item_object(self, index):
         self._push_object(self._object[index], "[%d]" % index)
 
-    def _push_property_object(self, prop):
-        self._push_object(self._object[prop], "." + prop)
+    def _validate_extends(self):
+        # The object must match each extended schema as well
+        for base, path in _get_layout(self._schema).bases:
+            self._push_schema(base, path)
+            for error in self._validate():
+                yield error
+            self._pop_schema()
+
+    def _resolve_ref(self, schema):
+        # References are resolved relative to the schema being validated,
+        # it is always at the bottom of the stack.
+        root = self._schema_stack[0][0]
+        return _get_root_registry(root, self.schema_registry).resolve(schema)
 
     def _report_unsupported(self):
         schema = self._schema
@@ -188,69 +675,90 @@ class Validator(object):
             raise NotImplementedError("contentEncoding is not supported")
         if schema.divisibleBy != 1:
             raise NotImplementedError("divisibleBy is not supported")
-        if schema.disallow is not None:
-            raise NotImplementedError("disallow is not supported")
+
+    def _validate_disallow(self):
+        layout = _get_layout(self._schema)
+        obj = self._object
+        if layout.disallow_type is not None and layout.disallow_type(obj):
+            for name, has_type in layout.disallow_predicates:
+                if has_type(obj):
+                    break
+            yield self._report_error(
+                "{obj!r} matches disallowed type {type!r}",
+                "Object has disallowed type ({type})".format(type=name),
+                schema_suffix=".disallow",
+                obj=obj, type=name)
+            return
+        # The object must not match any of the nested schemas
+        object_depth = len(self._object_stack)
+        schema_depth = len(self._schema_stack)
+        for disallow_schema, path in layout.disallow_schemas:
+            self._push_schema(disallow_schema, path)
+            trial = _NestedWalk(self, trial=True)
+            for error in self._walk_nested(trial):
+                yield error
+            del self._object_stack[object_depth:]
+            del self._schema_stack[schema_depth:]
+            if trial.matched:
+                yield self._report_error(
+                    "{obj!r} matches a disallowed schema",
+                    "Object matches a disallowed schema",
+                    schema_suffix=path,
+                    obj=obj)
+                return
 
     def _validate_type(self):
         schema = self._schema
-        json_type = schema.type
-        if json_type == "any":
-            return
         obj = self._object
-        if json_type == "boolean":
-            # Bool is special cased because in python there is no
-            # way to test for isinstance(something, bool) that would
-            # not catch isinstance(1, bool) :/
-            if obj is not True and obj is not False:
-                self._report_error(
-                    "{obj!r} does not match type {type!r}".format(
-                        obj=obj, type=json_type),
-                    "Object has incorrect type (expected boolean)",
-                    schema_suffix=".type")
-        elif isinstance(json_type, dict):
+        layout = _get_layout(schema)
+        if layout.has_type is not None and layout.has_type(obj):
+            return
+        json_type = schema.type
+        if isinstance(json_type, dict):
             # Nested type check. This is pretty odd case. Here we
             # don't change our object stack (it's the same object).
-            self._push_schema(Schema(json_type), ".type")
-            self._validate()
+            self._push_schema(schema._subschema(json_type), ".type")
+            for error in self._validate():
+                yield error
             self._pop_schema()
-        elif isinstance(json_type, list):
+            return
+        if isinstance(json_type, list):
             # Alternative type check, here we may match _any_ of the types
-            # in the list to be considered valid.
-            json_type_list = json_type
-            if json_type == []:
-                return
-            for index, json_type in enumerate(json_type_list):
-                # Aww, ugly. The level of packaging around Schema is annoying
-                self._push_schema(
-                    Schema({'type': json_type}),
-                    ".type.%d" % index)
-                try:
-                    self._validate()
-                except ValidationError:
-                    # Ignore errors, we just want one thing to match
-                    pass
-                else:
-                    # We've got a match - break the loop
-                    break
-                finally:
-                    # Pop the schema regardless of match/mismatch
-                    self._pop_schema()
-            else:
-                # We were not interupted (no break) so we did not match
-                self._report_error(
-                    "{obj!r} does not match any of the types in {type!r}".format(
-                        obj=obj, type=json_type_list),
-                    "Object has incorrect type (multiple types possible)",
-                    schema_suffix=".type")
+            # in the list to be considered valid. None of the simple types
+            # matched so try each nested schema.
+            object_depth = len(self._object_stack)
+            schema_depth = len(self._schema_stack)
+            for index, type_schema in layout.type_schemas:
+                self._push_schema(type_schema, ".type.%d" % index)
+                # Ignore errors, we just want one thing to match
+                trial = _NestedWalk(self, trial=True)
+                for error in self._walk_nested(trial):
+                    yield error
+                # Pop the schema regardless of match/mismatch. The walk may
+                # have been abandoned half-way so drop anything it has left
+                # on the stacks as well.
+                del self._object_stack[object_depth:]
+                del self._schema_stack[schema_depth:]
+                if trial.matched:
+                    return
+            yield self._report_error(
+                "{obj!r} does not match any of the types in {type!r}",
+                "Object has incorrect type (multiple types possible)",
+                schema_suffix=".type",
+                obj=obj, type=json_type)
+        elif json_type == "boolean":
+            yield self._report_error(
+                "{obj!r} does not match type {type!r}",
+                "Object has incorrect type (expected boolean)",
+                schema_suffix=".type",
+                obj=obj, type=json_type)
         else:
-            # Simple type check
-            if not isinstance(obj, self.JSON_TYPE_MAP[json_type]):
-                self._report_error(
-                    "{obj!r} does not match type {type!r}".format(
-                        obj=obj, type=json_type),
-                    "Object has incorrect type (expected {type})".format(
-                        type=json_type),
-                    schema_suffix=".type")
+            yield self._report_error(
+                "{obj!r} does not match type {type!r}",
+                "Object has incorrect type (expected {type})".format(
+                    type=json_type),
+                schema_suffix=".type",
+                obj=obj, type=json_type)
 
     def _validate_pattern(self):
         ptn = self._schema.pattern
@@ -260,176 +768,181 @@ class Validator(object):
             return
         if not isinstance(obj, basestring):
             return
-        if re.match(ptn, obj):
+        if ptn.match(obj):
             return
 
-        self._report_error(
-            "{obj!r} does not match pattern {ptn!r}".format(
-                obj=obj,ptn=ptn),
+        yield self._report_error(
+            "{obj!r} does not match pattern {ptn!r}",
             "Object does not match pattern (expected {ptn})".format(
                 ptn=ptn),
-            schema_suffix=".pattern"
-        )
+            schema_suffix=".pattern",
+            obj=obj, ptn=ptn)
 
     def _validate_format(self):
-        fmt = self._schema.format
-        obj = self._object
-        if fmt is None:
+        checkers = _get_layout(self._schema).format_checkers
+        if checkers is None:
             return
-        if fmt == 'date-time':
-            try:
-                DATE_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
-                datetime.datetime.strptime(obj, DATE_TIME_FORMAT)
-            except ValueError:
-                self._report_error(
-                    "{obj!r} is not a string representing JSON date-time".format(
-                        obj=obj),
-                    "Object is not a string representing JSON date-time",
-                    schema_suffix=".format")
-        elif fmt == 'regex':
-            try:
-                re.compile(obj)
-            except:
-                self._report_error(
-                    "{obj!r} is not a string representing a regex".format(
-                        obj=obj),
-                    "Object is not a string representing a regex",
-                    schema_suffix=".format")
-        else:
-            raise NotImplementedError("format {0!r} is not supported".format(fmt))
+        # The checker is looked up once per registry, unless the registry
+        # is changed
+        registry = self.format_registry
+        version, checker = checkers.get(registry, (None, None))
+        if version != registry._version:
+            fmt = self._schema.format
+            if fmt is None:
+                return
+            checker = registry.get(fmt)
+            checkers[registry] = (registry._version, checker)
+        obj = self._object
+        if not checker.check(obj):
+            yield self._report_error(
+                checker.legacy_message, checker.new_message,
+                schema_suffix=".format",
+                obj=obj)
 
     def _validate_properties(self):
         obj = self._object
-        schema = self._schema
         assert isinstance(obj, dict)
-        for prop in schema.properties.keys():
-            self._push_property_schema(prop)
+        layout = _get_layout(self._schema)
+        missing = layout.required.difference(obj)
+        for prop, prop_schema, schema_path, object_path in layout.properties:
             if prop in obj:
-                self._push_property_object(prop)
-                self._validate()
+                self._push_schema(prop_schema, schema_path)
+                self._push_object(obj[prop], object_path)
+                for error in self._validate():
+                    yield error
                 self._pop_object()
-            else:
-                if not self._schema.optional:
-                    self._report_error(
-                        "{obj!r} does not have property {prop!r}".format(
-                            obj=obj, prop=prop),
-                        "Object lacks property {prop!r}".format(
-                            prop=prop),
-                        schema_suffix=".optional")
-            self._pop_schema()
+                self._pop_schema()
+            elif prop in missing:
+                self._push_schema(prop_schema, schema_path)
+                yield self._report_error(
+                    "{obj!r} does not have property {prop!r}",
+                    "Object lacks property {prop!r}".format(
+                        prop=prop),
+                    schema_suffix=".optional",
+                    obj=obj, prop=prop)
+                self._pop_schema()
 
     def _validate_additional_properties(self):
         obj = self._object
         assert isinstance(obj, dict)
-        if self._schema.additionalProperties is False:
+        layout = _get_layout(self._schema)
+        if layout.additional is False:
             # Additional properties are disallowed
+            if layout.known.issuperset(obj):
+                return
             # Report exception for each unknown property
             for prop in obj.keys():
-                if prop not in self._schema.properties:
-                    self._report_error(
+                if prop not in layout.known:
+                    yield self._report_error(
                         "{obj!r} has unknown property {prop!r} and"
-                        " additionalProperties is false".format(
-                            obj=obj, prop=prop),
+                        " additionalProperties is false",
                         "Object has unknown property {prop!r} but"
                         " additional properties are disallowed".format(
                             prop=prop),
-                        schema_suffix=".additionalProperties")
-        else:
+                        schema_suffix=".additionalProperties",
+                        obj=obj, prop=prop)
+        elif layout.additional is not None:
             # Check each property against this object
-            self._push_additional_property_schema()
-            for prop in obj.keys():
-                self._push_property_object(prop)
-                self._validate()
+            self._push_schema(layout.additional, ".additionalProperties")
+            for prop, value in obj.items():
+                self._push_object(value, "." + prop)
+                for error in self._validate():
+                    yield error
                 self._pop_object()
             self._pop_schema()
 
     def _validate_enum(self):
         obj = self._object
         schema = self._schema
-        if schema.enum is not None:
-            for allowed_value in schema.enum:
-                if obj == allowed_value:
-                    break
-            else:
-                self._report_error(
+        enum = _get_layout(schema).enum
+        if enum is not None:
+            if json_key(obj) not in enum:
+                yield self._report_error(
                     "{obj!r} does not match any value in enumeration"
-                    " {enum!r}".format(obj=obj, enum=schema.enum),
+                    " {enum!r}",
                     "Object does not match any value in enumeration",
-                    schema_suffix=".enum")
+                    schema_suffix=".enum",
+                    obj=obj, enum=schema.enum)
 
     def _validate_length(self):
         obj = self._object
         schema = self._schema
         if schema.minLength is not None:
             if len(obj) < schema.minLength:
-                self._report_error(
+                yield self._report_error(
                     "{obj!r} does not meet the minimum length"
-                    " {minLength!r}".format(obj=obj, minLength=schema.minLength),
+                    " {minLength!r}",
                     "Object does not meet the minimum length",
-                    schema_suffix=".minLength")
+                    schema_suffix=".minLength",
+                    obj=obj, minLength=schema.minLength)
         if schema.maxLength is not None:
             if len(obj) > schema.maxLength:
-                self._report_error(
+                yield self._report_error(
                     "{obj!r} exceeds the maximum length"
-                    " {maxLength!r}".format(obj=obj, maxLength=schema.maxLength),
+                    " {maxLength!r}",
                     "Object exceeds the maximum length",
-                    schema_suffix=".maxLength")
+                    schema_suffix=".maxLength",
+                    obj=obj, maxLength=schema.maxLength)
 
     def _validate_range(self):
         obj = self._object
         schema = self._schema
         if schema.minimum is not None:
             if obj < schema.minimum or (obj == schema.minimum and not schema.minimumCanEqual):
-                self._report_error(
+                yield self._report_error(
                     "{obj!r} is less than the minimum"
-                    " {minimum!r}".format(obj=obj, minimum=schema.minimum),
+                    " {minimum!r}",
                     "Object is less than the minimum",
-                    schema_suffix=".minimum")
+                    schema_suffix=".minimum",
+                    obj=obj, minimum=schema.minimum)
         if schema.maximum is not None:
             if obj > schema.maximum or (obj == schema.maximum and not schema.maximumCanEqual):
-                self._report_error(
+                yield self._report_error(
                     "{obj!r} is greater than the maximum"
-                    " {maximum!r}".format(obj=obj, maximum=schema.maximum),
+                    " {maximum!r}",
                     "Object is greater than the maximum",
-                    schema_suffix=".maximum")
+                    schema_suffix=".maximum",
+                    obj=obj, maximum=schema.maximum)
 
     def _validate_items(self):
         obj = self._object
         schema = self._schema
         assert isinstance(obj, list)
+        if schema.uniqueItems is True:
+            duplicate = find_duplicate(obj)
+            if duplicate is not None:
+                yield self._report_error(
+                    "Repeated items found in {obj!r}",
+                    "Repeated items found in array (item {1} repeats"
+                    " item {0})".format(*duplicate),
+                    schema_suffix=".items",
+                    obj=obj)
         items_schema_json = schema.items
         if items_schema_json == {}:
             # default value, don't do anything
             return
-        if isinstance(obj, list) and schema.uniqueItems is True and len(set(obj)) != len(obj):
-            # If we want a list of unique items and the length of unique
-            # elements is different from the length of the full list
-            # then validation fails.
-            # This implementation isn't strictly compatible with the specs, because
-            # we are not checking unique dicts.
-            self._report_error(
-                "Repeated items found in {obj!r}".format(obj=obj),
-                "Repeated items found in array",
-                schema_suffix=".items")
         if schema.minItems:
             if len(obj) < schema.minItems:
-                self._report_error(
+                yield self._report_error(
                     "{obj!r} has fewer than the minimum number of items"
-                    " {minItems!r}".format(obj=obj, minimum=schema.minItems),
+                    " {minItems!r}",
                     "Object has fewer than the minimum number of items",
-                    schema_suffix=".minItems")
+                    schema_suffix=".minItems",
+                    obj=obj, minItems=schema.minItems)
         if schema.maxItems is not None:
             if len(obj) > schema.maxItems:
-                self._report_error(
+                yield self._report_error(
                     "{obj!r} has more than the maximum number of items"
-                    " {maxItems!r}".format(obj=obj, minimum=schema.maxItems),
+                    " {maxItems!r}",
                     "Object has more than the maximum number of items",
-                    schema_suffix=".maxItems")
+                    schema_suffix=".maxItems",
+                    obj=obj, maxItems=schema.maxItems)
         if isinstance(items_schema_json, dict):
             self._push_array_schema()
             for index, item in enumerate(obj):
                 self._push_array_item_object(index)
-                self._validate()
+                for error in self._validate():
+                    yield error
                 self._pop_object()
             self._pop_schema()
         elif isinstance(items_schema_json, list):
@@ -438,21 +951,22 @@ class Validator(object):
                 # validation fails. Longer arrays are okay (during this
                 # step) as they are validated based on
                 # additionalProperties schema
-                self._report_error(
-                    "{obj!r} is shorter than array schema {schema!r}".
-                    format(obj=obj, schema=items_schema_json),
+                yield self._report_error(
+                    "{obj!r} is shorter than array schema {schema!r}",
                     "Object array is shorter than schema array",
-                    schema_suffix=".items")
+                    schema_suffix=".items",
+                    obj=obj, schema=items_schema_json)
             if len(obj) != len(items_schema_json) and schema.additionalProperties is False:
                 # If our array is not exactly the same size as the
                 # schema and additional properties are disallowed then
                 # validation fails
-                self._report_error(
+                yield self._report_error(
                     "{obj!r} is not of the same length as array schema"
                     " {schema!r} and additionalProperties is"
-                    " false".format(obj=obj, schema=items_schema_json),
+                    " false",
                     "Object array is not of the same length as schema array",
-                    schema_suffix=".items")
+                    schema_suffix=".items",
+                    obj=obj, schema=items_schema_json)
             # Validate each array element using schema for the
             # corresponding array index, fill missing values (since
             # there may be more items in our array than in the schema)
@@ -461,13 +975,17 @@ class Validator(object):
                 zip_longest(
                     obj, items_schema_json,
                     fillvalue=schema.additionalProperties)):
-                item_schema = Schema(item_schema_json)
+                if index >= len(obj) or item_schema_json is False:
+                    # The length mismatch was already reported above
+                    break
+                item_schema = schema._subschema(item_schema_json)
                 if index < len(items_schema_json):
                     self._push_schema(item_schema, "items[%d]" % index)
                 else:
                     self._push_schema(item_schema, ".additionalProperties")
                 self._push_array_item_object(index)
-                self._validate()
+                for error in self._validate():
+                    yield error
                 self._pop_schema()
                 self._pop_object()
 
@@ -480,25 +998,27 @@ class Validator(object):
             return
         # Find our enclosing object in the object stack
         if len(self._object_stack) < 2:
-            self._report_error(
+            yield self._report_error(
                 "{obj!r} requires that enclosing object matches"
                 " schema {schema!r} but there is no enclosing"
-                " object".format(obj=obj, schema=requires_json),
+                " object",
                 "Object has no enclosing object that matches schema",
-                schema_suffix=".requires")
+                schema_suffix=".requires",
+                obj=obj, schema=requires_json)
+            return
         # Note: Parent object can be None, (e.g. a null property)
         parent_obj = self._object_stack[-2][0]
         if isinstance(requires_json, basestring):
             # This is a simple property test
             if (not isinstance(parent_obj, dict)
                 or requires_json not in parent_obj):
-                self._report_error(
+                yield self._report_error(
                     "{obj!r} requires presence of property {requires!r}"
-                    " in the same object".format(
-                        obj=obj, requires=requires_json),
+                    " in the same object",
                     "Enclosing object does not have property"
                     " {prop!r}".format(prop=requires_json),
-                    schema_suffix=".requires")
+                    schema_suffix=".requires",
+                    obj=obj, requires=requires_json)
         elif isinstance(requires_json, dict):
             # Requires designates a whole schema, the enclosing object
             # must match against that schema.
@@ -508,9 +1028,106 @@ class Validator(object):
             # and restoring the state would be very complicated we just
             # instantiate a new validator with a subset of our current
             # history here.
-            sub_validator = Validator()
+            sub_validator = self._make_sub_validator()
             sub_validator._object_stack = self._object_stack[:-1]
             sub_validator._schema_stack = self._schema_stack[:]
             sub_validator._push_schema(
-                Schema(requires_json), ".requires")
-            sub_validator._validate()
+                schema._subschema(requires_json), ".requires")
+            for error in self._walk_nested(_NestedWalk(sub_validator)):
+                yield error
+
+
+class _NestedWalk(object):
+    """
+    Request to walk the object on top of the stacks of a validator.
+
+    :param validator:
+        Validator whose stacks are used
+    :param trial:
+        If True the walk only tells if the object matches, see
+        :meth:`Validator._walk_nested`
+    """
+
+    __slots__ = ("validator", "trial", "matched")
+
+    def __init__(self, validator, trial=False):
+        self.validator = validator
+        self.trial = trial
+        self.matched = None
+
+
+# Marker used by IterativeValidator to request validation of a nested object
+_DESCEND = object()
+
+
+class IterativeValidator(Validator):
+    """
+    JSON Schema validator that does not recurse.
+
+    :class:`Validator` validates nested objects with recursive method calls,
+    each level of the document costs several Python stack frames so the depth
+    of documents that can be validated is limited by the recursion limit.
+
+    This validator runs the very same checks but keeps the work that is
+    pending for each level on an explicit stack. Instead of recursing, each
+    request to validate a nested object is handed back to a simple loop
+    which suspends the requesting check until the nested object is done. The
+    depth of the validated document is only limited by available memory. The
+    errors, and the order in which they are found, are identical to those of
+    :class:`Validator`. Nested walks, such as trying each alternative of a
+    union type, run on the same stack.
+
+        >>> from json_schema_validator.schema import Schema
+        >>> schema = {}
+        >>> obj = []
+        >>> for i in range(5000):
+        ...     schema = {"type": "array", "items": schema}
+        ...     obj = [obj]
+        >>> IterativeValidator.validate(Schema(schema), obj)
+        True
+    """
+
+    def _validate(self):
+        # Instead of recursing ask _walk() to validate the object on top of
+        # the stack. The caller is resumed once that is done.
+        yield _DESCEND
+
+    def _walk_nested(self, walk):
+        # Hand the walk over to _walk(), it runs on the same stack and the
+        # caller is resumed once it is done.
+        return (walk, )
+
+    def _walk(self):
+        validate = super(IterativeValidator, self)._validate
+        pending = [validate()]
+        # Nested walks in progress, each one with the size of pending when it
+        # started and the validate method of the walk it interrupted.
+        nested = []
+        while pending:
+            try:
+                error = next(pending[-1])
+            except StopIteration:
+                pending.pop()
+                if nested and len(pending) == nested[-1][1]:
+                    walk, depth, validate = nested.pop()
+                    walk.matched = True
+                continue
+            if error is _DESCEND:
+                pending.append(validate())
+            elif isinstance(error, _NestedWalk):
+                nested.append((error, len(pending), validate))
+                validate = super(
+                    IterativeValidator, error.validator)._validate
+                pending.append(validate())
+            else:
+                # The innermost trial, if any, has failed. Abandon it along
+                # with anything it has started.
+                for index in range(len(nested) - 1, -1, -1):
+                    if nested[index][0].trial:
+                        walk, depth, validate = nested[index]
+                        del nested[index:]
+                        del pending[depth:]
+                        walk.matched = False
+                        break
+                else:
+                    yield error